@@ -0,0 +1,313 @@
+import json
+import logging
+import time
+
+import numpy as np
+
+from data_plan import week_start
+from fsutil import atomic_writer
+from indicators import rsi, stoch_rsi_k
+from metrics import log_event, timed
+from screening import WEEKLY_RSI_THRESHOLD, WEEKLY_STOCH_RSI_THRESHOLD
+
+DAY = 86400
+
+# Forward-return horizons, in bars of the tested timeframe (weeks by default)
+DEFAULT_HORIZONS = (1, 4, 13, 26)
+
+# 10 x 10 threshold grid around the live rule (which it contains)
+DEFAULT_RSI_THRESHOLDS = tuple(range(10, 60, 5))
+DEFAULT_STOCH_RSI_THRESHOLDS = tuple(range(5, 55, 5))
+
+logger = logging.getLogger(__name__)
+
+
+class PriceHistory:
+    """
+    Close prices of a universe aligned on one time axis: a (symbols x bars)
+    float64 matrix with NaN where a symbol has no bar (e.g. before it listed).
+    """
+
+    def __init__(self, symbols, timestamps, closes):
+        """
+        Args:
+            symbols (list): Ticker symbols, one per row
+            timestamps (np.ndarray): int64 unix seconds, one per column, ascending
+            closes (np.ndarray): float64 close matrix
+        """
+        self.symbols = list(symbols)
+        self.timestamps = np.asarray(timestamps, dtype='int64')
+        self.closes = np.asarray(closes, dtype='float64')
+
+    @classmethod
+    def from_series(cls, symbols, series):
+        """
+        Align per-symbol daily series on the union of their trading days.
+
+        Days a symbol did not trade stay NaN in its row; `symbol_indicators`
+        computes each symbol over its own bars, so those gaps are skipped.
+
+        Args:
+            symbols (list): Ticker symbols
+            series (list): One (timestamps, closes) pair of arrays per symbol
+
+        Returns:
+            PriceHistory: Daily history
+        """
+        days = [np.asarray(timestamps, dtype='int64') // DAY for timestamps, _ in series]
+        axis = np.unique(np.concatenate(days)) if days else np.empty(0, dtype='int64')
+        closes = np.full((len(series), len(axis)), np.nan)
+        for row, (symbol_days, (_, values)) in enumerate(zip(days, series)):
+            closes[row, np.searchsorted(axis, symbol_days)] = values
+        return cls(symbols, axis * DAY, closes)
+
+    @classmethod
+    def from_bar_store(cls, store_dir, symbols=None, interval="1d"):
+        """
+        Load the history kept by the update's persistent bar store.
+
+        Args:
+            store_dir (str): Bar store directory
+            symbols (list): Symbols to load (defaults to every stored symbol)
+            interval (str): Stored bar interval
+
+        Returns:
+            PriceHistory: History of the symbols that have stored bars
+        """
+        from bar_store import BarStore
+
+        store = BarStore(store_dir)
+        loaded = []
+        for symbol in symbols if symbols is not None else store.symbols(interval):
+            series = store.closes(symbol, interval)
+            if series is not None and len(series[0]):
+                loaded.append((symbol, series))
+        return cls.from_series([symbol for symbol, _ in loaded], [series for _, series in loaded])
+
+    @classmethod
+    def load(cls, path):
+        """Load a history file written by `save`."""
+        with np.load(path) as data:
+            return cls(data['symbols'].tolist(), data['timestamps'], data['closes'])
+
+    def save(self, path):
+        """Write the history to one `.npz` file, the backtest's offline input."""
+        with atomic_writer(path, "wb") as f:
+            np.savez_compressed(f, symbols=np.array(self.symbols), timestamps=self.timestamps, closes=self.closes)
+
+    def weekly(self):
+        """
+        Weekly closes on the same Monday-to-Friday weeks as `data_plan.resample_weekly`.
+
+        Each week holds the symbol's last close of that week (NaN if it had no
+        bar that week) and is stamped with the week's Monday.
+
+        Returns:
+            PriceHistory: Weekly history
+        """
+        if not len(self.timestamps):
+            return self
+        weeks = week_start(self.timestamps)
+        boundaries = np.flatnonzero(np.diff(weeks)) + 1
+        starts = np.concatenate(([0], boundaries))
+        ends = np.concatenate((boundaries, [len(weeks)])) - 1
+
+        columns = np.arange(self.closes.shape[1])
+        last_valid = np.maximum.accumulate(np.where(np.isnan(self.closes), -1, columns), axis=1)
+        last_in_week = last_valid[:, ends]
+        rows = np.arange(len(self.symbols))[:, None]
+        closes = np.where(last_in_week >= starts, self.closes[rows, np.maximum(last_in_week, 0)], np.nan)
+        return PriceHistory(self.symbols, weeks[starts], closes)
+
+
+def symbol_indicators(closes):
+    """
+    RSI and Stochastic RSI %K for every symbol, each over its own bars only.
+
+    Aligning a universe on the union of its days leaves NaN where a symbol
+    has no bar; fed straight to the engine those gaps would reset the RSI
+    warm-up. Instead each row's bars are packed to the left, computed in
+    one vectorized pass and scattered back to their columns.
+
+    Args:
+        closes (np.ndarray): (symbols x bars) close matrix, NaN where a symbol has no bar
+
+    Returns:
+        tuple: (rsi, stoch_rsi_k) matrices of the same shape, NaN where a symbol has no bar or no value yet
+    """
+    present = ~np.isnan(closes)
+    counts = present.sum(axis=1)
+    width = int(counts.max()) if len(counts) else 0
+    # A stable sort of "missing" flags lists each row's bar columns first, in time order
+    columns = np.argsort(~present, axis=1, kind='stable')[:, :width]
+    packed = np.take_along_axis(closes, columns, axis=1)
+    packed_rsi = rsi(packed)
+    packed_stoch = stoch_rsi_k(packed_rsi)
+
+    rows, slots = np.nonzero(np.arange(width) < counts[:, None])
+    rsi_values = np.full(closes.shape, np.nan)
+    stoch_values = np.full(closes.shape, np.nan)
+    rsi_values[rows, columns[rows, slots]] = packed_rsi[rows, slots]
+    stoch_values[rows, columns[rows, slots]] = packed_stoch[rows, slots]
+    return rsi_values, stoch_values
+
+
+def forward_returns(closes, horizon):
+    """
+    Return from each bar's close to the close `horizon` bars later.
+
+    Args:
+        closes (np.ndarray): (symbols x bars) close matrix
+        horizon (int): Bars ahead
+
+    Returns:
+        np.ndarray: Matrix of the same shape, NaN where either close is missing
+    """
+    out = np.full(closes.shape, np.nan)
+    if horizon < closes.shape[1]:
+        with np.errstate(invalid='ignore', divide='ignore'):
+            out[:, :-horizon] = closes[:, horizon:] / closes[:, :-horizon] - 1
+    return out
+
+
+def sweep(rsi_values, stoch_values, returns, rsi_thresholds, stoch_thresholds):
+    """
+    Evaluate `rsi < a and stoch_rsi < b` for every threshold pair at once.
+
+    Every observation is binned by the smallest thresholds it passes, and a
+    2-D cumulative sum of the bins gives each pair's signal count, winners and
+    summed return, so the cost does not grow with the number of pairs.
+
+    Args:
+        rsi_values (np.ndarray): RSI per symbol and bar
+        stoch_values (np.ndarray): Stochastic RSI %K per symbol and bar
+        returns (np.ndarray): Forward return per symbol and bar
+        rsi_thresholds (np.ndarray): Ascending RSI thresholds
+        stoch_thresholds (np.ndarray): Ascending Stochastic RSI thresholds
+
+    Returns:
+        tuple: (signals, hit_rate, mean_return) matrices of shape (len(rsi_thresholds), len(stoch_thresholds));
+            rates are NaN where a pair has no signals
+    """
+    valid = ~(np.isnan(rsi_values) | np.isnan(stoch_values) | np.isnan(returns))
+    # a[j] > value exactly for j >= searchsorted(a, value, 'right')
+    rsi_bin = np.searchsorted(rsi_thresholds, rsi_values[valid], side='right')
+    stoch_bin = np.searchsorted(stoch_thresholds, stoch_values[valid], side='right')
+    shape = (len(rsi_thresholds) + 1, len(stoch_thresholds) + 1)
+    flat = np.ravel_multi_index((rsi_bin, stoch_bin), shape)
+    selected = returns[valid]
+
+    def cumulative(weights=None):
+        counts = np.bincount(flat, weights=weights, minlength=shape[0] * shape[1]).reshape(shape)
+        return counts.cumsum(axis=0).cumsum(axis=1)[:-1, :-1]
+
+    signals = cumulative().astype('int64')
+    with np.errstate(invalid='ignore', divide='ignore'):
+        hit_rate = cumulative((selected > 0).astype('float64')) / signals
+        mean_return = cumulative(selected) / signals
+    return signals, hit_rate, mean_return
+
+
+def _rate(value):
+    return None if np.isnan(value) else round(float(value), 6)
+
+
+@timed("stage_seconds", stage="backtest")
+def run_backtest(history, timeframe="weekly", horizons=DEFAULT_HORIZONS, rsi_thresholds=DEFAULT_RSI_THRESHOLDS,
+                 stoch_thresholds=DEFAULT_STOCH_RSI_THRESHOLDS, rsi_threshold=WEEKLY_RSI_THRESHOLD,
+                 stoch_threshold=WEEKLY_STOCH_RSI_THRESHOLD):
+    """
+    Backtest the buy rule over the whole history of a universe.
+
+    RSI and Stochastic RSI %K are computed for every symbol and bar in one
+    vectorized pass (the same engine as the live update), each symbol over
+    its own bars so listing dates and gaps do not disturb the warm-up. The rule fires on
+    every bar where both are below their thresholds, counting each
+    symbol-bar as one signal, with entry at that bar's close.
+
+    Args:
+        history (PriceHistory): Daily history
+        timeframe (str): "weekly" (the live rule; daily bars resampled) or "daily"
+        horizons (tuple): Forward-return horizons in bars of `timeframe`
+        rsi_thresholds (tuple): RSI thresholds to sweep
+        stoch_thresholds (tuple): Stochastic RSI thresholds to sweep
+        rsi_threshold (float): RSI threshold of the rule itself
+        stoch_threshold (float): Stochastic RSI threshold of the rule itself
+
+    Returns:
+        dict: Report with the rule's, the unconditional baseline's and every swept pair's
+            signal count, hit rate (share of positive forward returns) and mean forward return per horizon
+    """
+    if timeframe not in ("weekly", "daily"):
+        raise ValueError(f"Unknown timeframe {timeframe!r} (expected weekly or daily)")
+    start = time.perf_counter()
+    bars = history.weekly() if timeframe == "weekly" else history
+    rsi_values, stoch_values = symbol_indicators(bars.closes)
+
+    rsi_grid = np.array(sorted(rsi_thresholds), dtype='float64')
+    stoch_grid = np.array(sorted(stoch_thresholds), dtype='float64')
+    # Thresholds above every possible value make the baseline: all bars with indicators
+    everything = np.array([np.inf])
+    report = {
+        'timeframe': timeframe,
+        'symbols': len(bars.symbols),
+        'bars': bars.closes.shape[1],
+        'start': int(bars.timestamps[0]) if len(bars.timestamps) else None,
+        'end': int(bars.timestamps[-1]) if len(bars.timestamps) else None,
+        'rule': {'rsi_threshold': rsi_threshold, 'stoch_rsi_threshold': stoch_threshold, 'horizons': {}},
+        'baseline': {'horizons': {}},
+        'sweep': [{'rsi_threshold': float(a), 'stoch_rsi_threshold': float(b), 'horizons': {}}
+                  for a in rsi_grid for b in stoch_grid],
+    }
+    for horizon in horizons:
+        returns = forward_returns(bars.closes, horizon)
+        for target, grid in ((report['rule'], (np.array([rsi_threshold]), np.array([stoch_threshold]))),
+                             (report['baseline'], (everything, everything))):
+            signals, hit_rate, mean_return = sweep(rsi_values, stoch_values, returns, *grid)
+            target['horizons'][str(horizon)] = {'signals': int(signals[0, 0]), 'hit_rate': _rate(hit_rate[0, 0]),
+                                                'mean_return': _rate(mean_return[0, 0])}
+        signals, hit_rate, mean_return = sweep(rsi_values, stoch_values, returns, rsi_grid, stoch_grid)
+        for entry, count, hits, mean in zip(report['sweep'], signals.ravel(), hit_rate.ravel(), mean_return.ravel()):
+            entry['horizons'][str(horizon)] = {'signals': int(count), 'hit_rate': _rate(hits),
+                                               'mean_return': _rate(mean)}
+
+    report['seconds'] = round(time.perf_counter() - start, 3)
+    for horizon, result in report['rule']['horizons'].items():
+        log_event(logger, logging.INFO, "backtest_rule", timeframe=timeframe, horizon=horizon,
+                  signals=result['signals'], hit_rate=result['hit_rate'], mean_return=result['mean_return'],
+                  baseline_hit_rate=report['baseline']['horizons'][horizon]['hit_rate'],
+                  baseline_mean_return=report['baseline']['horizons'][horizon]['mean_return'])
+    log_event(logger, logging.INFO, "backtest_finished", symbols=report['symbols'], bars=report['bars'],
+              pairs=len(report['sweep']), horizons=len(horizons), seconds=report['seconds'])
+    return report
+
+
+def synthetic_history(symbols, years=10, end_date="2025-10-10"):
+    """
+    Deterministic offline history: the stub server's random walks for a synthetic universe.
+
+    Args:
+        symbols (int): Number of symbols
+        years (int): Years of daily bars
+        end_date (str): Last trading day (YYYY-MM-DD)
+
+    Returns:
+        PriceHistory: Daily history
+    """
+    import calendar
+
+    from stub_server import synthetic_bars, synthetic_symbols
+
+    end = calendar.timegm(time.strptime(end_date, "%Y-%m-%d"))
+    names = synthetic_symbols(symbols)
+    series = []
+    for symbol in names:
+        timestamps, quote = synthetic_bars(symbol, end, days=int(years * 365.25))
+        series.append((np.array(timestamps, dtype='int64'), np.array(quote['close'], dtype='float64')))
+    return PriceHistory.from_series(names, series)
+
+
+def write_report(path, report):
+    """Write a backtest report as JSON."""
+    with atomic_writer(path) as f:
+        json.dump(report, f, indent=2)
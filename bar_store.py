@@ -0,0 +1,131 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from data_plan import unix_seconds
+from fsutil import atomic_writer
+
+# Row layout of each stored array: timestamp (unix seconds) followed by OHLCV
+COLUMNS = ['timestamp', 'open', 'high', 'low', 'close', 'volume']
+
+
+class BarStore:
+    """
+    On-disk columnar OHLCV store keyed by symbol and interval.
+
+    Each symbol/interval pair is one `.npy` file holding a (6, n) float64 array,
+    one contiguous row per column, so a series can be memory-mapped and its
+    close column read without touching the rest. Files are replaced atomically.
+    """
+
+    def __init__(self, root):
+        """
+        Args:
+            root (str): Directory holding the store
+        """
+        self.root = root
+
+    def path(self, symbol, interval):
+        """Path of the array file for a symbol and interval."""
+        return os.path.join(self.root, interval, f"{symbol}.npy")
+
+    def load(self, symbol, interval):
+        """
+        Load the stored bars for a symbol.
+
+        Args:
+            symbol (str): Ticker symbol
+            interval (str): Bar interval, e.g. "1d"
+
+        Returns:
+            pd.DataFrame: OHLCV bars indexed by timestamp, or None if nothing is stored
+        """
+        path = self.path(symbol, interval)
+        if not os.path.exists(path):
+            return None
+        array = np.load(path, mmap_mode='r')
+        return pd.DataFrame({column: np.array(array[i + 1]) for i, column in enumerate(COLUMNS[1:])},
+                            index=pd.to_datetime(np.asarray(array[0], dtype='int64'), unit='s'))
+
+    def last_timestamp(self, symbol, interval):
+        """
+        Timestamp of the newest stored bar.
+
+        Returns:
+            int: Unix seconds, or None if nothing is stored
+        """
+        path = self.path(symbol, interval)
+        if not os.path.exists(path):
+            return None
+        array = np.load(path, mmap_mode='r')
+        if array.shape[1] == 0:
+            return None
+        return int(array[0, -1])
+
+    def save(self, symbol, interval, bars):
+        """
+        Replace the stored bars for a symbol.
+
+        Args:
+            symbol (str): Ticker symbol
+            interval (str): Bar interval
+            bars (pd.DataFrame): OHLCV bars indexed by timestamp
+        """
+        array = np.vstack([unix_seconds(bars.index).astype('float64')] +
+                          [bars[column].to_numpy(dtype='float64') for column in COLUMNS[1:]])
+        with atomic_writer(self.path(symbol, interval), "wb") as f:
+            np.save(f, array)
+
+    def append(self, symbol, interval, bars):
+        """
+        Merge newly fetched bars into the store.
+
+        Stored bars at or after the first new timestamp are replaced, which
+        corrects the still-forming last bar from the previous run.
+
+        Args:
+            symbol (str): Ticker symbol
+            interval (str): Bar interval
+            bars (pd.DataFrame): Newly fetched OHLCV bars indexed by timestamp
+
+        Returns:
+            pd.DataFrame: Full stored history after the merge
+        """
+        stored = self.load(symbol, interval)
+        if stored is not None and not bars.empty:
+            # Nothing new and no corrections: keep the file as it is
+            tail = stored[stored.index >= bars.index[0]]
+            if tail.index.equals(bars.index) and tail[COLUMNS[1:]].equals(bars[COLUMNS[1:]]):
+                return stored
+            bars = pd.concat([stored[stored.index < bars.index[0]], bars])
+        elif stored is not None:
+            return stored
+        bars = bars[~bars.index.duplicated(keep='last')].sort_index()
+        self.save(symbol, interval, bars)
+        return bars
+
+    def symbols(self, interval):
+        """
+        Symbols with stored bars for an interval.
+
+        Returns:
+            list: Sorted ticker symbols
+        """
+        directory = os.path.join(self.root, interval)
+        if not os.path.isdir(directory):
+            return []
+        return sorted(name[:-len(".npy")] for name in os.listdir(directory) if name.endswith(".npy"))
+
+    def closes(self, symbol, interval):
+        """
+        Stored timestamps and closes, read straight from the close row without building a DataFrame.
+
+        Returns:
+            tuple: (int64 unix seconds, float64 closes), or None if nothing is stored
+        """
+        path = self.path(symbol, interval)
+        if not os.path.exists(path):
+            return None
+        array = np.load(path, mmap_mode='r')
+        return np.asarray(array[0], dtype='int64'), np.array(array[COLUMNS.index('close')])
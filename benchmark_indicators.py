@@ -0,0 +1,75 @@
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from indicators import latest_indicators
+
+
+def synthetic_universe(symbols, bars, seed=0):
+    """
+    Generate random-walk close series with ragged lengths.
+
+    Args:
+        symbols (int): Number of symbols
+        bars (int): Maximum number of bars per symbol
+        seed (int): Random seed
+
+    Returns:
+        list: One numpy array of closes per symbol
+    """
+    rng = np.random.default_rng(seed)
+    lengths = rng.integers(bars // 2, bars + 1, size=symbols)
+    return [100 * np.cumprod(1 + rng.normal(0, 0.02, size=length)) for length in lengths]
+
+
+def per_symbol_pandas_ta(universe):
+    """Latest RSI and StochRSI %K per symbol, computed the old way with pandas_ta."""
+    import pandas_ta as ta
+
+    rsi = np.full(len(universe), np.nan)
+    stoch_rsi = np.full(len(universe), np.nan)
+    for i, closes in enumerate(universe):
+        close = pd.Series(closes)
+        rsi[i] = ta.rsi(close, length=14).iloc[-1]
+        stoch_rsi[i] = ta.stochrsi(close)["STOCHRSIk_14_14_3_3"].iloc[-1]
+    return rsi, stoch_rsi
+
+
+def run_benchmark(symbols=5000, bars=260):
+    """
+    Time the vectorized engine against per-symbol pandas_ta calls and check parity.
+
+    Args:
+        symbols (int): Number of synthetic symbols
+        bars (int): Maximum number of bars per symbol
+    """
+    universe = synthetic_universe(symbols, bars)
+
+    start = time.perf_counter()
+    rsi, stoch_rsi = latest_indicators(universe)
+    vectorized = time.perf_counter() - start
+    print(f"Vectorized engine: {symbols} symbols x {bars} bars in {vectorized:.3f}s")
+
+    try:
+        start = time.perf_counter()
+        expected_rsi, expected_stoch_rsi = per_symbol_pandas_ta(universe)
+        baseline = time.perf_counter() - start
+    except ImportError:
+        print("pandas_ta is not installed; skipping the per-symbol comparison")
+        return
+
+    print(f"Per-symbol pandas_ta: {baseline:.3f}s ({baseline / vectorized:.1f}x slower)")
+    for name, actual, expected in (("RSI", rsi, expected_rsi), ("StochRSI %K", stoch_rsi, expected_stoch_rsi)):
+        mismatched_nan = int((np.isnan(actual) != np.isnan(expected)).sum())
+        max_diff = np.nanmax(np.abs(actual - expected)) if not np.isnan(actual).all() else 0.0
+        print(f"{name}: max abs diff {max_diff:.3e}, NaN mismatches {mismatched_nan}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the vectorized RSI / StochRSI engine")
+    parser.add_argument("--symbols", type=int, default=5000)
+    parser.add_argument("--bars", type=int, default=260)
+    args = parser.parse_args()
+    run_benchmark(args.symbols, args.bars)
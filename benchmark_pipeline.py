@@ -0,0 +1,252 @@
+import argparse
+import json
+import multiprocessing
+import os
+import resource
+import shutil
+import sys
+import tempfile
+import time
+
+from stub_server import FIXTURES_DIR, StubMarketServer, point_pipeline_at, synthetic_symbols
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+BASELINE_PATH = os.path.join(REPO_DIR, "benchmark_baseline.json")
+
+STAGES = ['fetch-tickers', 'update', 'rebuild-json']
+METRICS = ['wall_time', 'requests', 'bytes_written', 'peak_rss_kb']
+
+# Allowed relative increase over the baseline before a metric counts as a regression
+DEFAULT_TOLERANCE = 0.25
+
+# Increases at most this large never count, e.g. scheduler noise on millisecond stages
+ABSOLUTE_SLACK = {'wall_time': 0.05}
+
+
+def _file_versions(workdir):
+    """Identity of every file under `workdir`: path to (inode, size, mtime in ns)."""
+    versions = {}
+    for root, _, files in os.walk(workdir):
+        for name in files:
+            path = os.path.join(root, name)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            versions[path] = (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+    return versions
+
+
+def _bytes_written(before, after):
+    """
+    Total size of the files created or rewritten between two `_file_versions` snapshots.
+
+    Atomic writes replace the inode, so a rewrite is caught even when it
+    keeps the size and lands within the filesystem's timestamp granularity.
+    """
+    return sum(version[1] for path, version in after.items() if before.get(path) != version)
+
+
+def _run_stage(stage, workdir, base_url, options, results):
+    """Run one pipeline entry point in a fresh process and report its measurements."""
+    sys.path.insert(0, REPO_DIR)
+    os.chdir(workdir)
+    sys.stdout = open(os.devnull, "w")
+    point_pipeline_at(base_url)
+
+    files_before = _file_versions(workdir)
+    start = time.perf_counter()
+    if stage == 'fetch-tickers':
+        import nasdaq_tickers
+        nasdaq_tickers.save_tickers_to_json()
+    elif stage == 'update':
+        import update_ticker_files
+        if options['processes'] > 1:
+            update_ticker_files.update_ticker_files_sharded("nasdaq_display/tickers",
+                                                            "Stocks_Scanner/nasdaq100_tickers.txt",
+                                                            options['processes'],
+                                                            requests_per_second=options['requests_per_second'],
+                                                            store_dir=options['store_dir'],
+                                                            output_mode=options['output_mode'])
+        else:
+            update_ticker_files.update_ticker_files("nasdaq_display/tickers", "Stocks_Scanner/nasdaq100_tickers.txt",
+                                                    requests_per_second=options['requests_per_second'],
+                                                    store_dir=options['store_dir'], output_mode=options['output_mode'])
+    elif stage == 'rebuild-json':
+        import update_tickers_json
+        update_tickers_json.update_tickers_json("nasdaq_display/snapshot.json", "nasdaq_display/tickers.json",
+                                                "nasdaq_display")
+    wall_time = time.perf_counter() - start
+
+    results.put({
+        'wall_time': wall_time,
+        'bytes_written': _bytes_written(files_before, _file_versions(workdir)),
+        # Sharded runs report their largest worker
+        'peak_rss_kb': max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+                           resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss),
+    })
+
+
+def run_benchmark(stages=STAGES, symbols=0, latency=0.0, error_rate=0.0, requests_per_second=0, use_store=False,
+                  processes=1, output_mode="pages"):
+    """
+    Run pipeline stages against the local stub server and measure each one.
+
+    Every stage runs in its own spawned process inside one scratch working
+    directory, so later stages consume earlier stages' outputs.
+
+    Args:
+        stages (list): Stage names from STAGES, in order (repeats allowed)
+        symbols (int): Synthetic universe size, 0 for the NASDAQ 100 (replaying recorded captures where present)
+        latency (float): Seconds of latency added by the stub to every response
+        error_rate (float): Fraction of stub responses replaced by 429/503
+        requests_per_second (float): Rate limit for the update stage (0 disables it)
+        use_store (bool): Run the update stage with the persistent bar store
+        processes (int): Worker processes (shards) for the update stage
+        output_mode (str): Update output: "pages", "site" or "both"
+
+    Returns:
+        dict: Stage name to measurements (wall_time, requests, bytes_written, peak_rss_kb)
+    """
+    server = StubMarketServer(synthetic_symbols(symbols) if symbols else None,
+                              latency=latency, error_rate=error_rate).start()
+    workdir = tempfile.mkdtemp(prefix="nasdaq-bench-")
+    os.makedirs(os.path.join(workdir, "nasdaq_display", "tickers"))
+    os.makedirs(os.path.join(workdir, "Stocks_Scanner"))
+    options = {
+        'requests_per_second': requests_per_second,
+        'store_dir': os.path.join(workdir, "data", "bars") if use_store else None,
+        'processes': processes,
+        'output_mode': output_mode,
+    }
+
+    context = multiprocessing.get_context("spawn")
+    report = {}
+    try:
+        for stage in stages:
+            before = server.snapshot_counters()['requests']
+            results = context.Queue()
+            process = context.Process(target=_run_stage, args=(stage, workdir, server.base_url, options, results))
+            process.start()
+            measurements = results.get()
+            process.join()
+            measurements['requests'] = server.snapshot_counters()['requests'] - before
+
+            name = stage
+            while name in report:
+                name = f"{name}+"
+            report[name] = {metric: measurements[metric] for metric in METRICS}
+    finally:
+        server.stop()
+        shutil.rmtree(workdir, ignore_errors=True)
+    return report
+
+
+def compare_to_baseline(report, baseline, tolerance=DEFAULT_TOLERANCE):
+    """
+    List metrics that regressed beyond `tolerance` relative to the baseline.
+
+    Args:
+        report (dict): Output of `run_benchmark`
+        baseline (dict): Previously stored report
+        tolerance (float): Allowed relative increase
+
+    Returns:
+        list: Human-readable regression descriptions
+    """
+    regressions = []
+    for stage, measurements in report.items():
+        for metric, value in measurements.items():
+            expected = baseline.get(stage, {}).get(metric)
+            slack = ABSOLUTE_SLACK.get(metric, 1e-3)
+            if expected is not None and value > expected * (1 + tolerance) and value - expected > slack:
+                regressions.append(f"{stage} {metric}: {value:.3f} vs baseline {expected:.3f}")
+    return regressions
+
+
+def record_fixtures(symbols, fixtures_dir=FIXTURES_DIR):
+    """
+    Record live SlickCharts and Yahoo responses for the stub server to replay.
+
+    Writes the constituents page, each symbol's two-year daily chart and
+    six-month weekly chart, and one spark (batch quote) response covering
+    every symbol, in Yahoo's own formats.
+
+    Args:
+        symbols (list): Symbols whose charts and quotes are recorded
+        fixtures_dir (str): Destination directory
+    """
+    from endpoints import SLICKCHARTS_URL, YAHOO_CHART_URL, YAHOO_SPARK_URL
+    from http_transport import get_transport
+
+    transport = get_transport()
+    response = transport.get(SLICKCHARTS_URL)
+    response.raise_for_status()
+    with open(os.path.join(fixtures_dir, "slickcharts_nasdaq100.html"), "w") as f:
+        f.write(response.text)
+    for symbol in symbols:
+        for name, query in ((f"chart_{symbol}.json", "range=2y&interval=1d"),
+                            (f"chart_{symbol}_1wk.json", "range=6mo&interval=1wk")):
+            data = transport.get_json(f"{YAHOO_CHART_URL}/{symbol}?{query}")
+            with open(os.path.join(fixtures_dir, name), "w") as f:
+                json.dump(data, f, separators=(',', ':'))
+        print(f"Recorded chart fixtures for {symbol}")
+
+    # Yahoo caps spark requests at 20 symbols; the chunks are merged into one response
+    results = []
+    for i in range(0, len(symbols), 20):
+        chunk = ",".join(symbols[i:i + 20])
+        data = transport.get_json(f"{YAHOO_SPARK_URL}?symbols={chunk}&range=1d&interval=1d")
+        results.extend(data['spark']['result'])
+    with open(os.path.join(fixtures_dir, "spark.json"), "w") as f:
+        json.dump({'spark': {'result': results, 'error': None}}, f, separators=(',', ':'))
+    print(f"Recorded spark fixture for {len(results)} symbols")
+
+
+def print_report(report):
+    print(f"{'stage':<16}{'wall s':>10}{'requests':>10}{'bytes written':>15}{'peak RSS KB':>14}")
+    for stage, m in report.items():
+        print(f"{stage:<16}{m['wall_time']:>10.3f}{m['requests']:>10}{m['bytes_written']:>15}{m['peak_rss_kb']:>14}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the pipeline offline against a local stub server")
+    parser.add_argument("--stages", nargs="+", default=STAGES, choices=STAGES)
+    parser.add_argument("--symbols", type=int, default=0, help="Synthetic universe size (0 uses the NASDAQ 100)")
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--requests-per-second", type=float, default=0)
+    parser.add_argument("--store", action="store_true", help="Use the persistent bar store in the update stage")
+    parser.add_argument("--processes", type=int, default=1, help="Worker processes for the update stage")
+    parser.add_argument("--output-mode", choices=["pages", "site", "both"], default="pages",
+                        help="Output of the update stage")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    parser.add_argument("--output", help="Write the report as JSON to this path")
+    parser.add_argument("--record", nargs="*", metavar="SYMBOL",
+                        help="Record live captures for the stub to replay instead of benchmarking")
+    args = parser.parse_args()
+
+    if args.record is not None:
+        record_fixtures(args.record or ['AAPL', 'MSFT', 'NVDA'])
+        sys.exit(0)
+
+    report = run_benchmark(args.stages, args.symbols, args.latency, args.error_rate,
+                           args.requests_per_second, args.store, args.processes,
+                           args.output_mode)
+    print_report(report)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.update_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Saved baseline to {args.baseline}")
+    elif os.path.exists(args.baseline):
+        with open(args.baseline, "r") as f:
+            regressions = compare_to_baseline(report, json.load(f), args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        sys.exit(1 if regressions else 0)
@@ -0,0 +1,60 @@
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Modules each CLI command imports when it runs (see the command functions in main.py)
+COMMAND_IMPORTS = {
+    'fetch-tickers': ['nasdaq_tickers'],
+    'update': ['update_ticker_files', 'sharding'],
+    'rebuild-json': ['update_tickers_json'],
+    'serve': ['http.server'],
+    'run': ['nasdaq_tickers', 'update_ticker_files', 'sharding', 'update_tickers_json', 'http.server'],
+}
+
+# What every command paid before imports were deferred: the whole pipeline loaded up front
+EAGER_IMPORTS = ['nasdaq_tickers', 'update_ticker_files', 'update_tickers_json']
+
+
+def _time_imports(modules, repeat):
+    """Median wall time of a fresh interpreter importing `modules`."""
+    code = "; ".join(f"import {module}" for module in modules) or "pass"
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", code], cwd=REPO_DIR, check=True)
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def run_benchmark(repeat=7):
+    """
+    Measure the startup import cost of each CLI command.
+
+    Args:
+        repeat (int): Interpreter launches per measurement (the median is reported)
+
+    Returns:
+        dict: Command to import seconds on top of a bare interpreter, plus "eager"
+    """
+    interpreter = _time_imports([], repeat)
+    report = {'eager': _time_imports(EAGER_IMPORTS, repeat) - interpreter}
+    for command, modules in COMMAND_IMPORTS.items():
+        report[command] = _time_imports(['main'] + modules, repeat) - interpreter
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark CLI startup (import) time per command")
+    parser.add_argument("--repeat", type=int, default=7)
+    args = parser.parse_args()
+
+    report = run_benchmark(args.repeat)
+    eager = report['eager']
+    print(f"{'command':<16}{'import ms':>12}{'vs eager':>10}")
+    for command, seconds in report.items():
+        print(f"{command:<16}{seconds * 1000:>12.1f}{seconds / eager:>10.0%}")
@@ -0,0 +1,186 @@
+import html
+import json
+import logging
+import re
+import time
+
+import requests
+
+from endpoints import SLICKCHARTS_URL
+from fsutil import atomic_writer
+from http_transport import get_transport
+from metrics import get_metrics, log_event, timed
+
+# Index membership changes a few times a year; the page is re-checked at most this often
+DEFAULT_CACHE_PATH = "Stocks_Scanner/data/constituents.json"
+DEFAULT_TTL = 24 * 3600
+
+# A few symbols change per reconstitution; a parse that loses more than this
+# share of the cached list is a truncated or redesigned page, not a membership change
+MIN_KEPT_RATIO = 0.9
+
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/58.0.3029.110 Safari/537.3'
+}
+
+# The constituents table and its parts; a single regex pass replaces walking the whole document tree
+_TABLE_RE = re.compile(r'<table\b[^>]*\bclass="table table-hover table-borderless table-sm"[^>]*>(.*?)</table>',
+                       re.S | re.I)
+_ROW_RE = re.compile(r'<tr\b[^>]*>(.*?)</tr>', re.S | re.I)
+_CELL_RE = re.compile(r'<td\b[^>]*>(.*?)</td>', re.S | re.I)
+_LINK_RE = re.compile(r'<a\b[^>]*>(.*?)</a>', re.S | re.I)
+_TAG_RE = re.compile(r'<[^>]+>')
+
+logger = logging.getLogger(__name__)
+
+
+def parse_constituents(page):
+    """
+    Extract the ticker symbols from the SlickCharts NASDAQ 100 page.
+
+    Args:
+        page (str): Page HTML
+
+    Returns:
+        list: Ticker symbols in page order, or None if the constituents table is missing
+    """
+    table = _TABLE_RE.search(page)
+    if not table:
+        return None
+
+    symbols = []
+    for row in _ROW_RE.finditer(table.group(1)):
+        cells = _CELL_RE.findall(row.group(1))
+        if len(cells) > 2:
+            link = _LINK_RE.search(cells[2])
+            if link:
+                symbol = html.unescape(_TAG_RE.sub('', link.group(1))).strip()
+                # Remove '$' sign if present
+                if symbol.startswith('$'):
+                    symbol = symbol[1:]
+                symbols.append(symbol)
+    return symbols
+
+
+def membership_diff(previous, current):
+    """
+    Symbols added to and removed from the index.
+
+    Args:
+        previous (list): Earlier constituents (None when there were none)
+        current (list): Current constituents
+
+    Returns:
+        dict: `added` (in `current` order) and `removed` (in `previous` order)
+    """
+    previous = previous or []
+    before, after = set(previous), set(current)
+    return {
+        'added': [symbol for symbol in current if symbol not in before],
+        'removed': [symbol for symbol in previous if symbol not in after],
+    }
+
+
+def load_cache(path):
+    """
+    Load the constituent cache.
+
+    Args:
+        path (str): Cache file
+
+    Returns:
+        dict: Cached `symbols`, validators and timestamps, or None if missing or unreadable
+    """
+    try:
+        with open(path, "r") as f:
+            cache = json.load(f)
+    except FileNotFoundError:
+        return None
+    except ValueError as e:
+        log_event(logger, logging.WARNING, "constituents_cache_unreadable", path=path, error=e)
+        return None
+    return cache if isinstance(cache, dict) and isinstance(cache.get('symbols'), list) else None
+
+
+def _save_cache(path, cache):
+    with atomic_writer(path) as f:
+        json.dump(cache, f, indent=2)
+
+
+@timed("stage_seconds", stage="constituents")
+def refresh_constituents(cache_path=DEFAULT_CACHE_PATH, ttl=DEFAULT_TTL, force=False):
+    """
+    Get the NASDAQ 100 constituents, downloading the page only when needed.
+
+    Within `ttl` of the last check the cached list is returned without any
+    request. After that the page is requested conditionally (If-None-Match /
+    If-Modified-Since), so an unchanged page costs a 304 with no body to
+    parse. When the download or parse fails, or the parsed table is much
+    shorter than the cached list (see `MIN_KEPT_RATIO`), the cached list is kept.
+
+    Args:
+        cache_path (str): Cache file, also recording the last membership change
+        ttl (float): Seconds a cached list is used without checking the page
+        force (bool): Check the page even if the cache is fresh
+
+    Returns:
+        tuple: (symbols in page order, membership diff against the previous list)
+    """
+    metrics = get_metrics()
+    cache = load_cache(cache_path)
+    now = time.time()
+    unchanged = {'added': [], 'removed': []}
+    if cache is not None and not force and now - cache.get('checked_at', 0) < ttl:
+        metrics.inc("constituents_cache_total", result="fresh")
+        log_event(logger, logging.DEBUG, "constituents_cached", path=cache_path, tickers=len(cache['symbols']))
+        return cache['symbols'], unchanged
+
+    cached_symbols = cache['symbols'] if cache is not None else []
+    headers = dict(HEADERS)
+    if cache is not None and cache.get('etag'):
+        headers['If-None-Match'] = cache['etag']
+    if cache is not None and cache.get('last_modified'):
+        headers['If-Modified-Since'] = cache['last_modified']
+
+    url = SLICKCHARTS_URL
+    try:
+        response = get_transport().get(url, headers=headers)
+        if response.status_code == 304 and cache is not None:
+            metrics.inc("constituents_cache_total", result="not_modified")
+            log_event(logger, logging.INFO, "constituents_not_modified", url=url, tickers=len(cached_symbols))
+            _save_cache(cache_path, dict(cache, checked_at=now))
+            return cached_symbols, unchanged
+        response.raise_for_status()
+    except requests.exceptions.RequestException as e:
+        metrics.inc("constituents_cache_total", result="stale")
+        log_event(logger, logging.ERROR, "constituents_fetch_failed", url=url, error=e, cached=len(cached_symbols))
+        return cached_symbols, unchanged
+
+    symbols = parse_constituents(response.text)
+    if not symbols:
+        metrics.inc("constituents_cache_total", result="stale")
+        log_event(logger, logging.ERROR, "constituents_table_missing", url=url, cached=len(cached_symbols))
+        return cached_symbols, unchanged
+    if len(symbols) < MIN_KEPT_RATIO * len(cached_symbols):
+        metrics.inc("constituents_cache_total", result="stale")
+        log_event(logger, logging.ERROR, "constituents_table_truncated", url=url, tickers=len(symbols),
+                  cached=len(cached_symbols))
+        return cached_symbols, unchanged
+
+    metrics.inc("constituents_cache_total", result="fetched")
+    diff = membership_diff(cache['symbols'] if cache is not None else None, symbols)
+    changed = bool(diff['added'] or diff['removed'])
+    if changed:
+        log_event(logger, logging.INFO, "constituents_changed", added=",".join(diff['added']) or "-",
+                  removed=",".join(diff['removed']) or "-")
+    _save_cache(cache_path, {
+        'symbols': symbols,
+        'etag': response.headers.get('ETag'),
+        'last_modified': response.headers.get('Last-Modified'),
+        'checked_at': now,
+        # The last membership change, kept for reference
+        'changed_at': now if changed else cache.get('changed_at', now),
+        'added': diff['added'] if changed else cache.get('added', []),
+        'removed': diff['removed'] if changed else cache.get('removed', []),
+    })
+    return symbols, diff
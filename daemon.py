@@ -0,0 +1,325 @@
+import gzip
+import hashlib
+import json
+import logging
+import mimetypes
+import os
+import threading
+import time
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote, urlsplit
+
+from metrics import get_metrics, log_event
+from render import content_hash, page_fields, render_page
+from screening import load_screens, run_screens
+from snapshot import SNAPSHOT_FILENAME, STATUS_OK, load_snapshot, tickers_from_snapshot
+from static_site import (ASSETS_DIRNAME, DATA_FILENAME, SCRIPT, SCRIPT_NAME, SITE_DIRNAME, STYLESHEET,
+                         STYLESHEET_NAME, OUTPUT_NONE, encode_site_data, index_html, site_data)
+
+# Refresh cadences in seconds: intraday prices, and the full fetch + indicator update
+DEFAULT_PRICE_INTERVAL = 60
+DEFAULT_INDICATOR_INTERVAL = 3600
+
+# Bodies smaller than this are not worth compressing
+GZIP_MIN_SIZE = 256
+
+IMMUTABLE = "public, max-age=31536000, immutable"
+
+logger = logging.getLogger(__name__)
+
+
+class Resource:
+    """An immutable response body with its precomputed gzip variant and an ETag for each encoding."""
+
+    def __init__(self, body, content_type, cache_control="no-cache"):
+        """
+        Args:
+            body (bytes): Response body
+            content_type (str): Content-Type header value
+            cache_control (str): Cache-Control header value; content-hashed assets never change
+        """
+        self.body = body
+        self.content_type = content_type
+        self.cache_control = cache_control
+        self.etag = '"%s"' % hashlib.sha256(body).hexdigest()[:32]
+        self.gzip_body = gzip.compress(body, compresslevel=9, mtime=0) if len(body) >= GZIP_MIN_SIZE else None
+        # Strong ETags must differ between byte-different representations
+        self.gzip_etag = self.etag[:-1] + '-gz"' if self.gzip_body is not None else None
+
+    def matches(self, if_none_match):
+        """Whether an If-None-Match header names either encoding of this body."""
+        tags = [tag.strip() for tag in (if_none_match or '').split(',')]
+        return self.etag in tags or (self.gzip_etag is not None and self.gzip_etag in tags)
+
+
+def _json_resource(data, **dump_options):
+    return Resource(json.dumps(data, **dump_options).encode(), "application/json")
+
+
+# Viewer page and hashed assets; identical for every snapshot
+SITE_RESOURCES = {
+    f'/{SITE_DIRNAME}/': Resource(index_html().encode(), "text/html; charset=utf-8"),
+    f'/{SITE_DIRNAME}/index.html': Resource(index_html().encode(), "text/html; charset=utf-8"),
+    f'/{SITE_DIRNAME}/{ASSETS_DIRNAME}/{STYLESHEET_NAME}': Resource(STYLESHEET.encode(), "text/css", IMMUTABLE),
+    f'/{SITE_DIRNAME}/{ASSETS_DIRNAME}/{SCRIPT_NAME}': Resource(SCRIPT.encode(), "text/javascript", IMMUTABLE),
+}
+
+
+class SiteSnapshot:
+    """
+    Every endpoint served for one snapshot, built completely before it is
+    published so a request always sees one consistent version.
+    """
+
+    def __init__(self, snapshot, previous=None, screens=None):
+        """
+        Args:
+            snapshot (dict): Snapshot from `load_snapshot`
+            previous (SiteSnapshot): Earlier version whose unchanged ticker pages are reused,
+                keeping their ETags (and "Last updated" stamps) stable across refreshes
+            screens (list): Screens whose outputs are served (defaults to the screens config)
+        """
+        self.snapshot = snapshot
+        self.generated_at = snapshot['generated_at']
+        previous_pages = previous.page_hashes if previous is not None else {}
+        updated = datetime.fromtimestamp(self.generated_at).strftime('%Y-%m-%d %H:%M:%S')
+
+        self.resources = {
+            '/' + SNAPSHOT_FILENAME: _json_resource(snapshot, separators=(',', ':')),
+            '/tickers.json': _json_resource(tickers_from_snapshot(snapshot), indent=4),
+        }
+        screens = screens if screens is not None else load_screens()
+        results = run_screens(snapshot, screens)
+        for screen in screens:
+            self.resources['/' + screen.output] = _json_resource(results[screen.name], indent=2)
+        # The single-page viewer (static_site) and its data file
+        self.resources.update(SITE_RESOURCES)
+        self.resources[f'/{SITE_DIRNAME}/{DATA_FILENAME}'] = Resource(encode_site_data(site_data(snapshot, results)),
+                                                                     "application/json")
+        self.page_hashes = {}
+        for entry in snapshot['tickers']:
+            if entry['status'] != STATUS_OK or entry['price'] is None:
+                continue
+            fields = page_fields(entry['symbol'], entry['price'], entry['rsi'], entry['stoch_rsi'],
+                                 entry['weekly_rsi'], entry['weekly_stoch_rsi'])
+            digest = content_hash(fields)
+            path = f"/tickers/{entry['symbol']}.html"
+            if path in previous_pages and previous_pages[path][0] == digest:
+                resource = previous_pages[path][1]
+            else:
+                resource = Resource(render_page(fields, updated).encode(), "text/html; charset=utf-8")
+            self.page_hashes[path] = (digest, resource)
+            self.resources[path] = resource
+
+
+class RefreshDaemon:
+    """
+    Long-running service that refreshes the snapshot on two cadences and
+    serves it from memory.
+
+    Prices are refreshed frequently with batched quote requests; the full
+    history fetch and indicator update runs on the slower cadence. Each
+    refresh builds a new `SiteSnapshot` and publishes it with a single
+    reference swap, so readers never observe partial data. Responses carry
+    ETags (304 on revalidation) and precompressed gzip bodies.
+    """
+
+    def __init__(self, directory, tickers_file, store_dir=None, static_dir=None,
+                 price_interval=DEFAULT_PRICE_INTERVAL, indicator_interval=DEFAULT_INDICATOR_INTERVAL,
+                 update_options=None):
+        """
+        Args:
+            directory (str): Ticker page directory used by the indicator update (its parent holds snapshot.json)
+            tickers_file (str): Path to file containing ticker symbols (one per line)
+            store_dir (str): Directory of the persistent bar store
+            static_dir (str): Directory whose other files (e.g. index.html) are served from disk
+            price_interval (float): Seconds between price refreshes (0 disables them)
+            indicator_interval (float): Seconds between indicator updates
+            update_options (dict): Extra keyword arguments for `update_ticker_files`; pages and the
+                site are served from memory, so by default nothing but the snapshot is written
+        """
+        self.directory = directory
+        self.tickers_file = tickers_file
+        self.store_dir = store_dir
+        self.static_dir = static_dir
+        self.price_interval = price_interval
+        self.indicator_interval = indicator_interval
+        self.update_options = update_options or {}
+        self.snapshot_path = os.path.join(os.path.dirname(directory), SNAPSHOT_FILENAME)
+        self.screens = load_screens()
+        self.site = None
+        self._stop = threading.Event()
+        self._thread = None
+        self._static_cache = {}
+        self.server = None
+
+    def publish(self, snapshot):
+        """Build the endpoints for `snapshot` and swap them in atomically."""
+        with get_metrics().timer("daemon_publish_seconds"):
+            self.site = SiteSnapshot(snapshot, self.site, self.screens)
+        log_event(logger, logging.INFO, "snapshot_published", generated_at=snapshot['generated_at'],
+                  tickers=len(snapshot['tickers']))
+
+    def refresh_indicators(self):
+        """Run the full fetch and indicator update, then publish its snapshot."""
+        from update_ticker_files import update_ticker_files
+
+        with get_metrics().timer("daemon_refresh_seconds", kind="indicators"):
+            options = dict({'output_mode': OUTPUT_NONE}, **self.update_options)
+            update_ticker_files(self.directory, self.tickers_file, store_dir=self.store_dir, **options)
+            self.publish(load_snapshot(self.snapshot_path))
+
+    def refresh_prices(self):
+        """Fetch current prices for the published tickers and publish them on top of the current indicators."""
+        from nasdaq_tickers import fetch_prices
+
+        site = self.site
+        if site is None:
+            return
+        with get_metrics().timer("daemon_refresh_seconds", kind="prices"):
+            symbols = [entry['symbol'] for entry in site.snapshot['tickers'] if entry['status'] == STATUS_OK]
+            prices = fetch_prices(symbols)
+            entries = []
+            for entry in site.snapshot['tickers']:
+                price = prices.get(entry['symbol'], "N/A")
+                entries.append(dict(entry, price=float(price)) if price != "N/A" else entry)
+            self.publish({'generated_at': int(time.time()), 'tickers': entries})
+
+    def _refresh(self, refresh):
+        try:
+            refresh()
+        except Exception as e:
+            # Keep serving the last good snapshot
+            log_event(logger, logging.ERROR, "refresh_failed", refresh=refresh.__name__, error=e)
+            get_metrics().inc("daemon_refresh_errors_total", refresh=refresh.__name__)
+
+    def _run_schedule(self):
+        next_indicators = 0.0
+        if self.site is not None:
+            # Resume the cadence of the snapshot found on disk
+            next_indicators = self.site.generated_at + self.indicator_interval
+        next_prices = time.time() + self.price_interval
+        while not self._stop.is_set():
+            now = time.time()
+            if now >= next_indicators:
+                next_indicators = now + self.indicator_interval
+                self._refresh(self.refresh_indicators)
+                # The update also fetched current prices
+                next_prices = time.time() + self.price_interval
+            elif self.price_interval and now >= next_prices:
+                self._refresh(self.refresh_prices)
+                next_prices = time.time() + self.price_interval
+            due = min(next_indicators, next_prices) if self.price_interval else next_indicators
+            self._stop.wait(max(0.0, due - time.time()))
+
+    def start(self, host="127.0.0.1", port=8000):
+        """
+        Load the last snapshot from disk (if any), start the refresh schedule and bind the HTTP server.
+
+        Returns:
+            RefreshDaemon: self
+        """
+        if os.path.exists(self.snapshot_path):
+            try:
+                self.publish(load_snapshot(self.snapshot_path))
+            except Exception as e:
+                log_event(logger, logging.WARNING, "snapshot_unreadable", path=self.snapshot_path, error=e)
+        self.server = ThreadingHTTPServer((host, port), self._handler_class())
+        self.server.daemon_threads = True
+        self._thread = threading.Thread(target=self._run_schedule, daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self):
+        log_event(logger, logging.INFO, "serving", url=f"http://{self.server.server_address[0]}:"
+                                                        f"{self.server.server_address[1]}/")
+        try:
+            self.server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.stop()
+
+    def stop(self):
+        self._stop.set()
+        if self.server is not None:
+            self.server.server_close()
+
+    def _static_resource(self, path):
+        """Resource for a file under `static_dir`, or None."""
+        if not self.static_dir:
+            return None
+        if path.endswith('/'):
+            path += 'index.html'
+        root = os.path.realpath(self.static_dir)
+        file_path = os.path.realpath(os.path.join(root, path.lstrip('/')))
+        if not file_path.startswith(root + os.sep) or not os.path.isfile(file_path):
+            return None
+        stat = os.stat(file_path)
+        cached = self._static_cache.get(file_path)
+        if cached is not None and cached[0] == (stat.st_mtime_ns, stat.st_size):
+            return cached[1]
+        with open(file_path, "rb") as f:
+            body = f.read()
+        resource = Resource(body, mimetypes.guess_type(file_path)[0] or "application/octet-stream")
+        self._static_cache[file_path] = ((stat.st_mtime_ns, stat.st_size), resource)
+        return resource
+
+    def _handler_class(self):
+        daemon = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, format, *args):
+                pass
+
+            def _respond(self, head_only):
+                metrics = get_metrics()
+                path = unquote(urlsplit(self.path).path)
+                site = daemon.site
+                resource = site.resources.get(path) if site is not None else None
+                if resource is None:
+                    resource = daemon._static_resource(path)
+                if resource is None:
+                    metrics.inc("daemon_requests_total", status="404")
+                    self.send_response(404)
+                    self.send_header('Content-Length', '0')
+                    self.end_headers()
+                    return
+
+                compressed = resource.gzip_body is not None and 'gzip' in self.headers.get('Accept-Encoding', '')
+                etag = resource.gzip_etag if compressed else resource.etag
+                if resource.matches(self.headers.get('If-None-Match')):
+                    metrics.inc("daemon_requests_total", status="304")
+                    self.send_response(304)
+                    self.send_header('ETag', etag)
+                    if resource.gzip_body is not None:
+                        self.send_header('Vary', 'Accept-Encoding')
+                    self.end_headers()
+                    return
+
+                body = resource.gzip_body if compressed else resource.body
+                self.send_response(200)
+                self.send_header('Content-Type', resource.content_type)
+                self.send_header('ETag', etag)
+                self.send_header('Cache-Control', resource.cache_control)
+                if resource.gzip_body is not None:
+                    self.send_header('Vary', 'Accept-Encoding')
+                if compressed:
+                    self.send_header('Content-Encoding', 'gzip')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                if not head_only:
+                    self.wfile.write(body)
+                metrics.inc("daemon_requests_total", status="200")
+                metrics.inc("daemon_bytes_sent_total", len(body))
+
+            def do_GET(self):
+                self._respond(head_only=False)
+
+            def do_HEAD(self):
+                self._respond(head_only=True)
+
+        return Handler
@@ -0,0 +1,189 @@
+import time
+
+import pandas as pd
+
+from endpoints import YAHOO_CHART_URL
+from metrics import get_metrics
+
+# One daily download per symbol; a year of daily bars resamples to ~52 weekly
+# bars, enough for a 14/14/3/3 weekly Stochastic RSI
+HISTORY_RANGE = "1y"
+
+# Initial download when seeding the bar store; later runs only fetch new bars
+STORE_SEED_RANGE = "2y"
+
+# Window of daily bars used for the daily indicators (matches Yahoo's range=60d)
+DAILY_WINDOW_DAYS = 60
+
+OHLCV_COLUMNS = ['open', 'high', 'low', 'close', 'volume']
+
+DAY = 86400
+
+
+def parse_chart(data):
+    """
+    Convert a Yahoo Finance chart JSON payload into an OHLCV DataFrame.
+
+    Args:
+        data (dict): Decoded `v8/finance/chart` response
+
+    Returns:
+        pd.DataFrame: OHLCV bars indexed by timestamp, or None if the payload has no bars
+    """
+    if not data or not data.get('chart', {}).get('result'):
+        return None
+
+    with get_metrics().timer("parse_seconds"):
+        result = data['chart']['result'][0]
+        timestamps = result.get('timestamp', [])
+        quotes = result.get('indicators', {}).get('quote', [{}])[0]
+        if not timestamps or not all(key in quotes for key in OHLCV_COLUMNS):
+            return None
+
+        bars = pd.DataFrame({key: quotes[key] for key in OHLCV_COLUMNS},
+                            index=pd.to_datetime(timestamps, unit='s'), dtype=float)
+    return bars
+
+
+def unix_seconds(index):
+    """
+    Convert a DatetimeIndex to integer unix seconds.
+
+    Args:
+        index (pd.DatetimeIndex): Bar timestamps
+
+    Returns:
+        np.ndarray: int64 seconds since the epoch
+    """
+    return ((index - pd.Timestamp(0)) // pd.Timedelta(seconds=1)).to_numpy(dtype='int64')
+
+
+def week_start(timestamps):
+    """
+    Start of Yahoo's `interval=1wk` week containing each timestamp.
+
+    The single definition of the weekly boundaries, shared by `resample_weekly`,
+    the backtest and the stub server so they cannot drift apart.
+
+    Args:
+        timestamps (int or np.ndarray): Unix seconds
+
+    Returns:
+        int or np.ndarray: Unix seconds of the Monday 00:00 UTC opening each week
+    """
+    # The epoch fell on a Thursday; shifting by 3 days starts weeks on Monday
+    return ((timestamps // DAY + 3) // 7 * 7 - 3) * DAY
+
+
+def resample_weekly(daily):
+    """
+    Resample daily OHLCV bars into weekly bars on Yahoo's week boundaries.
+
+    Yahoo's `interval=1wk` bars run Monday to Friday and are stamped with the
+    Monday of the week. The last bar is the still-forming current week, exactly
+    as Yahoo returns it.
+
+    Args:
+        daily (pd.DataFrame): Daily OHLCV bars indexed by timestamp
+
+    Returns:
+        pd.DataFrame: Weekly OHLCV bars indexed by the Monday of each week
+    """
+    daily = daily.dropna(subset=['close'])
+    weeks = pd.to_datetime(week_start(unix_seconds(daily.index)), unit='s')
+    weekly = daily.groupby(weeks).agg({
+        'open': 'first',
+        'high': 'max',
+        'low': 'min',
+        'close': 'last',
+        'volume': 'sum',
+    })
+    return weekly.dropna(subset=['close'])
+
+
+class SymbolHistory:
+    """
+    Daily history for one symbol plus the series derived from it locally:
+    latest close, the daily indicator window and the weekly bars.
+    """
+
+    def __init__(self, symbol, daily, window_days=DAILY_WINDOW_DAYS):
+        """
+        Args:
+            symbol (str): Ticker symbol
+            daily (pd.DataFrame): Daily OHLCV bars indexed by timestamp
+            window_days (int): Calendar days used for the daily indicators, None for all bars
+        """
+        self.symbol = symbol
+        self.daily = daily
+        self.window_days = window_days
+
+    @property
+    def close(self):
+        """Latest close price, or None if the history has no valid close."""
+        closes = self.daily['close'].dropna()
+        if closes.empty:
+            return None
+        return float(closes.iloc[-1])
+
+    def daily_window(self):
+        """
+        Daily bars used for the daily indicators: the last `window_days`
+        calendar days, or the full history when `window_days` is None.
+
+        Returns:
+            pd.DataFrame: Daily OHLCV bars
+        """
+        days = self.window_days
+        if days is None or self.daily.empty:
+            return self.daily
+        start = self.daily.index[-1].normalize() - pd.Timedelta(days=days)
+        return self.daily[self.daily.index > start]
+
+    def weekly(self):
+        """
+        Weekly bars resampled from the full daily history.
+
+        Returns:
+            pd.DataFrame: Weekly OHLCV bars
+        """
+        return resample_weekly(self.daily)
+
+
+def fetch_history(symbol, fetcher, history_range=HISTORY_RANGE, store=None):
+    """
+    Download the single daily history that every per-symbol series is derived from.
+
+    With a bar store, only bars from the newest stored timestamp onwards are
+    requested and appended, and indicators run over the full stored history.
+
+    Args:
+        symbol (str): Ticker symbol
+        fetcher: Object with a `get_json(url)` method used for the request
+        history_range (str): Yahoo range parameter for the daily download
+        store (BarStore): Optional persistent bar store
+
+    Returns:
+        SymbolHistory: History for the symbol, or None if Yahoo returned no bars
+    """
+    if store is None:
+        url = f"{YAHOO_CHART_URL}/{symbol}?range={history_range}&interval=1d"
+        daily = parse_chart(fetcher.get_json(url))
+        if daily is None:
+            return None
+        return SymbolHistory(symbol, daily)
+
+    last_timestamp = store.last_timestamp(symbol, '1d')
+    if last_timestamp is None:
+        url = f"{YAHOO_CHART_URL}/{symbol}?range={STORE_SEED_RANGE}&interval=1d"
+    else:
+        # Start at the last stored bar so a still-forming bar gets corrected
+        url = f"{YAHOO_CHART_URL}/{symbol}?period1={last_timestamp}&period2={int(time.time())}&interval=1d"
+    bars = parse_chart(fetcher.get_json(url))
+    if bars is None:
+        if last_timestamp is None:
+            return None
+        daily = store.load(symbol, '1d')
+    else:
+        daily = store.append(symbol, '1d', bars)
+    return SymbolHistory(symbol, daily, window_days=None)
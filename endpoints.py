@@ -0,0 +1,7 @@
+# Upstream data sources. Kept free of imports so any entry point can read them cheaply.
+
+SLICKCHARTS_URL = "https://www.slickcharts.com/nasdaq100"
+
+YAHOO_CHART_URL = "https://query1.finance.yahoo.com/v8/finance/chart"
+
+YAHOO_SPARK_URL = "https://query1.finance.yahoo.com/v7/finance/spark"
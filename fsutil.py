@@ -0,0 +1,50 @@
+import os
+import tempfile
+from contextlib import contextmanager
+
+
+def _current_umask():
+    # os.umask can only be read by setting it; done once, before any writer threads exist
+    umask = os.umask(0o022)
+    os.umask(umask)
+    return umask
+
+
+# Permissions of a newly created file, as open() would give it
+NEW_FILE_MODE = 0o666 & ~_current_umask()
+
+
+@contextmanager
+def atomic_writer(path, mode="w"):
+    """
+    Open a temporary file next to `path` and rename it into place on success.
+
+    Readers (including the HTTP server) see either the old file or the new one,
+    never a partially written file. On error the temporary file is removed and
+    `path` is left untouched. The file keeps the permissions of the one it
+    replaces, or gets the usual umask-based ones when new (rather than the
+    owner-only mode of a temporary file), so web servers can still read it.
+
+    Args:
+        path (str): Destination file path
+        mode (str): File mode, "w" for text or "wb" for binary
+
+    Yields:
+        file: Open temporary file to write to
+    """
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-", suffix=os.path.basename(path))
+    try:
+        with os.fdopen(fd, mode) as f:
+            yield f
+        try:
+            permissions = os.stat(path).st_mode & 0o7777
+        except FileNotFoundError:
+            permissions = NEW_FILE_MODE
+        os.chmod(tmp_path, permissions)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
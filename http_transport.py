@@ -0,0 +1,217 @@
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from metrics import get_metrics
+
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+    'Accept-Encoding': 'gzip, deflate',
+}
+
+# Responses worth retrying: throttling and transient server errors
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+DEFAULT_MAX_RETRIES = 4
+DEFAULT_BACKOFF_BASE = 0.5
+DEFAULT_BACKOFF_CAP = 30.0
+DEFAULT_PER_HOST_LIMIT = 4
+DEFAULT_POOL_SIZE = 16
+DEFAULT_TIMEOUT = 15
+
+
+def parse_retry_after(value):
+    """
+    Parse a Retry-After header given either as seconds or as an HTTP date.
+
+    Args:
+        value (str): Header value
+
+    Returns:
+        float: Seconds to wait, or None if the header is missing or invalid
+    """
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class Transport:
+    """
+    Shared HTTP transport: one pooled keep-alive session with gzip, capped
+    exponential backoff with full jitter that honors Retry-After, an optional
+    request-rate limiter and a cap on concurrent requests per host.
+    """
+
+    def __init__(self, rate_limiter=None, per_host_limit=DEFAULT_PER_HOST_LIMIT, max_retries=DEFAULT_MAX_RETRIES,
+                 backoff_base=DEFAULT_BACKOFF_BASE, backoff_cap=DEFAULT_BACKOFF_CAP, pool_size=DEFAULT_POOL_SIZE,
+                 timeout=DEFAULT_TIMEOUT):
+        """
+        Args:
+            rate_limiter (TokenBucket): Optional limiter acquired before every attempt
+            per_host_limit (int): Maximum concurrent requests to one host
+            max_retries (int): Retries after the first attempt
+            backoff_base (float): First backoff delay in seconds
+            backoff_cap (float): Upper bound for any single delay
+            pool_size (int): Keep-alive connections kept per host
+            timeout (float): Per-request timeout in seconds
+        """
+        self.rate_limiter = rate_limiter
+        self.per_host_limit = max(1, per_host_limit)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.timeout = timeout
+
+        self.session = requests.Session()
+        self.session.headers.update(DEFAULT_HEADERS)
+        self.adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount('http://', self.adapter)
+        self.session.mount('https://', self.adapter)
+
+        self._lock = threading.Lock()
+        self._host_limits = {}
+        self._requests = 0
+        self._retries = 0
+        self._errors = 0
+        self._bytes = 0
+
+    def _host_limit(self, url):
+        host = urlsplit(url).netloc
+        with self._lock:
+            if host not in self._host_limits:
+                self._host_limits[host] = threading.BoundedSemaphore(self.per_host_limit)
+            return self._host_limits[host]
+
+    def _backoff(self, attempt, retry_after=None):
+        if retry_after is not None:
+            return min(retry_after, self.backoff_cap)
+        return random.uniform(0, min(self.backoff_cap, self.backoff_base * 2 ** attempt))
+
+    def _count(self, requests_made=0, retries=0, errors=0, bytes_received=0):
+        with self._lock:
+            self._requests += requests_made
+            self._retries += retries
+            self._errors += errors
+            self._bytes += bytes_received
+
+    def get(self, url, headers=None):
+        """
+        GET a URL, retrying connection errors, 429 and 5xx responses.
+
+        Args:
+            url (str): URL to fetch
+            headers (dict): Extra headers for this request
+
+        Returns:
+            requests.Response: Final response (callers decide whether to raise_for_status)
+
+        Raises:
+            requests.exceptions.RequestException: If every attempt failed to connect
+        """
+        metrics = get_metrics()
+        host = urlsplit(url).netloc
+        attempt = 0
+        while True:
+            if self.rate_limiter is not None:
+                waited = self.rate_limiter.acquire()
+                if waited:
+                    metrics.observe("rate_limit_wait_seconds", waited)
+            start = time.perf_counter()
+            try:
+                with self._host_limit(url):
+                    response = self.session.get(url, headers=headers, timeout=self.timeout)
+                    content = response.content
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                self._count(requests_made=1, errors=1)
+                metrics.inc("http_errors_total", host=host, reason=type(e).__name__)
+                if attempt >= self.max_retries:
+                    raise
+                self._count(retries=1)
+                metrics.inc("http_retries_total", host=host, reason=type(e).__name__)
+                time.sleep(self._backoff(attempt))
+                attempt += 1
+                continue
+
+            wire_bytes = (response.raw.tell() if response.raw is not None else 0) or len(content)
+            self._count(requests_made=1, bytes_received=wire_bytes)
+            metrics.observe("http_request_seconds", time.perf_counter() - start, host=host)
+            metrics.inc("http_requests_total", host=host, status=str(response.status_code))
+            metrics.inc("http_bytes_received_total", wire_bytes, host=host)
+            if response.status_code not in RETRY_STATUSES or attempt >= self.max_retries:
+                if response.status_code >= 400:
+                    self._count(errors=1)
+                    metrics.inc("http_errors_total", host=host, reason=str(response.status_code))
+                return response
+
+            self._count(retries=1)
+            metrics.inc("http_retries_total", host=host, reason=str(response.status_code))
+            time.sleep(self._backoff(attempt, parse_retry_after(response.headers.get('Retry-After'))))
+            attempt += 1
+
+    def get_json(self, url, headers=None):
+        """
+        GET a URL and decode the JSON body.
+
+        Args:
+            url (str): URL to fetch
+            headers (dict): Extra headers for this request
+
+        Returns:
+            dict: Decoded JSON response
+        """
+        response = self.get(url, headers=headers)
+        response.raise_for_status()
+        return response.json()
+
+    def stats(self):
+        """
+        Transfer statistics since the transport was created.
+
+        Returns:
+            dict: requests, retries, errors, bytes_received, connections_opened, connections_reused
+        """
+        opened = 0
+        pools = self.adapter.poolmanager.pools
+        for key in list(pools.keys()):
+            pool = pools.get(key)
+            if pool is not None:
+                opened += pool.num_connections
+        with self._lock:
+            return {
+                'requests': self._requests,
+                'retries': self._retries,
+                'errors': self._errors,
+                'bytes_received': self._bytes,
+                'connections_opened': opened,
+                'connections_reused': max(0, self._requests - opened),
+            }
+
+
+_default_transport = None
+_default_lock = threading.Lock()
+
+
+def get_transport():
+    """
+    Process-wide shared transport, created on first use.
+
+    Returns:
+        Transport: Shared transport instance
+    """
+    global _default_transport
+    with _default_lock:
+        if _default_transport is None:
+            _default_transport = Transport()
+        return _default_transport
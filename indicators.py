@@ -0,0 +1,358 @@
+import json
+import math
+import os
+
+import numpy as np
+
+from fsutil import atomic_writer
+
+# Parameters of the indicators shown on the ticker pages (pandas_ta defaults)
+RSI_LENGTH = 14
+STOCH_LENGTH = 14
+STOCH_K = 3
+
+
+def close_matrix(series_list):
+    """
+    Stack ragged close series into a (symbols x bars) float matrix.
+
+    Missing closes (None/NaN) are dropped from each series, and shorter series
+    are right-aligned and left-padded with NaN, so the last column always holds
+    every symbol's latest bar.
+
+    Args:
+        series_list (list): One sequence of close prices per symbol
+
+    Returns:
+        np.ndarray: Float64 matrix of shape (len(series_list), longest series)
+    """
+    rows = []
+    for series in series_list:
+        values = np.array([np.nan if value is None else value for value in series], dtype='float64')
+        rows.append(values[~np.isnan(values)])
+
+    width = max((len(row) for row in rows), default=0)
+    matrix = np.full((len(rows), width), np.nan)
+    for i, row in enumerate(rows):
+        if len(row):
+            matrix[i, width - len(row):] = row
+    return matrix
+
+
+def _wilder_average(values, length):
+    """
+    Wilder moving average along axis 1, matching pandas_ta's `rma`:
+    `Series.ewm(alpha=1/length, min_periods=length).mean()` (adjusted weights).
+
+    Each row starts at its first non-NaN value; leading NaNs stay NaN. The
+    adjusted mean is kept as a running value plus the total weight of the bars
+    behind it, so each bar still costs O(1).
+    """
+    decay = 1.0 - 1.0 / length
+    symbols, bars = values.shape
+    out = np.full(values.shape, np.nan)
+    weighted = np.full(symbols, np.nan)
+    weights = np.ones(symbols)
+    observations = np.zeros(symbols, dtype='int64')
+
+    with np.errstate(invalid='ignore'):
+        for t in range(bars):
+            current = values[:, t]
+            observed = ~np.isnan(current)
+            observations += observed
+
+            started = ~np.isnan(weighted)
+            weights[started] *= decay
+            update = started & observed & (weighted != current)
+            weighted[update] = (weights[update] * weighted[update] + current[update]) / (weights[update] + 1.0)
+            weights[started & observed] += 1.0
+            first = ~started & observed
+            weighted[first] = current[first]
+
+            ready = observations >= length
+            out[ready, t] = weighted[ready]
+    return out
+
+
+def rsi(closes, length=RSI_LENGTH):
+    """
+    Wilder RSI for every symbol and bar, matching `pandas_ta.rsi`.
+
+    Args:
+        closes (np.ndarray): (symbols x bars) close matrix from `close_matrix`
+        length (int): RSI period
+
+    Returns:
+        np.ndarray: RSI matrix of the same shape, NaN during warm-up
+    """
+    change = np.full(closes.shape, np.nan)
+    change[:, 1:] = closes[:, 1:] - closes[:, :-1]
+    with np.errstate(invalid='ignore'):
+        gain = np.where(change < 0, 0.0, change)
+        loss = np.abs(np.where(change > 0, 0.0, change))
+        average_gain = _wilder_average(gain, length)
+        average_loss = _wilder_average(loss, length)
+        return 100 * average_gain / (average_gain + average_loss)
+
+
+def _rolling(values, window, reducer):
+    """Apply `reducer` over trailing windows along axis 1; NaN until the window fills."""
+    out = np.full(values.shape, np.nan)
+    if values.shape[1] >= window:
+        windows = np.lib.stride_tricks.sliding_window_view(values, window, axis=1)
+        out[:, window - 1:] = reducer(windows)
+    return out
+
+
+def _rolling_mean(values, window):
+    """Trailing mean along axis 1, summing oldest to newest; NaN until the window fills."""
+    out = np.full(values.shape, np.nan)
+    if values.shape[1] >= window:
+        total = values[:, :values.shape[1] - window + 1].copy()
+        for offset in range(1, window):
+            total += values[:, offset:values.shape[1] - window + 1 + offset]
+        out[:, window - 1:] = total / window
+    return out
+
+
+def stoch_rsi_k(rsi_values, length=STOCH_LENGTH, k=STOCH_K):
+    """
+    Stochastic RSI %K for every symbol and bar, matching the
+    `STOCHRSIk_14_14_3_3` column of `pandas_ta.stochrsi`.
+
+    A flat RSI window (highest == lowest) yields 0, as pandas_ta's epsilon
+    guard does.
+
+    Args:
+        rsi_values (np.ndarray): RSI matrix from `rsi`
+        length (int): Stochastic look-back over RSI values
+        k (int): %K smoothing period
+
+    Returns:
+        np.ndarray: %K matrix of the same shape, NaN during warm-up
+    """
+    lowest = _rolling(rsi_values, length, lambda windows: windows.min(axis=-1))
+    highest = _rolling(rsi_values, length, lambda windows: windows.max(axis=-1))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        span = highest - lowest
+        stoch = np.where(span == 0, 0.0, 100 * (rsi_values - lowest) / span)
+    stoch[np.isnan(span)] = np.nan
+    return _rolling_mean(stoch, k)
+
+
+def latest_indicators(series_list):
+    """
+    Compute the latest RSI and Stochastic RSI %K for a whole universe in one pass.
+
+    Args:
+        series_list (list): One sequence of close prices per symbol
+
+    Returns:
+        tuple: (rsi, stoch_rsi_k) arrays with one value per symbol (NaN if unavailable)
+    """
+    closes = close_matrix(series_list)
+    if closes.shape[1] == 0:
+        empty = np.full(len(series_list), np.nan)
+        return empty, empty.copy()
+    rsi_values = rsi(closes)
+    return rsi_values[:, -1], stoch_rsi_k(rsi_values)[:, -1]
+
+
+class IndicatorState:
+    """
+    Streaming RSI / Stochastic RSI %K state for one symbol and timeframe.
+
+    Each `update` costs O(1) per bar and performs exactly the arithmetic of
+    `rsi` and `stoch_rsi_k` in the same order, so the values are bit-for-bit
+    identical to a full recompute over the same history. `replace_last`
+    re-applies the newest bar, for candles that are still forming.
+    """
+
+    def __init__(self, length=RSI_LENGTH, stoch_length=STOCH_LENGTH, k=STOCH_K):
+        self.length = length
+        self.stoch_length = stoch_length
+        self.k = k
+        self.last_timestamp = None
+        self.prev_close = None
+        self.avg_gain = math.nan
+        self.avg_loss = math.nan
+        self.weight = 1.0
+        self.observations = 0
+        self.rsi_window = []
+        self.stoch_window = []
+        self.rsi = math.nan
+        self.stoch_rsi_k = math.nan
+        self._previous = None
+
+    def _fields(self):
+        return {
+            'last_timestamp': self.last_timestamp,
+            'prev_close': self.prev_close,
+            'avg_gain': self.avg_gain,
+            'avg_loss': self.avg_loss,
+            'weight': self.weight,
+            'observations': self.observations,
+            'rsi_window': list(self.rsi_window),
+            'stoch_window': list(self.stoch_window),
+            'rsi': self.rsi,
+            'stoch_rsi_k': self.stoch_rsi_k,
+        }
+
+    def _restore(self, fields):
+        for name, value in fields.items():
+            setattr(self, name, list(value) if isinstance(value, list) else value)
+
+    @staticmethod
+    def _wilder_step(weighted, weight, value):
+        if weighted != value:
+            return (weight * weighted + value) / (weight + 1.0)
+        return weighted
+
+    @staticmethod
+    def _push(window, value, size):
+        window.append(value)
+        if len(window) > size:
+            del window[0]
+
+    def update(self, close, timestamp=None):
+        """
+        Apply one new bar.
+
+        Args:
+            close (float): Close price of the bar; None/NaN bars are skipped
+            timestamp (int): Bar timestamp in unix seconds
+
+        Returns:
+            tuple: Current (rsi, stoch_rsi_k)
+        """
+        if close is None or math.isnan(close):
+            return self.rsi, self.stoch_rsi_k
+        self._previous = self._fields()
+        self.last_timestamp = timestamp
+
+        if self.prev_close is not None:
+            change = close - self.prev_close
+            gain = 0.0 if change < 0 else change
+            loss = abs(0.0 if change > 0 else change)
+            if math.isnan(self.avg_gain):
+                self.avg_gain, self.avg_loss = gain, loss
+            else:
+                # Gains and losses are observed together, so they share one total weight
+                weight = self.weight * (1.0 - 1.0 / self.length)
+                self.avg_gain = self._wilder_step(self.avg_gain, weight, gain)
+                self.avg_loss = self._wilder_step(self.avg_loss, weight, loss)
+                self.weight = weight + 1.0
+            self.observations += 1
+        self.prev_close = close
+
+        rsi = math.nan
+        if self.observations >= self.length:
+            total = self.avg_gain + self.avg_loss
+            rsi = 100 * self.avg_gain / total if total != 0 else math.nan
+        self.rsi = rsi
+
+        self._push(self.rsi_window, rsi, self.stoch_length)
+        stoch = math.nan
+        if len(self.rsi_window) == self.stoch_length and not any(math.isnan(v) for v in self.rsi_window):
+            lowest = min(self.rsi_window)
+            span = max(self.rsi_window) - lowest
+            stoch = 0.0 if span == 0 else 100 * (rsi - lowest) / span
+
+        self._push(self.stoch_window, stoch, self.k)
+        stoch_rsi_k = math.nan
+        if len(self.stoch_window) == self.k:
+            total = self.stoch_window[0]
+            for value in self.stoch_window[1:]:
+                total += value
+            stoch_rsi_k = total / self.k
+        self.stoch_rsi_k = stoch_rsi_k
+        return self.rsi, self.stoch_rsi_k
+
+    def replace_last(self, close, timestamp=None):
+        """
+        Replace the most recent bar, e.g. the still-open weekly candle.
+
+        Args:
+            close (float): Updated close price of the last bar
+            timestamp (int): Bar timestamp in unix seconds
+
+        Returns:
+            tuple: Current (rsi, stoch_rsi_k)
+        """
+        if self._previous is None:
+            return self.update(close, timestamp)
+        self._restore(self._previous)
+        return self.update(close, timestamp)
+
+    def advance(self, timestamps, closes):
+        """
+        Bring the state up to date with a bar history.
+
+        Bars after `last_timestamp` are applied with `update`; the bar at
+        `last_timestamp` is re-applied with `replace_last`. If the history no
+        longer contains `last_timestamp` the state is rebuilt from scratch.
+
+        Args:
+            timestamps (sequence): Bar timestamps in unix seconds, ascending
+            closes (sequence): Close prices aligned with `timestamps`
+
+        Returns:
+            int: Number of bars applied
+        """
+        applied = 0
+        start = 0
+        if self.last_timestamp is not None:
+            position = int(np.searchsorted(timestamps, self.last_timestamp))
+            if position < len(timestamps) and timestamps[position] == self.last_timestamp:
+                self.replace_last(float(closes[position]), self.last_timestamp)
+                applied = 1
+                start = position + 1
+            else:
+                self.__init__(self.length, self.stoch_length, self.k)
+
+        for i in range(start, len(timestamps)):
+            self.update(float(closes[i]), int(timestamps[i]))
+            applied += 1
+        return applied
+
+    def to_dict(self):
+        """Serializable form of the state, including the undo snapshot for `replace_last`."""
+        fields = self._fields()
+        fields.update(length=self.length, stoch_length=self.stoch_length, k=self.k, previous=self._previous)
+        return fields
+
+    @classmethod
+    def from_dict(cls, data):
+        """Rebuild a state saved with `to_dict`."""
+        state = cls(data['length'], data['stoch_length'], data['k'])
+        state._restore({name: data[name] for name in state._fields()})
+        state._previous = data.get('previous')
+        return state
+
+
+def load_states(path):
+    """
+    Load persisted indicator states for one timeframe.
+
+    Args:
+        path (str): JSON file written by `save_states`
+
+    Returns:
+        dict: Symbol to IndicatorState (empty if the file does not exist)
+    """
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r") as f:
+        return {symbol: IndicatorState.from_dict(data) for symbol, data in json.load(f).items()}
+
+
+def save_states(path, states):
+    """
+    Persist indicator states for one timeframe atomically.
+
+    Args:
+        path (str): Destination JSON file
+        states (dict): Symbol to IndicatorState
+    """
+    with atomic_writer(path) as f:
+        json.dump({symbol: state.to_dict() for symbol, state in states.items()}, f)
@@ -0,0 +1,89 @@
+import json
+import os
+import time
+
+JOURNAL_FILENAME = "run_journal.jsonl"
+
+
+class RunJournal:
+    """
+    Append-only JSON-lines record of the symbols a run has finished.
+
+    The first line is a header; every further line is one symbol's snapshot
+    entry. Appends are flushed and fsynced, so after a crash the journal
+    holds every batch that completed. A torn final line is ignored on load.
+    """
+
+    def __init__(self, path):
+        """
+        Args:
+            path (str): Journal file
+        """
+        self.path = path
+        self._file = None
+
+    def load(self):
+        """
+        Read the entries recorded so far.
+
+        Returns:
+            dict: Symbol to its most recent entry (empty if there is no journal)
+        """
+        entries = {}
+        if not os.path.exists(self.path):
+            return entries
+        with open(self.path, "r") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # Partially written line from an interrupted append
+                    continue
+                if 'symbol' in record:
+                    entries[record['symbol']] = record
+        return entries
+
+    def open(self, resume=False):
+        """
+        Open the journal for appending.
+
+        Args:
+            resume (bool): Keep the existing records; otherwise start a new journal
+        """
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._file = open(self.path, "a" if resume else "w")
+        if resume and self._file.tell() > 0:
+            with open(self.path, "rb") as f:
+                f.seek(-1, os.SEEK_END)
+                torn = f.read(1) != b"\n"
+            if torn:
+                # Terminate a torn final line so the next record starts cleanly
+                self._file.write("\n")
+        self._write([{'journal': 1, 'started_at': int(time.time()), 'resumed': resume}])
+        return self
+
+    def append(self, entries):
+        """
+        Durably record finished symbols.
+
+        Args:
+            entries (list): Snapshot entries
+        """
+        if entries:
+            self._write(entries)
+
+    def _write(self, records):
+        self._file.write("".join(json.dumps(record, separators=(',', ':')) + "\n" for record in records))
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,212 @@
+import argparse
+import logging
+import os
+
+# Only lightweight modules are imported here; each command imports what it
+# needs when it runs, so `rebuild-json` and `serve` never load pandas
+# or requests
+from metrics import configure_logging, instrumented_run, log_event
+
+DISPLAY_DIR = "nasdaq_display"
+TICKERS_DIR = os.path.join(DISPLAY_DIR, "tickers")
+SNAPSHOT_PATH = os.path.join(DISPLAY_DIR, "snapshot.json")
+TICKERS_JSON_PATH = os.path.join(DISPLAY_DIR, "tickers.json")
+BACKTEST_PATH = os.path.join(DISPLAY_DIR, "backtest.json")
+TICKERS_FILE = "Stocks_Scanner/nasdaq100_tickers.txt"
+STORE_DIR = "Stocks_Scanner/data/bars"
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8000
+
+logger = logging.getLogger(__name__)
+
+
+def fetch_tickers(args):
+    """Fetch the NASDAQ 100 constituents (cached) and their prices."""
+    from nasdaq_tickers import save_tickers_to_json
+
+    options = {'force': args.refresh_constituents}
+    if args.constituents_ttl is not None:
+        options['ttl'] = args.constituents_ttl
+    save_tickers_to_json(**options)
+
+
+def update(args):
+    """Update the ticker pages, snapshot and recommended buys."""
+    import update_ticker_files
+    from sharding import merge_shards
+
+    if args.merge:
+        with open(TICKERS_FILE, "r") as f:
+            tickers = [line.strip() for line in f if line.strip()]
+        return merge_shards(DISPLAY_DIR, args.shard_count, tickers, output_mode=args.output_mode)
+
+    options = {
+        'store_dir': None if args.no_store else STORE_DIR,
+        'resume': args.resume,
+        'retry_failed': args.retry_failed,
+        'output_mode': args.output_mode,
+    }
+    if args.requests_per_second is not None:
+        options['requests_per_second'] = args.requests_per_second
+    if args.shard_index is not None:
+        return update_ticker_files.update_ticker_files(TICKERS_DIR, TICKERS_FILE, shard_index=args.shard_index,
+                                                       shard_count=args.shard_count, **options)
+    if args.processes > 1:
+        return update_ticker_files.update_ticker_files_sharded(TICKERS_DIR, TICKERS_FILE, args.processes, **options)
+    return update_ticker_files.update_ticker_files(TICKERS_DIR, TICKERS_FILE, **options)
+
+
+def rebuild_json(args):
+    """Rebuild tickers.json and the screen outputs (e.g. recommended_buys.json) from the last snapshot."""
+    from update_tickers_json import update_tickers_json
+
+    update_tickers_json(SNAPSHOT_PATH, TICKERS_JSON_PATH, DISPLAY_DIR, getattr(args, 'screens', None))
+
+
+def serve(args):
+    """Serve the display directory over HTTP until interrupted."""
+    from functools import partial
+    from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+    handler = partial(SimpleHTTPRequestHandler, directory=DISPLAY_DIR)
+    with ThreadingHTTPServer((args.host, args.port), handler) as server:
+        log_event(logger, logging.INFO, "serving", url=f"http://{args.host}:{args.port}/", directory=DISPLAY_DIR)
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+
+
+def daemon(args):
+    """Refresh prices and indicators on a schedule and serve the snapshot from memory."""
+    from daemon import RefreshDaemon
+
+    refresher = RefreshDaemon(TICKERS_DIR, TICKERS_FILE, store_dir=STORE_DIR, static_dir=DISPLAY_DIR,
+                              price_interval=args.price_interval, indicator_interval=args.indicator_interval)
+    refresher.start(args.host, args.port).serve_forever()
+
+
+def backtest(args):
+    """Backtest the weekly RSI / Stochastic RSI buy rule and a sweep of its thresholds."""
+    from backtest import PriceHistory, run_backtest, synthetic_history, write_report
+
+    if args.synthetic:
+        history = synthetic_history(args.synthetic, args.years)
+    elif args.history:
+        history = PriceHistory.load(args.history)
+    else:
+        history = PriceHistory.from_bar_store(STORE_DIR)
+    if args.save_history:
+        history.save(args.save_history)
+    if not history.symbols:
+        log_event(logger, logging.ERROR, "backtest_no_history", store_dir=STORE_DIR)
+        return None
+    report = run_backtest(history, args.timeframe, args.horizons)
+    write_report(args.output, report)
+    log_event(logger, logging.INFO, "backtest_written", path=args.output)
+    return report
+
+
+def run(args):
+    """Run the whole pipeline, then serve the result."""
+    fetch_tickers(args)
+    update(args)
+    rebuild_json(args)
+    if not args.no_serve:
+        serve(args)
+
+
+def _add_fetch_arguments(parser):
+    parser.add_argument("--constituents-ttl", type=float,
+                        help="Seconds the cached constituent list is used before SlickCharts is checked again "
+                             "(default one day)")
+    parser.add_argument("--refresh-constituents", action="store_true",
+                        help="Check SlickCharts for membership changes even if the cache is fresh")
+
+
+def _add_update_arguments(parser):
+    parser.add_argument("--requests-per-second", type=float,
+                        help="Request budget for the whole run, across all shards (default 5)")
+    parser.add_argument("--processes", type=int, default=1,
+                        help="Split the tickers across this many local worker processes")
+    parser.add_argument("--shard-index", type=int, help="Process only this shard (0-based), e.g. one per machine")
+    parser.add_argument("--shard-count", type=int, default=1, help="Total number of shards")
+    parser.add_argument("--merge", action="store_true",
+                        help="Merge the --shard-count shard snapshots into the final outputs")
+    parser.add_argument("--resume", action="store_true",
+                        help="Continue an interrupted run, skipping the symbols already in its journal")
+    parser.add_argument("--retry-failed", action="store_true",
+                        help="Re-run only the symbols the last run's journal records as errors")
+    parser.add_argument("--output-mode", choices=["pages", "site", "both", "none"], default="pages",
+                        help="One HTML file per ticker, or the single-page viewer in site/ over one data file "
+                             "(none writes only the snapshot and screen outputs)")
+    parser.add_argument("--no-store", action="store_true",
+                        help="Download a fixed history window instead of using the persistent bar store")
+
+
+def _add_serve_arguments(parser):
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="NASDAQ 100 scanner")
+    parser.add_argument("-v", "--verbose", action="store_true", help="Log per-symbol events")
+    parser.add_argument("--json-logs", action="store_true", help="Log JSON lines instead of key=value text")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    fetch_parser = commands.add_parser("fetch-tickers", help=fetch_tickers.__doc__)
+    _add_fetch_arguments(fetch_parser)
+    fetch_parser.set_defaults(func=fetch_tickers)
+    update_parser = commands.add_parser("update", help=update.__doc__)
+    _add_update_arguments(update_parser)
+    update_parser.set_defaults(func=update)
+    rebuild_parser = commands.add_parser("rebuild-json", help=rebuild_json.__doc__)
+    rebuild_parser.add_argument("--screens", help="Screens config to run (defaults to screens.json)")
+    rebuild_parser.set_defaults(func=rebuild_json)
+    serve_parser = commands.add_parser("serve", aliases=["server"], help=serve.__doc__)
+    _add_serve_arguments(serve_parser)
+    serve_parser.set_defaults(func=serve)
+    daemon_parser = commands.add_parser("daemon", help=daemon.__doc__)
+    _add_serve_arguments(daemon_parser)
+    daemon_parser.add_argument("--price-interval", type=float, default=60,
+                               help="Seconds between price refreshes (0 disables them)")
+    daemon_parser.add_argument("--indicator-interval", type=float, default=3600,
+                               help="Seconds between full history and indicator updates")
+    daemon_parser.set_defaults(func=daemon)
+    backtest_parser = commands.add_parser("backtest", help=backtest.__doc__)
+    backtest_parser.add_argument("--history", help="History file written by --save-history (default: the bar store)")
+    backtest_parser.add_argument("--synthetic", type=int, default=0,
+                                 help="Backtest this many deterministic random-walk symbols instead (offline)")
+    backtest_parser.add_argument("--years", type=float, default=10, help="Years of synthetic history")
+    backtest_parser.add_argument("--save-history", help="Also write the loaded history to this .npz file")
+    backtest_parser.add_argument("--timeframe", choices=["weekly", "daily"], default="weekly")
+    backtest_parser.add_argument("--horizons", type=int, nargs="+", default=[1, 4, 13, 26],
+                                 help="Forward-return horizons in bars of the timeframe")
+    backtest_parser.add_argument("--output", default=BACKTEST_PATH, help="Report path")
+    backtest_parser.set_defaults(func=backtest)
+    run_parser = commands.add_parser("run", help=run.__doc__)
+    _add_fetch_arguments(run_parser)
+    _add_update_arguments(run_parser)
+    _add_serve_arguments(run_parser)
+    run_parser.add_argument("--no-serve", action="store_true", help="Exit after updating (e.g. from cron)")
+    run_parser.set_defaults(func=run)
+    return parser
+
+
+def main(argv=None):
+    """
+    Command-line entry point.
+
+    Args:
+        argv (list): Arguments (defaults to sys.argv[1:])
+    """
+    args = build_parser().parse_args(argv)
+    configure_logging(logging.DEBUG if args.verbose else logging.INFO, args.json_logs)
+    # Report names use underscores, e.g. fetch_tickers.json / fetch_tickers.prom
+    return instrumented_run(args.func.__name__, args.func, args)
+
+
+if __name__ == "__main__":
+    main()
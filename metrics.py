@@ -0,0 +1,316 @@
+import bisect
+import cProfile
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+from fsutil import atomic_writer
+
+# Latency histogram bucket upper bounds in seconds
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+PROMETHEUS_PREFIX = "nasdaq_"
+
+# Environment fallbacks for `instrumented_run`
+METRICS_DIR_ENV = "NASDAQ_METRICS_DIR"
+PROFILE_ENV = "NASDAQ_PROFILE"
+
+
+class Histogram:
+    """Fixed-bucket histogram (cumulative buckets are derived on export)."""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def as_dict(self):
+        cumulative = []
+        running = 0
+        for bound, count in zip(self.buckets + (float('inf'),), self.counts):
+            running += count
+            cumulative.append(['+Inf' if bound == float('inf') else bound, running])
+        return {'count': self.count, 'sum': self.sum, 'buckets': cumulative}
+
+
+def _key(name, labels):
+    return name, tuple(sorted(labels.items()))
+
+
+class Metrics:
+    """
+    Thread-safe in-process registry of counters, gauges and latency histograms.
+
+    Metrics are identified by a name plus keyword labels, e.g.
+    `inc("http_requests_total", status="200")`. Updates are a dict lookup
+    under a lock, cheap enough to leave on for every request and symbol.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters = {}
+        self.gauges = {}
+        self.histograms = {}
+        self.started_at = time.time()
+
+    def inc(self, name, amount=1, **labels):
+        key = _key(name, labels)
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + amount
+
+    def set_gauge(self, name, value, **labels):
+        with self._lock:
+            self.gauges[_key(name, labels)] = value
+
+    def observe(self, name, value, **labels):
+        key = _key(name, labels)
+        with self._lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram()
+            histogram.observe(value)
+
+    @contextmanager
+    def timer(self, name, **labels):
+        """Observe the duration of the block in histogram `name`."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def reset(self):
+        with self._lock:
+            self.counters.clear()
+            self.gauges.clear()
+            self.histograms.clear()
+            self.started_at = time.time()
+
+    def report(self):
+        """
+        Machine-readable run report.
+
+        Returns:
+            dict: counters, gauges and histograms as lists of {name, labels, value}
+        """
+        with self._lock:
+            return {
+                'started_at': self.started_at,
+                'generated_at': time.time(),
+                'counters': [{'name': n, 'labels': dict(l), 'value': v} for (n, l), v in sorted(self.counters.items())],
+                'gauges': [{'name': n, 'labels': dict(l), 'value': v} for (n, l), v in sorted(self.gauges.items())],
+                'histograms': [{'name': n, 'labels': dict(l), **h.as_dict()}
+                               for (n, l), h in sorted(self.histograms.items())],
+            }
+
+    def merge(self, report):
+        """
+        Fold another process's `report()` into this registry.
+
+        Counters and histograms are summed; gauges describe a whole run, so
+        they are left for the caller to set.
+
+        Args:
+            report (dict): Report from `Metrics.report`
+        """
+        with self._lock:
+            for counter in report['counters']:
+                key = _key(counter['name'], counter['labels'])
+                self.counters[key] = self.counters.get(key, 0) + counter['value']
+            for data in report['histograms']:
+                key = _key(data['name'], data['labels'])
+                histogram = self.histograms.get(key)
+                if histogram is None:
+                    histogram = self.histograms[key] = Histogram()
+                previous = 0
+                for i, (_, cumulative) in enumerate(data['buckets']):
+                    histogram.counts[i] += cumulative - previous
+                    previous = cumulative
+                histogram.count += data['count']
+                histogram.sum += data['sum']
+
+    def prometheus_text(self):
+        """
+        Render the metrics in the Prometheus text exposition format.
+
+        Returns:
+            str: Contents for a node_exporter textfile collector
+        """
+        def labels_text(labels, extra=None):
+            items = list(labels) + ([extra] if extra else [])
+            if not items:
+                return ""
+            return "{" + ",".join(f'{k}="{v}"' for k, v in items) + "}"
+
+        lines = []
+        with self._lock:
+            for kind, series in (('counter', self.counters), ('gauge', self.gauges)):
+                typed = set()
+                for (name, labels), value in sorted(series.items()):
+                    metric = PROMETHEUS_PREFIX + name
+                    if metric not in typed:
+                        lines.append(f"# TYPE {metric} {kind}")
+                        typed.add(metric)
+                    lines.append(f"{metric}{labels_text(labels)} {value}")
+            typed = set()
+            for (name, labels), histogram in sorted(self.histograms.items()):
+                metric = PROMETHEUS_PREFIX + name
+                if metric not in typed:
+                    lines.append(f"# TYPE {metric} histogram")
+                    typed.add(metric)
+                for bound, count in histogram.as_dict()['buckets']:
+                    lines.append(f"{metric}_bucket{labels_text(labels, ('le', bound))} {count}")
+                lines.append(f"{metric}_sum{labels_text(labels)} {histogram.sum}")
+                lines.append(f"{metric}_count{labels_text(labels)} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+    def export(self, directory, name):
+        """
+        Write `<name>.json` and `<name>.prom` run reports into `directory`.
+
+        Args:
+            directory (str): Output directory
+            name (str): Report name, e.g. the entry point
+        """
+        with atomic_writer(os.path.join(directory, f"{name}.json")) as f:
+            json.dump(self.report(), f, indent=2)
+        with atomic_writer(os.path.join(directory, f"{name}.prom")) as f:
+            f.write(self.prometheus_text())
+
+
+_metrics = Metrics()
+
+
+def get_metrics():
+    """Process-wide metrics registry."""
+    return _metrics
+
+
+def timed(name, **labels):
+    """
+    Decorator observing each call's duration in histogram `name` of the shared registry.
+
+    Args:
+        name (str): Histogram name
+        **labels: Histogram labels
+    """
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with _metrics.timer(name, **labels):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+class StructuredFormatter(logging.Formatter):
+    """
+    Log formatter emitting one event per line, either as `key=value` pairs or JSON.
+
+    Fields passed via `log_event` are appended after the event name.
+    """
+
+    def __init__(self, json_output=False):
+        super().__init__()
+        self.json_output = json_output
+
+    def format(self, record):
+        fields = getattr(record, 'fields', {})
+        if self.json_output:
+            payload = {
+                'ts': round(record.created, 3),
+                'level': record.levelname.lower(),
+                'logger': record.name,
+                'event': record.getMessage(),
+            }
+            payload.update(fields)
+            return json.dumps(payload, default=str)
+        stamp = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(record.created))
+        pairs = " ".join(f"{k}={v}" for k, v in fields.items())
+        return f"{stamp} {record.levelname.lower()} {record.name} {record.getMessage()}" + (f" {pairs}" if pairs else "")
+
+
+def configure_logging(level=logging.INFO, json_output=False):
+    """
+    Send structured log lines to stderr.
+
+    Args:
+        level (int): Minimum level; per-symbol events are logged at DEBUG
+        json_output (bool): Emit JSON lines instead of key=value text
+    """
+    handler = logging.StreamHandler()
+    handler.setFormatter(StructuredFormatter(json_output))
+    root = logging.getLogger()
+    root.handlers[:] = [handler]
+    root.setLevel(level)
+
+
+def log_event(logger, level, event, **fields):
+    """
+    Log a structured event; formatting is skipped entirely when the level is disabled.
+
+    Args:
+        logger (logging.Logger): Logger to use
+        level (int): Logging level
+        event (str): Event name
+        **fields: Event fields
+    """
+    if logger.isEnabledFor(level):
+        logger.log(level, event, extra={'fields': fields})
+
+
+@contextmanager
+def profiled(path):
+    """
+    Capture a cProfile of the block into `path` (no-op when `path` is falsy).
+
+    Args:
+        path (str): Destination .prof file
+    """
+    if not path:
+        yield
+        return
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        profiler.dump_stats(path)
+
+
+def instrumented_run(name, func, *args, metrics_dir=None, profile_path=None, **kwargs):
+    """
+    Run a pipeline entry point, optionally under cProfile, and export its run report.
+
+    Args:
+        name (str): Report name
+        func (callable): Entry point
+        metrics_dir (str): Where to write the JSON and Prometheus reports
+            (defaults to $NASDAQ_METRICS_DIR; skipped when unset)
+        profile_path (str): cProfile output file (defaults to $NASDAQ_PROFILE)
+        *args, **kwargs: Passed to `func`
+
+    Returns:
+        The entry point's return value
+    """
+    metrics_dir = metrics_dir or os.environ.get(METRICS_DIR_ENV)
+    profile_path = profile_path or os.environ.get(PROFILE_ENV)
+    metrics = get_metrics()
+    try:
+        with profiled(profile_path), metrics.timer("run_seconds", entry_point=name):
+            return func(*args, **kwargs)
+    finally:
+        if metrics_dir:
+            metrics.export(metrics_dir, name)
@@ -1,105 +1,198 @@
-import requests
-from bs4 import BeautifulSoup
 import json
+import logging
+import sys
 import time
-import pandas as pd
 
-def get_nasdaq_tickers():
+from constituents import DEFAULT_CACHE_PATH, DEFAULT_TTL, refresh_constituents
+from endpoints import YAHOO_CHART_URL, YAHOO_SPARK_URL
+from http_transport import get_transport
+from metrics import get_metrics, log_event, timed
+
+logger = logging.getLogger(__name__)
+
+# Number of symbols requested per batch quote call (Yahoo caps spark at 20)
+DEFAULT_QUOTE_CHUNK_SIZE = 20
+
+def _extract_price(result):
     """
-    Get NASDAQ 100 tickers from SlickCharts and fetch current prices from Yahoo Finance.
+    Extract the formatted close price from a single chart result.
+    
+    Args:
+        result (dict): One chart result (as found in chart and spark responses)
     
     Returns:
-        list: List of dictionaries with ticker symbols and current prices
+        str: Price formatted with two decimals, or "N/A"
     """
-    url = "https://www.slickcharts.com/nasdaq100"
-    try:
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/58.0.3029.110 Safari/537.3'
-        }
-        response = requests.get(url, headers=headers)
-        response.raise_for_status()
-    except requests.exceptions.RequestException as e:
-        print(f"Failed to fetch data: {e}")
-        return []
+    if 'indicators' in result and 'quote' in result['indicators'] and result['indicators']['quote']:
+        quote = result['indicators']['quote'][0]
+        if 'close' in quote and quote['close'] and quote['close'][0] is not None:
+            return f"{quote['close'][0]:.2f}"
+    return "N/A"
+
+def fetch_batch_prices(symbols):
+    """
+    Fetch current prices for several symbols with a single spark request.
+    
+    Args:
+        symbols (list): Ticker symbols for one batch
+    
+    Returns:
+        dict: Symbol to formatted price for every symbol present in the response
+    """
+    url = f"{YAHOO_SPARK_URL}?symbols={','.join(symbols)}&range=1d&interval=1d"
+    data = get_transport().get_json(url)
+    
+    prices = {}
+    for item in (data.get('spark') or {}).get('result') or []:
+        symbol = item.get('symbol')
+        if symbol in symbols and item.get('response'):
+            price = _extract_price(item['response'][0])
+            if price != "N/A":
+                prices[symbol] = price
+    return prices
 
-    soup = BeautifulSoup(response.text, 'html.parser')
+def fetch_price(symbol):
+    """
+    Fetch the current price for one symbol from the chart endpoint.
+    
+    Args:
+        symbol (str): Ticker symbol
+    
+    Returns:
+        str: Price formatted with two decimals, or "N/A"
+    """
+    url = f"{YAHOO_CHART_URL}/{symbol}?range=1d&interval=1d"
+    data = get_transport().get_json(url)
     
-    # Find the table containing the tickers
-    table = soup.find('table', class_='table table-hover table-borderless table-sm')
-    if not table:
-        print("Could not find table with tickers")
-        return []
+    if data and 'chart' in data and 'result' in data['chart'] and data['chart']['result']:
+        return _extract_price(data['chart']['result'][0])
+    return "N/A"
 
-    # Extract ticker symbols
-    ticker_symbols = []
-    for row in table.find_all('tr'):
-        cells = row.find_all('td')
-        if cells and len(cells) > 2:
-            ticker_link = cells[2].find('a')
-            if ticker_link:
-                ticker_symbol = ticker_link.text.strip()
-                # Remove '$' sign if present
-                if ticker_symbol.startswith('$'):
-                    ticker_symbol = ticker_symbol[1:]
-                ticker_symbols.append(ticker_symbol)
-    
-    # Fetch current prices from Yahoo Finance
-    tickers = []
-    for symbol in ticker_symbols:
+@timed("stage_seconds", stage="quotes")
+def fetch_prices(symbols, chunk_size=DEFAULT_QUOTE_CHUNK_SIZE):
+    """
+    Fetch current prices for many symbols using batched requests.
+    
+    Symbols missing from a batch response (or in a batch that failed) are
+    retried one at a time through the chart endpoint.
+    
+    Args:
+        symbols (list): Ticker symbols
+        chunk_size (int): Number of symbols per batch request
+    
+    Returns:
+        dict: Symbol to formatted price ("N/A" when no price could be fetched)
+    """
+    prices = {}
+    chunk_size = max(1, chunk_size)
+    for start in range(0, len(symbols), chunk_size):
+        chunk = symbols[start:start + chunk_size]
+        try:
+            batch = fetch_batch_prices(chunk)
+            prices.update(batch)
+            log_event(logger, logging.DEBUG, "batch_prices_fetched", received=len(batch), requested=len(chunk))
+        except Exception as e:
+            log_event(logger, logging.WARNING, "batch_prices_failed", symbols=",".join(chunk), error=e)
+    
+    # Fall back to per-symbol requests for anything the batches missed
+    metrics = get_metrics()
+    for symbol in symbols:
+        if symbol in prices:
+            continue
+        metrics.inc("price_fallbacks_total")
         try:
             # Add delay to avoid rate limiting
             time.sleep(0.2)
-            
-            # Fetch current price from Yahoo Finance API
-            url = f"https://query1.finance.yahoo.com/v8/finance/chart/{symbol}?range=1d&interval=1d"
-            headers = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'}
-            response = requests.get(url, headers=headers)
-            response.raise_for_status()
-            data = response.json()
-            
-            # Extract the current price
-            price = "N/A"
-            if data and 'chart' in data and 'result' in data['chart'] and data['chart']['result']:
-                result = data['chart']['result'][0]
-                if 'indicators' in result and 'quote' in result['indicators'] and result['indicators']['quote']:
-                    quote = result['indicators']['quote'][0]
-                    if 'close' in quote and quote['close'] and quote['close'][0] is not None:
-                        price = f"{quote['close'][0]:.2f}"
-            
-            tickers.append({"symbol": symbol, "price": price})
-            print(f"Fetched price for {symbol}: ${price}")
-            
+            prices[symbol] = fetch_price(symbol)
+            log_event(logger, logging.DEBUG, "price_fetched", symbol=symbol, price=prices[symbol])
         except Exception as e:
-            print(f"Error fetching price for {symbol}: {e}")
-            tickers.append({"symbol": symbol, "price": "N/A"})
+            log_event(logger, logging.WARNING, "price_failed", symbol=symbol, error=e)
+            metrics.inc("symbol_errors_total", stage="quotes")
+            prices[symbol] = "N/A"
+    
+    missing = sum(price == "N/A" for price in prices.values())
+    metrics.set_gauge("na_ratio", missing / len(symbols) if symbols else 0.0, field="quote_price")
+    log_event(logger, logging.INFO, "prices_fetched", symbols=len(symbols), missing=missing)
+    return prices
+
+def fetch_constituents(ttl=DEFAULT_TTL, force=False):
+    """
+    Get the NASDAQ 100 constituent symbols, from the cache while it is fresh.
+    
+    Args:
+        ttl (float): Seconds a cached constituent list is used without checking SlickCharts
+        force (bool): Check SlickCharts even if the cache is fresh
+    
+    Returns:
+        list: Ticker symbols in page order (empty if never fetched successfully)
+    """
+    symbols, _ = refresh_constituents(DEFAULT_CACHE_PATH, ttl=ttl, force=force)
+    return symbols
+
+def get_nasdaq_tickers(chunk_size=DEFAULT_QUOTE_CHUNK_SIZE, ttl=DEFAULT_TTL, force=False):
+    """
+    Get NASDAQ 100 tickers from SlickCharts and fetch current prices from Yahoo Finance.
+    
+    Args:
+        chunk_size (int): Number of symbols per batch quote request
+        ttl (float): Seconds a cached constituent list is used without checking SlickCharts
+        force (bool): Check SlickCharts even if the constituent cache is fresh
+    
+    Returns:
+        list: List of dictionaries with ticker symbols and current prices
+    """
+    ticker_symbols = fetch_constituents(ttl=ttl, force=force)
+    
+    # Fetch current prices from Yahoo Finance in batches
+    prices = fetch_prices(ticker_symbols, chunk_size=chunk_size)
+    tickers = [{"symbol": symbol, "price": prices[symbol]} for symbol in ticker_symbols]
     
     # Sort tickers alphabetically
     tickers.sort(key=lambda x: x["symbol"])
     
     return tickers
 
-def save_tickers_to_json():
+def save_tickers_to_json(chunk_size=DEFAULT_QUOTE_CHUNK_SIZE, ttl=DEFAULT_TTL, force=False):
     """
     Get NASDAQ tickers with prices and save to JSON and text files.
     
+    The symbols file is only rewritten when index membership changed, so
+    its mtime marks the last change for the stages that read it.
+    
+    Args:
+        chunk_size (int): Number of symbols per batch quote request
+        ttl (float): Seconds a cached constituent list is used without checking SlickCharts
+        force (bool): Check SlickCharts even if the constituent cache is fresh
+    
     Returns:
         list: List of ticker dictionaries
     """
-    print("Fetching NASDAQ 100 tickers with current prices...")
-    tickers = get_nasdaq_tickers()
+    log_event(logger, logging.INFO, "fetching_tickers")
+    tickers = get_nasdaq_tickers(chunk_size=chunk_size, ttl=ttl, force=force)
     
     # Save to JSON file for the web interface
     with open('nasdaq_display/tickers.json', 'w') as f:
         json.dump(tickers, f, indent=4)
-    print(f"Saved {len(tickers)} tickers to nasdaq_display/tickers.json")
+    log_event(logger, logging.INFO, "tickers_saved", path="nasdaq_display/tickers.json", tickers=len(tickers))
     
     # Save ticker symbols to text file for update_ticker_files.py
-    with open('Stocks_Scanner/nasdaq100_tickers.txt', 'w') as f:
-        for ticker in tickers:
-            f.write(f"{ticker['symbol']}\n")
-    print(f"Saved {len(tickers)} ticker symbols to Stocks_Scanner/nasdaq100_tickers.txt")
+    symbols_text = "".join(f"{ticker['symbol']}\n" for ticker in tickers)
+    try:
+        with open('Stocks_Scanner/nasdaq100_tickers.txt', 'r') as f:
+            unchanged = f.read() == symbols_text
+    except FileNotFoundError:
+        unchanged = False
+    if unchanged:
+        log_event(logger, logging.INFO, "symbols_unchanged", path="Stocks_Scanner/nasdaq100_tickers.txt",
+                  tickers=len(tickers))
+    elif tickers:
+        with open('Stocks_Scanner/nasdaq100_tickers.txt', 'w') as f:
+            f.write(symbols_text)
+        log_event(logger, logging.INFO, "symbols_saved", path="Stocks_Scanner/nasdaq100_tickers.txt",
+                  tickers=len(tickers))
     
     return tickers
 
 if __name__ == "__main__":
-    save_tickers_to_json()
+    from main import main
+    main(["fetch-tickers", *sys.argv[1:]])
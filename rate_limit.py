@@ -0,0 +1,93 @@
+import multiprocessing
+import threading
+import time
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket used to pace outgoing API requests.
+
+    Tokens refill continuously at `rate` per second up to `capacity`. Callers
+    block in `acquire` until a token is available, so the long-run request
+    rate never exceeds `rate` regardless of how many threads share the bucket.
+    """
+
+    def __init__(self, rate, capacity=None):
+        """
+        Args:
+            rate (float): Tokens added per second. None or <= 0 disables limiting.
+            capacity (float): Maximum burst size (defaults to max(1, rate))
+        """
+        self.rate = rate if rate and rate > 0 else None
+        self.capacity = capacity if capacity is not None else max(1.0, rate or 1.0)
+        self._tokens = self.capacity
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens=1.0):
+        """
+        Block until `tokens` tokens are available and consume them.
+
+        Args:
+            tokens (float): Number of tokens to consume
+
+        Returns:
+            float: Seconds spent waiting
+        """
+        if self.rate is None:
+            return 0.0
+
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+                self._last = now
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return waited
+                delay = (tokens - self._tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+
+class SharedTokenBucket(TokenBucket):
+    """
+    Token bucket whose state lives in shared memory, so worker processes
+    started from one parent draw from a single global request budget.
+
+    Pass the bucket to workers when they are created (e.g. as a
+    `ProcessPoolExecutor` initializer argument); like any multiprocessing
+    synchronized object it cannot be sent through a queue afterwards.
+    """
+
+    def __init__(self, rate, capacity=None, context=None):
+        """
+        Args:
+            rate (float): Tokens added per second across all processes. None or <= 0 disables limiting.
+            capacity (float): Maximum burst size (defaults to max(1, rate))
+            context: multiprocessing context used to allocate the shared state
+        """
+        super().__init__(rate, capacity)
+        context = context or multiprocessing.get_context()
+        # [tokens, last refill time]; time.monotonic() is system-wide, so it is comparable across processes
+        self._state = context.Array('d', [self.capacity, time.monotonic()])
+        self._lock = self._state.get_lock()
+
+    def acquire(self, tokens=1.0):
+        if self.rate is None:
+            return 0.0
+
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                available = min(self.capacity, self._state[0] + (now - self._state[1]) * self.rate)
+                self._state[1] = now
+                if available >= tokens:
+                    self._state[0] = available - tokens
+                    return waited
+                self._state[0] = available
+                delay = (tokens - available) / self.rate
+            time.sleep(delay)
+            waited += delay
@@ -0,0 +1,254 @@
+import hashlib
+import json
+import logging
+import math
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from string import Template
+
+from fsutil import atomic_writer
+from metrics import get_metrics, log_event
+
+MANIFEST_FILENAME = ".render_manifest.json"
+
+# Render on a thread pool once the number of pages to write reaches this size
+PARALLEL_RENDER_THRESHOLD = 200
+DEFAULT_RENDER_WORKERS = 8
+
+logger = logging.getLogger(__name__)
+
+# Ticker page template, compiled once at import time
+PAGE_TEMPLATE = Template("""<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>${symbol} - Stock Info</title>
+    <style>
+        body {
+            font-family: Arial, sans-serif;
+            max-width: 800px;
+            margin: 0 auto;
+            padding: 20px;
+            line-height: 1.6;
+        }
+        h1 {
+            color: #0a66c2;
+            border-bottom: 2px solid #eee;
+            padding-bottom: 10px;
+        }
+        .stock-info {
+            display: grid;
+            grid-template-columns: repeat(auto-fill, minmax(300px, 1fr));
+            gap: 20px;
+            margin-top: 20px;
+        }
+        .info-card {
+            border: 1px solid #ddd;
+            border-radius: 8px;
+            padding: 15px;
+            background-color: #f9f9f9;
+        }
+        .price {
+            font-size: 24px;
+            font-weight: bold;
+            color: #333;
+        }
+        .indicator {
+            margin: 10px 0;
+        }
+        .indicator-name {
+            font-weight: bold;
+        }
+        .indicator-value {
+            float: right;
+        }
+        .footer {
+            margin-top: 30px;
+            font-size: 0.8em;
+            color: #666;
+            text-align: center;
+        }
+        a {
+            color: #0a66c2;
+            text-decoration: none;
+        }
+        a:hover {
+            text-decoration: underline;
+        }
+    </style>
+</head>
+<body>
+    <h1>${symbol}</h1>
+    <div class="stock-info">
+        <div class="info-card">
+            <div class="price">Price: $$${price}</div>
+            <div class="indicator">
+                <span class="indicator-name">RSI (Daily):</span>
+                <span class="indicator-value">${rsi}</span>
+            </div>
+            <div class="indicator">
+                <span class="indicator-name">Stochastic RSI (Daily):</span>
+                <span class="indicator-value">${stoch_rsi}</span>
+            </div>
+        </div>
+        <div class="info-card">
+            <div class="indicator">
+                <span class="indicator-name">RSI (Weekly):</span>
+                <span class="indicator-value">${weekly_rsi}</span>
+            </div>
+            <div class="indicator">
+                <span class="indicator-name">Stochastic RSI (Weekly):</span>
+                <span class="indicator-value">${weekly_stoch_rsi}</span>
+            </div>
+        </div>
+    </div>
+    <div class="footer">
+        <p>Last updated: ${updated}</p>
+        <p><a href="../index.html">Back to NASDAQ 100 List</a></p>
+    </div>
+</body>
+</html>""")
+
+# Changing the template invalidates every stored page hash
+TEMPLATE_HASH = hashlib.sha256(PAGE_TEMPLATE.template.encode()).hexdigest()
+
+
+def _format_value(value):
+    """Format an indicator value for display, "N/A" when missing."""
+    return f"{value:.2f}" if value is not None and not math.isnan(value) else "N/A"
+
+
+def page_fields(symbol, close_price, rsi, stoch_rsi, weekly_rsi, weekly_stoch_rsi):
+    """
+    Display values for a ticker page, excluding the "Last updated" stamp.
+
+    Args:
+        symbol (str): Ticker symbol
+        close_price (float): Latest close price
+        rsi (float): Daily RSI
+        stoch_rsi (float): Daily Stochastic RSI %K
+        weekly_rsi (float): Weekly RSI
+        weekly_stoch_rsi (float): Weekly Stochastic RSI %K
+
+    Returns:
+        dict: Template fields
+    """
+    return {
+        'symbol': symbol,
+        'price': f"{close_price:.2f}",
+        'rsi': _format_value(rsi),
+        'stoch_rsi': _format_value(stoch_rsi),
+        'weekly_rsi': _format_value(weekly_rsi),
+        'weekly_stoch_rsi': _format_value(weekly_stoch_rsi),
+    }
+
+
+def content_hash(fields):
+    """
+    Hash of a page's data fields and the template version.
+
+    Args:
+        fields (dict): Fields from `page_fields`
+
+    Returns:
+        str: Hex digest
+    """
+    payload = json.dumps(fields, sort_keys=True) + TEMPLATE_HASH
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def render_page(fields, updated=None):
+    """
+    Render a ticker page.
+
+    Args:
+        fields (dict): Fields from `page_fields`
+        updated (str): "Last updated" stamp (defaults to now)
+
+    Returns:
+        str: HTML document
+    """
+    if updated is None:
+        updated = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    return PAGE_TEMPLATE.substitute(fields, updated=updated)
+
+
+def _load_manifest(path):
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, "r") as f:
+            return json.load(f)
+    except Exception as e:
+        log_event(logger, logging.WARNING, "render_manifest_unreadable", path=path, error=e)
+        return {}
+
+
+def _write_page(directory, fields, updated):
+    """Render and atomically write one page; returns the symbol on success."""
+    symbol = fields['symbol']
+    metrics = get_metrics()
+    try:
+        with metrics.timer("render_page_seconds"), atomic_writer(os.path.join(directory, f"{symbol}.html")) as f:
+            f.write(render_page(fields, updated))
+        log_event(logger, logging.DEBUG, "page_written", symbol=symbol)
+        return symbol
+    except Exception as e:
+        log_event(logger, logging.WARNING, "page_write_failed", symbol=symbol, error=e)
+        metrics.inc("render_errors_total")
+        return None
+
+
+def render_pages(directory, pages, workers=DEFAULT_RENDER_WORKERS, parallel_threshold=PARALLEL_RENDER_THRESHOLD,
+                 manifest_name=MANIFEST_FILENAME):
+    """
+    Write the ticker pages whose data changed since the last render.
+
+    Each page's content hash is compared with the manifest stored in
+    `directory`; unchanged pages whose file still exists are left untouched.
+    Pages are written to a temporary file and renamed into place.
+
+    Args:
+        directory (str): Directory where ticker HTML files are saved
+        pages (list): Fields from `page_fields`, one per ticker
+        workers (int): Threads used when rendering in parallel
+        parallel_threshold (int): Minimum number of changed pages to render in parallel
+        manifest_name (str): Manifest file name; shards writing into one directory each keep their own
+
+    Returns:
+        int: Number of pages written
+    """
+    manifest_path = os.path.join(directory, manifest_name)
+    manifest = _load_manifest(manifest_path)
+
+    changed = []
+    for fields in pages:
+        digest = content_hash(fields)
+        symbol = fields['symbol']
+        if manifest.get(symbol) == digest and os.path.exists(os.path.join(directory, f"{symbol}.html")):
+            continue
+        changed.append((fields, digest))
+
+    updated = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    if len(changed) >= parallel_threshold and workers > 1:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            written = list(executor.map(lambda item: _write_page(directory, item[0], updated), changed))
+    else:
+        written = [_write_page(directory, fields, updated) for fields, _ in changed]
+
+    for (fields, digest), symbol in zip(changed, written):
+        if symbol is not None:
+            manifest[symbol] = digest
+
+    if changed:
+        with atomic_writer(manifest_path) as f:
+            json.dump(manifest, f, indent=2, sort_keys=True)
+
+    count = sum(symbol is not None for symbol in written)
+    metrics = get_metrics()
+    metrics.inc("pages_written_total", count)
+    metrics.inc("pages_unchanged_total", len(pages) - len(changed))
+    log_event(logger, logging.DEBUG, "pages_rendered", written=count, unchanged=len(pages) - len(changed))
+    return count
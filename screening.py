@@ -0,0 +1,253 @@
+import json
+import logging
+import os
+
+import numpy as np
+
+from fsutil import atomic_writer
+from metrics import get_metrics, log_event
+from snapshot import STATUS_OK
+
+# Screen definitions shipped next to the code; edit to change or add screens
+SCREENS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "screens.json")
+
+# The original buy screen: weekly RSI and weekly Stochastic RSI both oversold
+DEFAULT_SCREEN = "recommended_buys"
+WEEKLY_RSI_THRESHOLD = 20.0
+WEEKLY_STOCH_RSI_THRESHOLD = 10.0
+
+# Numeric columns of the indicator table, as named in the snapshot
+FIELDS = ('price', 'rsi', 'stoch_rsi', 'weekly_rsi', 'weekly_stoch_rsi')
+
+logger = logging.getLogger(__name__)
+
+COMPARISONS = {
+    '<': np.less,
+    '<=': np.less_equal,
+    '>': np.greater,
+    '>=': np.greater_equal,
+    '==': np.equal,
+    '!=': np.not_equal,
+}
+
+
+class IndicatorTable:
+    """
+    Columnar view of a snapshot: one float64 array per indicator (NaN when
+    missing) plus a mask of the symbols whose fetch succeeded. Columns are
+    built on first use, so only the fields some screen references are converted.
+    """
+
+    def __init__(self, entries):
+        """
+        Args:
+            entries (list): Snapshot entries, in ticker order
+        """
+        self.entries = entries
+        self.symbols = [entry['symbol'] for entry in entries]
+        self.ok = np.array([entry['status'] == STATUS_OK for entry in entries], dtype=bool)
+        self._columns = {}
+
+    @classmethod
+    def from_snapshot(cls, snapshot):
+        """Build the table from a snapshot dict."""
+        return cls(snapshot['tickers'])
+
+    def column(self, field):
+        """float64 array of `field` over all rows, NaN where the value is missing."""
+        values = self._columns.get(field)
+        if values is None:
+            # NumPy converts None to NaN for float arrays
+            values = np.array([entry[field] for entry in self.entries], dtype='float64')
+            self._columns[field] = values
+        return values
+
+    def __len__(self):
+        return len(self.entries)
+
+    def records(self, mask, fields):
+        """
+        Snapshot values of the selected rows.
+
+        Args:
+            mask (np.ndarray): Boolean row selection
+            fields (list): Keys to copy from each entry
+
+        Returns:
+            list: One dictionary per selected row, in ticker order
+        """
+        return [{field: self.entries[i][field] for field in fields} for i in np.flatnonzero(mask)]
+
+
+def _operand(value, where):
+    """Compile a comparison operand: a number or {"field": name}."""
+    if isinstance(value, dict):
+        field = value.get('field')
+        if field not in FIELDS:
+            raise ValueError(f"{where}: unknown field {field!r} (expected one of {', '.join(FIELDS)})")
+        return (lambda table: table.column(field)), [field]
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return (lambda table: value), []
+    raise ValueError(f"{where}: expected a number or {{\"field\": ...}}, got {value!r}")
+
+
+def _defined(table, fields):
+    """Boolean mask of the rows where every one of `fields` has a value."""
+    mask = np.ones(len(table), dtype=bool)
+    for field in dict.fromkeys(fields):
+        mask &= ~np.isnan(table.column(field))
+    return mask
+
+
+def compile_rule(node, where="rule"):
+    """
+    Compile a declarative rule into a function returning a boolean mask.
+
+    A rule is either a comparison, e.g. `{"field": "weekly_rsi", "op": "<", "value": 20}`
+    (ops: <, <=, >, >=, ==, !=, or "between" with a [low, high] inclusive value;
+    the value may also be another field, `{"field": "rsi"}`), or a combination:
+    `{"all": [rules]}`, `{"any": [rules]}`, `{"not": rule}`. Comparisons
+    involving a missing value are false, and so is the negation of any rule
+    that references one.
+
+    Args:
+        node (dict): Rule definition
+        where (str): Location used in error messages
+
+    Returns:
+        tuple: (function of IndicatorTable returning a boolean array, list of referenced fields)
+
+    Raises:
+        ValueError: If the rule is malformed
+    """
+    if not isinstance(node, dict):
+        raise ValueError(f"{where}: expected an object, got {node!r}")
+
+    for combinator, reduce in (('all', np.logical_and), ('any', np.logical_or)):
+        if combinator in node:
+            parts = node[combinator]
+            if not isinstance(parts, list) or not parts:
+                raise ValueError(f"{where}.{combinator}: expected a non-empty list of rules")
+            compiled = [compile_rule(part, f"{where}.{combinator}[{i}]") for i, part in enumerate(parts)]
+            fields = [field for _, part_fields in compiled for field in part_fields]
+            return (lambda table: reduce.reduce([func(table) for func, _ in compiled])), fields
+
+    if 'not' in node:
+        func, fields = compile_rule(node['not'], f"{where}.not")
+        return (lambda table: ~func(table) & _defined(table, fields)), fields
+
+    field = node.get('field')
+    if field not in FIELDS:
+        raise ValueError(f"{where}: unknown field {field!r} (expected one of {', '.join(FIELDS)})")
+    op = node.get('op')
+    if op == 'between':
+        bounds = node.get('value')
+        if not isinstance(bounds, list) or len(bounds) != 2:
+            raise ValueError(f"{where}: 'between' expects a [low, high] value")
+        low, low_fields = _operand(bounds[0], where)
+        high, high_fields = _operand(bounds[1], where)
+        return (lambda table: (table.column(field) >= low(table)) & (table.column(field) <= high(table))), \
+            [field] + low_fields + high_fields
+    if op not in COMPARISONS:
+        raise ValueError(f"{where}: unknown op {op!r} (expected one of {', '.join(COMPARISONS)}, between)")
+    compare = COMPARISONS[op]
+    value, value_fields = _operand(node.get('value'), where)
+    if op == '!=':
+        # NaN != x is true in IEEE arithmetic
+        return (lambda table: compare(table.column(field), value(table)) & _defined(table, [field] + value_fields)), \
+            [field] + value_fields
+    return (lambda table: compare(table.column(field), value(table))), [field] + value_fields
+
+
+class Screen:
+    """A named rule whose matches are written to their own output file."""
+
+    def __init__(self, name, rule, output=None, fields=None):
+        """
+        Args:
+            name (str): Screen name
+            rule (dict): Declarative rule (see `compile_rule`)
+            output (str): Output file name (defaults to `<name>.json`)
+            fields (list): Values written per match (defaults to symbol, price and the fields the rule uses)
+        """
+        self.name = name
+        self.rule = rule
+        self.output = output or f"{name}.json"
+        self._mask, referenced = compile_rule(rule, f"screen {name!r}")
+        if fields is None:
+            fields = ['symbol', 'price'] + [field for field in dict.fromkeys(referenced) if field != 'price']
+        self.fields = fields
+
+    def mask(self, table):
+        """Boolean mask of the rows that pass the screen (failed fetches never do)."""
+        return table.ok & self._mask(table)
+
+    def run(self, table):
+        """
+        Returns:
+            list: Matching rows in ticker order, as dictionaries of `fields`
+        """
+        return table.records(self.mask(table), self.fields)
+
+
+def default_screens():
+    """The built-in screen list: the original weekly RSI / Stochastic RSI buy screen."""
+    return [Screen(DEFAULT_SCREEN, {'all': [
+        {'field': 'weekly_rsi', 'op': '<', 'value': WEEKLY_RSI_THRESHOLD},
+        {'field': 'weekly_stoch_rsi', 'op': '<', 'value': WEEKLY_STOCH_RSI_THRESHOLD},
+    ]}, output="recommended_buys.json")]
+
+
+def load_screens(path=SCREENS_PATH):
+    """
+    Load screen definitions from a JSON config.
+
+    The file holds `{"screens": [{"name": ..., "rule": ..., "output": ..., "fields": ...}]}`.
+
+    Args:
+        path (str): Config file (the built-in default screen is used when it does not exist)
+
+    Returns:
+        list: Screen objects
+
+    Raises:
+        ValueError: If a screen definition is invalid
+    """
+    if not path or not os.path.exists(path):
+        return default_screens()
+    with open(path, "r") as f:
+        config = json.load(f)
+    return [Screen(screen['name'], screen['rule'], screen.get('output'), screen.get('fields'))
+            for screen in config['screens']]
+
+
+def run_screens(snapshot, screens=None, output_dir=None):
+    """
+    Evaluate every screen over one columnar table built from the snapshot.
+
+    Args:
+        snapshot (dict): Snapshot from `load_snapshot` / `write_snapshot`
+        screens (list): Screen objects (defaults to `load_screens()`)
+        output_dir (str): When set, each screen's matches are written (atomically) to its output file here
+
+    Returns:
+        dict: Screen name to its list of matches
+    """
+    if screens is None:
+        screens = load_screens()
+    metrics = get_metrics()
+    with metrics.timer("stage_seconds", stage="screening"):
+        table = IndicatorTable.from_snapshot(snapshot)
+        results = {screen.name: screen.run(table) for screen in screens}
+
+    for screen in screens:
+        matches = results[screen.name]
+        metrics.set_gauge("screen_matches", len(matches), screen=screen.name)
+        log_event(logger, logging.INFO, "screen_evaluated", screen=screen.name, matches=len(matches),
+                  tickers=len(table))
+        for match in matches:
+            log_event(logger, logging.DEBUG, "screen_match", screen=screen.name, **match)
+        if output_dir is not None:
+            with atomic_writer(os.path.join(output_dir, screen.output)) as f:
+                json.dump(results[screen.name], f, indent=2)
+    return results
@@ -0,0 +1,93 @@
+import os
+import zlib
+
+from screening import DEFAULT_SCREEN, run_screens
+from snapshot import SNAPSHOT_FILENAME, load_snapshot, write_snapshot
+from static_site import OUTPUT_PAGES, SITE_OUTPUT_MODES, write_site
+
+
+def shard_of(symbol, shard_count):
+    """
+    Shard a symbol belongs to.
+
+    Assignment hashes the symbol rather than its position in the tickers
+    file, so a symbol stays on the same shard (and keeps that shard's
+    indicator state and render manifest) when the universe changes.
+
+    Args:
+        symbol (str): Ticker symbol
+        shard_count (int): Total number of shards
+
+    Returns:
+        int: Shard index in [0, shard_count)
+    """
+    return zlib.crc32(symbol.encode()) % shard_count
+
+
+def shard_tickers(tickers, shard_index, shard_count):
+    """
+    Select one shard's tickers, keeping their original order.
+
+    Args:
+        tickers (list): Full ticker universe
+        shard_index (int): Shard to select, 0-based
+        shard_count (int): Total number of shards
+
+    Returns:
+        list: Tickers assigned to the shard
+    """
+    if not 0 <= shard_index < shard_count:
+        raise ValueError(f"Shard index {shard_index} out of range for {shard_count} shards")
+    return [symbol for symbol in tickers if shard_of(symbol, shard_count) == shard_index]
+
+
+def shard_suffix(shard_index, shard_count):
+    """Name fragment identifying a shard's files, e.g. "shard-1-of-4" (1-based)."""
+    return f"shard-{shard_index + 1}-of-{shard_count}"
+
+
+def shard_snapshot_path(output_dir, shard_index, shard_count):
+    """Path of a shard's partial snapshot, e.g. `snapshot.shard-1-of-4.json`."""
+    name, ext = os.path.splitext(SNAPSHOT_FILENAME)
+    return os.path.join(output_dir, f"{name}.{shard_suffix(shard_index, shard_count)}{ext}")
+
+
+def merge_shards(output_dir, shard_count, tickers=None, screens=None, output_mode=OUTPUT_PAGES):
+    """
+    Merge every shard's partial snapshot into `snapshot.json` and run the screens over it.
+
+    The result does not depend on which shard finished first: entries are
+    ordered as in `tickers` (by symbol when no order is given) and
+    `generated_at` is the newest shard's timestamp.
+
+    Args:
+        output_dir (str): Directory holding the shard snapshots (the parent of the ticker pages)
+        shard_count (int): Total number of shards
+        tickers (list): Universe in tickers file order
+        screens (list): Screen objects (defaults to the screens config); each writes its output file
+        output_mode (str): Also write the single-page site when this is "site" or "both"
+
+    Returns:
+        list: Recommended buys (default screen matches) of the merged run
+
+    Raises:
+        FileNotFoundError: If a shard's snapshot is missing
+    """
+    entries = []
+    generated_at = 0
+    for shard_index in range(shard_count):
+        shard = load_snapshot(shard_snapshot_path(output_dir, shard_index, shard_count))
+        entries.extend(shard['tickers'])
+        generated_at = max(generated_at, shard['generated_at'])
+
+    if tickers is not None:
+        position = {symbol: i for i, symbol in enumerate(tickers)}
+        entries.sort(key=lambda entry: (position.get(entry['symbol'], len(position)), entry['symbol']))
+    else:
+        entries.sort(key=lambda entry: entry['symbol'])
+
+    snapshot = write_snapshot(os.path.join(output_dir, SNAPSHOT_FILENAME), entries, generated_at)
+    results = run_screens(snapshot, screens, output_dir)
+    if output_mode in SITE_OUTPUT_MODES:
+        write_site(output_dir, snapshot, results)
+    return results.get(DEFAULT_SCREEN, [])
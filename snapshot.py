@@ -0,0 +1,107 @@
+import json
+import math
+import time
+
+from fsutil import atomic_writer
+
+SNAPSHOT_FILENAME = "snapshot.json"
+
+# Fetch status recorded per symbol
+STATUS_OK = "ok"
+STATUS_NO_DATA = "no_data"
+STATUS_ERROR = "error"
+
+
+def _number(value):
+    """Convert NaN/None to None so the snapshot stays valid JSON."""
+    if value is None:
+        return None
+    value = float(value)
+    return None if math.isnan(value) else value
+
+
+def snapshot_entry(symbol, status, price=None, rsi=None, stoch_rsi=None, weekly_rsi=None,
+                   weekly_stoch_rsi=None, timestamp=None):
+    """
+    Build the snapshot record for one symbol.
+
+    Args:
+        symbol (str): Ticker symbol
+        status (str): Fetch status (STATUS_OK, STATUS_NO_DATA or STATUS_ERROR)
+        price (float): Latest close price
+        rsi (float): Daily RSI
+        stoch_rsi (float): Daily Stochastic RSI %K
+        weekly_rsi (float): Weekly RSI
+        weekly_stoch_rsi (float): Weekly Stochastic RSI %K
+        timestamp (int): Unix seconds of the latest bar
+
+    Returns:
+        dict: Snapshot entry
+    """
+    return {
+        'symbol': symbol,
+        'status': status,
+        'price': _number(price),
+        'rsi': _number(rsi),
+        'stoch_rsi': _number(stoch_rsi),
+        'weekly_rsi': _number(weekly_rsi),
+        'weekly_stoch_rsi': _number(weekly_stoch_rsi),
+        'timestamp': timestamp,
+    }
+
+
+def write_snapshot(path, entries, generated_at=None):
+    """
+    Write one run's results as a single compact JSON file, atomically.
+
+    Args:
+        path (str): Destination file
+        entries (list): Entries from `snapshot_entry`, in ticker order
+        generated_at (int): Unix seconds of the run (defaults to now)
+
+    Returns:
+        dict: The snapshot that was written
+    """
+    snapshot = {
+        'generated_at': int(time.time()) if generated_at is None else generated_at,
+        'tickers': entries,
+    }
+    with atomic_writer(path) as f:
+        json.dump(snapshot, f, separators=(',', ':'))
+    return snapshot
+
+
+def load_snapshot(path):
+    """
+    Load a snapshot written by `write_snapshot`.
+
+    Args:
+        path (str): Snapshot file
+
+    Returns:
+        dict: Snapshot with `generated_at` and `tickers`
+    """
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def tickers_from_snapshot(snapshot):
+    """
+    Derive the tickers.json records from a snapshot.
+
+    Args:
+        snapshot (dict): Snapshot from `load_snapshot`
+
+    Returns:
+        list: {"symbol", "price"} dictionaries sorted by symbol, price formatted or "N/A"
+    """
+    tickers = []
+    for entry in snapshot['tickers']:
+        price = entry.get('price')
+        tickers.append({
+            "symbol": entry['symbol'],
+            "price": f"{price:.2f}" if entry.get('status') == STATUS_OK and price is not None else "N/A",
+        })
+    tickers.sort(key=lambda x: x["symbol"])
+    return tickers
+
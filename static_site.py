@@ -0,0 +1,362 @@
+import gzip
+import hashlib
+import json
+import logging
+import os
+from string import Template
+
+from fsutil import atomic_writer
+from metrics import get_metrics, log_event
+from snapshot import STATUS_OK
+
+# Output modes of the update: one HTML file per ticker, the single-page site, both, or neither
+# (only the snapshot and screen outputs, e.g. for the daemon, which serves everything from memory)
+OUTPUT_PAGES = "pages"
+OUTPUT_SITE = "site"
+OUTPUT_BOTH = "both"
+OUTPUT_NONE = "none"
+OUTPUT_MODES = (OUTPUT_PAGES, OUTPUT_SITE, OUTPUT_BOTH, OUTPUT_NONE)
+PAGE_OUTPUT_MODES = (OUTPUT_PAGES, OUTPUT_BOTH)
+SITE_OUTPUT_MODES = (OUTPUT_SITE, OUTPUT_BOTH)
+
+# Layout under the display directory: site/index.html, site/data.json(.gz), site/assets/site.<hash>.css|js
+SITE_DIRNAME = "site"
+DATA_FILENAME = "data.json"
+ASSETS_DIRNAME = "assets"
+
+# Values per ticker row of the data file, in order
+DATA_FIELDS = ['symbol', 'price', 'rsi', 'stoch_rsi', 'weekly_rsi', 'weekly_stoch_rsi']
+
+logger = logging.getLogger(__name__)
+
+STYLESHEET = """body {
+    font-family: Arial, sans-serif;
+    max-width: 960px;
+    margin: 0 auto;
+    padding: 20px;
+    line-height: 1.6;
+}
+h1 {
+    color: #0a66c2;
+    border-bottom: 2px solid #eee;
+    padding-bottom: 10px;
+}
+.stock-info {
+    display: grid;
+    grid-template-columns: repeat(auto-fill, minmax(300px, 1fr));
+    gap: 20px;
+    margin-top: 20px;
+}
+.info-card {
+    border: 1px solid #ddd;
+    border-radius: 8px;
+    padding: 15px;
+    background-color: #f9f9f9;
+}
+.price {
+    font-size: 24px;
+    font-weight: bold;
+    color: #333;
+}
+.indicator {
+    margin: 10px 0;
+}
+.indicator-name {
+    font-weight: bold;
+}
+.indicator-value {
+    float: right;
+}
+table {
+    width: 100%;
+    border-collapse: collapse;
+}
+th, td {
+    padding: 6px 10px;
+    border-bottom: 1px solid #eee;
+    text-align: right;
+}
+th:first-child, td:first-child {
+    text-align: left;
+}
+th {
+    cursor: pointer;
+    user-select: none;
+}
+tr.match {
+    background-color: #e8f5e9;
+}
+#filter {
+    padding: 6px;
+    margin-bottom: 10px;
+    width: 200px;
+}
+.footer {
+    margin-top: 30px;
+    font-size: 0.8em;
+    color: #666;
+    text-align: center;
+}
+a {
+    color: #0a66c2;
+    text-decoration: none;
+}
+a:hover {
+    text-decoration: underline;
+}
+"""
+
+SCRIPT = """(function () {
+    "use strict";
+    var LABELS = {price: "Price", rsi: "RSI (Daily)", stoch_rsi: "Stochastic RSI (Daily)",
+                  weekly_rsi: "RSI (Weekly)", weekly_stoch_rsi: "Stochastic RSI (Weekly)"};
+    var data = null, rows = [], sortKey = "symbol", sortAscending = true;
+    var app = document.getElementById("app");
+
+    function fmt(value) {
+        return value === null ? "N/A" : value.toFixed(2);
+    }
+
+    function el(tag, attributes, text) {
+        var node = document.createElement(tag);
+        Object.keys(attributes || {}).forEach(function (name) { node.setAttribute(name, attributes[name]); });
+        if (text !== undefined) node.textContent = text;
+        return node;
+    }
+
+    function footer() {
+        var node = el("div", {"class": "footer"});
+        node.appendChild(el("p", {}, "Last updated: " + new Date(data.generated_at * 1000).toLocaleString()));
+        return node;
+    }
+
+    function indicator(card, label, value) {
+        var line = el("div", {"class": "indicator"});
+        line.appendChild(el("span", {"class": "indicator-name"}, label + ":"));
+        line.appendChild(el("span", {"class": "indicator-value"}, fmt(value)));
+        card.appendChild(line);
+    }
+
+    function renderDetail(row) {
+        app.replaceChildren(el("h1", {}, row.symbol));
+        var info = el("div", {"class": "stock-info"});
+        var daily = el("div", {"class": "info-card"}), weekly = el("div", {"class": "info-card"});
+        daily.appendChild(el("div", {"class": "price"}, "Price: $" + fmt(row.price)));
+        indicator(daily, LABELS.rsi, row.rsi);
+        indicator(daily, LABELS.stoch_rsi, row.stoch_rsi);
+        indicator(weekly, LABELS.weekly_rsi, row.weekly_rsi);
+        indicator(weekly, LABELS.weekly_stoch_rsi, row.weekly_stoch_rsi);
+        info.appendChild(daily);
+        info.appendChild(weekly);
+        app.appendChild(info);
+        var back = footer();
+        var link = el("p");
+        link.appendChild(el("a", {href: "#"}, "Back to NASDAQ 100 List"));
+        back.appendChild(link);
+        app.appendChild(back);
+    }
+
+    function renderList() {
+        var filter = document.getElementById("filter");
+        var query = filter ? filter.value.trim().toUpperCase() : "";
+        var matches = {};
+        Object.keys(data.screens).forEach(function (name) {
+            data.screens[name].forEach(function (symbol) { matches[symbol] = true; });
+        });
+        var sorted = rows.filter(function (row) { return row.symbol.indexOf(query) !== -1; });
+        sorted.sort(function (a, b) {
+            var x = a[sortKey], y = b[sortKey];
+            if (x === y) return 0;
+            if (x === null) return 1;
+            if (y === null) return -1;
+            return (x < y ? -1 : 1) * (sortAscending ? 1 : -1);
+        });
+
+        var table = el("table"), head = el("tr");
+        data.fields.forEach(function (field) {
+            var th = el("th", {"data-key": field}, field === "symbol" ? "Symbol" : LABELS[field]);
+            th.addEventListener("click", function () {
+                sortAscending = sortKey === field ? !sortAscending : true;
+                sortKey = field;
+                renderList();
+            });
+            head.appendChild(th);
+        });
+        table.appendChild(head);
+        sorted.forEach(function (row) {
+            var tr = el("tr", matches[row.symbol] ? {"class": "match"} : {});
+            var cell = el("td");
+            cell.appendChild(el("a", {href: "#" + encodeURIComponent(row.symbol)}, row.symbol));
+            tr.appendChild(cell);
+            data.fields.slice(1).forEach(function (field) { tr.appendChild(el("td", {}, fmt(row[field]))); });
+            table.appendChild(tr);
+        });
+
+        if (!filter) {
+            app.replaceChildren(el("h1", {}, "NASDAQ 100"));
+            filter = el("input", {id: "filter", placeholder: "Filter symbols"});
+            filter.addEventListener("input", renderList);
+            app.appendChild(filter);
+            app.appendChild(el("div", {id: "list"}));
+            app.appendChild(footer());
+        }
+        document.getElementById("list").replaceChildren(table);
+    }
+
+    function route() {
+        var symbol = decodeURIComponent(location.hash.slice(1));
+        var row = rows.find(function (candidate) { return candidate.symbol === symbol; });
+        if (row) {
+            renderDetail(row);
+        } else {
+            app.replaceChildren();
+            renderList();
+        }
+    }
+
+    fetch(app.getAttribute("data-src"), {cache: "no-cache"})
+        .then(function (response) { return response.json(); })
+        .then(function (loaded) {
+            data = loaded;
+            rows = data.rows.map(function (values) {
+                var row = {};
+                data.fields.forEach(function (field, i) { row[field] = values[i]; });
+                return row;
+            });
+            window.addEventListener("hashchange", route);
+            route();
+        })
+        .catch(function (error) { app.textContent = "Could not load data: " + error; });
+})();
+"""
+
+# The viewer page; it is tiny and not hashed, so it is always revalidated and picks up new asset names
+INDEX_TEMPLATE = Template("""<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>NASDAQ 100 - Stock Info</title>
+    <link rel="stylesheet" href="${stylesheet}">
+</head>
+<body>
+    <div id="app" data-src="${data}"></div>
+    <script src="${script}"></script>
+</body>
+</html>
+""")
+
+
+def asset_name(stem, ext, content):
+    """Content-hashed file name, e.g. `site.3f2a9c1e0b7d.css`; a new version gets a new name."""
+    return f"{stem}.{hashlib.sha256(content.encode()).hexdigest()[:12]}.{ext}"
+
+
+STYLESHEET_NAME = asset_name("site", "css", STYLESHEET)
+SCRIPT_NAME = asset_name("site", "js", SCRIPT)
+
+
+def index_html():
+    """The viewer page, referencing the current asset names."""
+    return INDEX_TEMPLATE.substitute(stylesheet=f"{ASSETS_DIRNAME}/{STYLESHEET_NAME}",
+                                     script=f"{ASSETS_DIRNAME}/{SCRIPT_NAME}", data=DATA_FILENAME)
+
+
+def _round(value):
+    return None if value is None else round(value, 2)
+
+
+def site_data(snapshot, screen_results=None):
+    """
+    Compact data file contents: one row of values per ticker, as shown on the pages.
+
+    Args:
+        snapshot (dict): Snapshot from `load_snapshot` / `write_snapshot`
+        screen_results (dict): Screen name to matches, from `run_screens`
+
+    Returns:
+        dict: `generated_at`, `fields`, `rows` and `screens` (screen name to matching symbols)
+    """
+    rows = [[entry['symbol']] + [_round(entry[field]) for field in DATA_FIELDS[1:]]
+            for entry in snapshot['tickers'] if entry['status'] == STATUS_OK and entry['price'] is not None]
+    screens = {name: [match['symbol'] for match in matches] for name, matches in (screen_results or {}).items()}
+    return {'generated_at': snapshot['generated_at'], 'fields': DATA_FIELDS, 'rows': rows, 'screens': screens}
+
+
+def encode_site_data(data):
+    """Serialize the data file without whitespace."""
+    return json.dumps(data, separators=(',', ':')).encode()
+
+
+def _write_if_changed(path, body):
+    """Write `body` unless the file already holds it; returns the bytes written."""
+    if os.path.exists(path):
+        with open(path, "rb") as f:
+            if f.read() == body:
+                return 0
+    with atomic_writer(path, "wb") as f:
+        f.write(body)
+    return len(body)
+
+
+def write_assets(site_dir):
+    """
+    Write the stylesheet, script and viewer page, and remove superseded asset versions.
+
+    Hashed assets never change once written, so each can be cached
+    indefinitely; only a new release writes new files.
+
+    Args:
+        site_dir (str): Site directory
+
+    Returns:
+        int: Bytes written
+    """
+    assets_dir = os.path.join(site_dir, ASSETS_DIRNAME)
+    os.makedirs(assets_dir, exist_ok=True)
+    written = 0
+    for name, content in ((STYLESHEET_NAME, STYLESHEET), (SCRIPT_NAME, SCRIPT)):
+        path = os.path.join(assets_dir, name)
+        if not os.path.exists(path):
+            with atomic_writer(path) as f:
+                f.write(content)
+            written += len(content.encode())
+    for name in os.listdir(assets_dir):
+        if name.startswith("site.") and name not in (STYLESHEET_NAME, SCRIPT_NAME):
+            os.remove(os.path.join(assets_dir, name))
+    return written + _write_if_changed(os.path.join(site_dir, "index.html"), index_html().encode())
+
+
+def write_site(output_dir, snapshot, screen_results=None, precompress=True):
+    """
+    Write the single-page site for a snapshot under `output_dir/site`.
+
+    A refresh rewrites only `data.json` (and its gzip copy for servers that
+    serve precompressed files); the assets and viewer page are written once.
+
+    Args:
+        output_dir (str): Display directory (the parent of the ticker pages)
+        snapshot (dict): Snapshot from `load_snapshot` / `write_snapshot`
+        screen_results (dict): Screen name to matches, from `run_screens`, highlighted in the list
+        precompress (bool): Also write `data.json.gz`
+
+    Returns:
+        int: Bytes written
+    """
+    site_dir = os.path.join(output_dir, SITE_DIRNAME)
+    written = write_assets(site_dir)
+    body = encode_site_data(site_data(snapshot, screen_results))
+    data_path = os.path.join(site_dir, DATA_FILENAME)
+    with atomic_writer(data_path, "wb") as f:
+        f.write(body)
+    written += len(body)
+    if precompress:
+        compressed = gzip.compress(body, compresslevel=9, mtime=0)
+        with atomic_writer(data_path + ".gz", "wb") as f:
+            f.write(compressed)
+        written += len(compressed)
+
+    get_metrics().inc("site_bytes_written_total", written)
+    log_event(logger, logging.INFO, "site_written", path=site_dir, tickers=len(snapshot['tickers']),
+              data_bytes=len(body), bytes_written=written)
+    return written
@@ -0,0 +1,399 @@
+import argparse
+import calendar
+import hashlib
+import json
+import math
+import os
+import random
+import threading
+import time
+import zlib
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from data_plan import week_start
+
+# Captures written by `benchmark_pipeline.py --record`; see benchmark_fixtures/README.md
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmark_fixtures")
+
+# Constituents of the synthetic SlickCharts page when nothing has been recorded
+NASDAQ100_TICKERS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "nasdaq100_tickers.txt")
+
+# Last trading day served by the synthetic generator, so runs are reproducible
+DEFAULT_AS_OF = "2025-10-10"
+
+RANGE_DAYS = {
+    '1d': 1, '5d': 5, '1mo': 31, '60d': 60, '3mo': 92, '6mo': 183,
+    '1y': 366, '2y': 731, '5y': 1827, '10y': 3653,
+}
+
+DAY = 86400
+# Daily Yahoo bars are stamped at the US market open (13:30 UTC)
+MARKET_OPEN_OFFSET = 13 * 3600 + 1800
+
+
+def synthetic_symbols(count):
+    """
+    Deterministic symbol names for a synthetic universe.
+
+    Args:
+        count (int): Number of symbols
+
+    Returns:
+        list: Symbols such as "SYN0000", "SYN0001", ...
+    """
+    return [f"SYN{i:04d}" for i in range(count)]
+
+
+def synthetic_bars(symbol, end_timestamp, days=RANGE_DAYS['2y']):
+    """
+    Generate a deterministic daily random walk for a symbol.
+
+    Args:
+        symbol (str): Ticker symbol (seeds the generator)
+        end_timestamp (int): Unix seconds of the last trading day (midnight UTC)
+        days (int): Calendar days of history
+
+    Returns:
+        tuple: (timestamps, quote) where quote maps open/high/low/close/volume to lists
+    """
+    rng = random.Random(zlib.crc32(symbol.encode()))
+    price = rng.uniform(20, 500)
+    timestamps = []
+    closes = []
+    day = end_timestamp - days * DAY
+    while day <= end_timestamp:
+        if time.gmtime(day).tm_wday < 5:
+            price *= math.exp(rng.gauss(0.0003, 0.02))
+            timestamps.append(day + MARKET_OPEN_OFFSET)
+            closes.append(round(price, 4))
+        day += DAY
+    quote = {
+        'open': [round(c * (1 + rng.uniform(-0.01, 0.01)), 4) for c in closes],
+        'high': [round(c * (1 + rng.uniform(0, 0.02)), 4) for c in closes],
+        'low': [round(c * (1 - rng.uniform(0, 0.02)), 4) for c in closes],
+        'close': closes,
+        'volume': [rng.randint(100000, 50000000) for _ in closes],
+    }
+    return timestamps, quote
+
+
+def weekly_bars(timestamps, quote):
+    """
+    Aggregate daily bars into Yahoo `interval=1wk` bars: Monday-to-Friday weeks
+    stamped with the Monday, closing at the week's last close.
+
+    Args:
+        timestamps (list): Daily bar timestamps in unix seconds, ascending
+        quote (dict): open/high/low/close/volume lists aligned with `timestamps`
+
+    Returns:
+        tuple: (timestamps, quote) of the weekly bars
+    """
+    weeks = {}
+    for i, ts in enumerate(timestamps):
+        if quote['close'][i] is None:
+            continue
+        monday = week_start(ts) + MARKET_OPEN_OFFSET
+        weeks.setdefault(monday, []).append(i)
+    stamps = sorted(weeks)
+    weekly = {
+        'open': [quote['open'][weeks[monday][0]] for monday in stamps],
+        'high': [max(quote['high'][i] for i in weeks[monday]) for monday in stamps],
+        'low': [min(quote['low'][i] for i in weeks[monday]) for monday in stamps],
+        'close': [quote['close'][weeks[monday][-1]] for monday in stamps],
+        'volume': [sum(quote['volume'][i] for i in weeks[monday]) for monday in stamps],
+    }
+    return stamps, weekly
+
+
+def chart_response(symbol, timestamps, quote):
+    """Wrap bars in Yahoo's `v8/finance/chart` response shape."""
+    return {
+        'chart': {
+            'result': [{
+                'meta': {
+                    'currency': 'USD',
+                    'symbol': symbol,
+                    'exchangeTimezoneName': 'America/New_York',
+                    'regularMarketPrice': quote['close'][-1] if quote['close'] else None,
+                    'dataGranularity': '1d',
+                },
+                'timestamp': timestamps,
+                'indicators': {'quote': [quote]},
+            }],
+            'error': None,
+        }
+    }
+
+
+def slickcharts_page(symbols):
+    """
+    Render a page with the same table structure SlickCharts serves.
+
+    Args:
+        symbols (list): Constituent symbols
+
+    Returns:
+        str: HTML page
+    """
+    rows = []
+    for i, symbol in enumerate(symbols, start=1):
+        rows.append(
+            f'<tr><td>{i}</td><td><a href="/symbol/{symbol}">{symbol} Inc.</a></td>'
+            f'<td><a href="/symbol/{symbol}">{symbol}</a></td><td>{1.0 / len(symbols):.2%}</td>'
+            f'<td>100.00</td><td>0.00</td><td>(0.00%)</td></tr>'
+        )
+    return ('<html><head><title>Nasdaq 100 Companies by Weight</title></head><body>'
+            '<div class="table-responsive"><table class="table table-hover table-borderless table-sm">'
+            '<thead><tr><th>#</th><th>Company</th><th>Symbol</th><th>Portfolio%</th><th>Price</th>'
+            '<th>Chg</th><th>% Chg</th></tr></thead><tbody>' + ''.join(rows) +
+            '</tbody></table></div></body></html>')
+
+
+class StubMarketServer:
+    """
+    Local stand-in for SlickCharts and the Yahoo chart/spark endpoints.
+
+    Live captures recorded with `benchmark_pipeline.py --record` are replayed
+    when present in the fixtures directory: `chart_<SYMBOL>.json` (daily),
+    `chart_<SYMBOL>_1wk.json` (weekly), `spark.json` and
+    `slickcharts_nasdaq100.html`. Everything else is synthetic: deterministic
+    random-walk bars, weekly bars and spark quotes derived from them, and a
+    constituents page over `nasdaq100_tickers.txt`. Latency and error
+    injection (random, or scripted with `queue_error`) are configurable, and
+    every request is counted.
+    """
+
+    def __init__(self, symbols=None, fixtures_dir=FIXTURES_DIR, latency=0.0, error_rate=0.0,
+                 as_of=DEFAULT_AS_OF, history_days=RANGE_DAYS['2y'], seed=0, host='127.0.0.1', port=0):
+        """
+        Args:
+            symbols (list): Constituents served on the SlickCharts page (None for the recorded page,
+                or the NASDAQ 100 list when none was recorded)
+            fixtures_dir (str): Directory of recorded live captures
+            latency (float): Seconds added to every response
+            error_rate (float): Fraction of responses replaced by 429/503 errors
+            as_of (str): Last trading day (YYYY-MM-DD) for synthetic bars
+            history_days (int): Calendar days of synthetic history per symbol
+            seed (int): Seed for error injection
+            host (str): Interface to bind
+            port (int): Port to bind (0 picks a free port)
+        """
+        self.symbols = symbols
+        self.fixtures_dir = fixtures_dir
+        self.latency = latency
+        self.error_rate = error_rate
+        self.end_timestamp = calendar.timegm(time.strptime(as_of, "%Y-%m-%d"))
+        self.history_days = history_days
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._bars = {}
+        self._queued_errors = []
+        self.counters = {'requests': 0, 'errors_injected': 0, 'bytes_sent': 0}
+        # Last-Modified of the SlickCharts page, which never changes while the stub runs
+        self.started_at = formatdate(usegmt=True)
+        self.server = ThreadingHTTPServer((host, port), self._handler_class())
+        self.server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        """Serve requests on a background thread."""
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Shut the server down."""
+        self.server.shutdown()
+        self.server.server_close()
+
+    def snapshot_counters(self):
+        with self._lock:
+            return dict(self.counters)
+
+    def queue_error(self, status, retry_after=None, count=1):
+        """
+        Answer the next `count` requests with `status` (before any random error injection).
+
+        Args:
+            status (int): HTTP status, e.g. 429 or 503
+            retry_after (str): Retry-After header value to send, if any
+            count (int): Number of requests to fail
+        """
+        headers = {'Retry-After': retry_after} if retry_after is not None else {}
+        with self._lock:
+            self._queued_errors.extend([(status, headers)] * count)
+
+    def _count(self, name, amount=1):
+        with self._lock:
+            self.counters[name] += amount
+
+    def _recording(self, name):
+        """Decoded JSON capture `name` from the fixtures directory, or None if it was not recorded."""
+        path = os.path.join(self.fixtures_dir, name)
+        if not os.path.exists(path):
+            return None
+        with open(path, "r") as f:
+            return json.load(f)
+
+    def _symbol_bars(self, symbol):
+        with self._lock:
+            if symbol not in self._bars:
+                recorded = self._recording(f"chart_{symbol}.json")
+                if recorded is not None:
+                    result = recorded['chart']['result'][0]
+                    self._bars[symbol] = (result['timestamp'], result['indicators']['quote'][0])
+                else:
+                    self._bars[symbol] = synthetic_bars(symbol, self.end_timestamp, self.history_days)
+            return self._bars[symbol]
+
+    def chart(self, symbol, params):
+        """
+        Chart response for a symbol, honoring range= or period1=/period2= and interval=1d|1wk.
+
+        A recorded weekly capture is replayed as-is for any weekly request.
+        """
+        if params.get('interval') == '1wk':
+            recorded = self._recording(f"chart_{symbol}_1wk.json")
+            if recorded is not None:
+                return recorded
+        timestamps, quote = self._symbol_bars(symbol)
+        if 'period1' in params:
+            start = int(params['period1'])
+            end = int(params.get('period2', timestamps[-1] if timestamps else start))
+        else:
+            end = timestamps[-1] if timestamps else 0
+            start = end - RANGE_DAYS.get(params.get('range', '1y'), 366) * DAY
+        keep = [i for i, ts in enumerate(timestamps) if start <= ts <= end]
+        sliced = {key: [values[i] for i in keep] for key, values in quote.items()}
+        kept = [timestamps[i] for i in keep]
+        if params.get('interval') == '1wk':
+            kept, sliced = weekly_bars(kept, sliced)
+        return chart_response(symbol, kept, sliced)
+
+    def spark(self, symbols):
+        """Spark (batch quote) response for several symbols, replaying recorded spark results where present."""
+        recorded = self._recording("spark.json")
+        recorded = {item.get('symbol'): item for item in ((recorded or {}).get('spark') or {}).get('result') or []}
+        results = []
+        for symbol in symbols:
+            if symbol in recorded:
+                results.append(recorded[symbol])
+                continue
+            response = self.chart(symbol, {'range': '1d'})['chart']['result'][0]
+            response['indicators']['quote'] = [{'close': response['indicators']['quote'][0]['close']}]
+            results.append({'symbol': symbol, 'response': [response]})
+        return {'spark': {'result': results, 'error': None}}
+
+    def slickcharts(self):
+        path = os.path.join(self.fixtures_dir, "slickcharts_nasdaq100.html")
+        if self.symbols is None and os.path.exists(path):
+            with open(path, "r") as f:
+                return f.read()
+        symbols = self.symbols
+        if symbols is None:
+            with open(NASDAQ100_TICKERS_PATH, "r") as f:
+                symbols = [line.strip() for line in f if line.strip()]
+        return slickcharts_page(symbols)
+
+    def _handler_class(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, format, *args):
+                pass
+
+            def _send(self, status, body=b'', content_type='application/json', headers=None):
+                self.send_response(status)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(body)
+                stub._count('bytes_sent', len(body))
+
+            def do_GET(self):
+                stub._count('requests')
+                if stub.latency:
+                    time.sleep(stub.latency)
+
+                with stub._lock:
+                    queued = stub._queued_errors.pop(0) if stub._queued_errors else None
+                    inject = not queued and stub.error_rate and stub._random.random() < stub.error_rate
+                if queued:
+                    stub._count('errors_injected')
+                    self._send(queued[0], headers=queued[1])
+                    return
+                if inject:
+                    stub._count('errors_injected')
+                    if stub._random.random() < 0.5:
+                        self._send(429, headers={'Retry-After': '0'})
+                    else:
+                        self._send(503)
+                    return
+
+                url = urlsplit(self.path)
+                params = {key: values[0] for key, values in parse_qs(url.query).items()}
+                if url.path.startswith('/v8/finance/chart/'):
+                    body = stub.chart(url.path.rsplit('/', 1)[-1], params)
+                elif url.path.startswith('/v7/finance/spark'):
+                    body = stub.spark([s for s in params.get('symbols', '').split(',') if s])
+                elif url.path.startswith('/nasdaq100'):
+                    page = stub.slickcharts().encode()
+                    validators = {'ETag': '"%s"' % hashlib.sha256(page).hexdigest()[:16],
+                                  'Last-Modified': stub.started_at}
+                    if self.headers.get('If-None-Match') == validators['ETag']:
+                        self._send(304, headers=validators)
+                    else:
+                        self._send(200, page, 'text/html; charset=utf-8', validators)
+                    return
+                else:
+                    self._send(404)
+                    return
+                self._send(200, json.dumps(body).encode())
+
+        return Handler
+
+
+def point_pipeline_at(base_url):
+    """
+    Redirect the pipeline modules' SlickCharts and Yahoo URLs to a stub server.
+
+    Args:
+        base_url (str): Stub server base URL, e.g. "http://127.0.0.1:8000"
+    """
+    import constituents
+    import data_plan
+    import nasdaq_tickers
+
+    data_plan.YAHOO_CHART_URL = f"{base_url}/v8/finance/chart"
+    nasdaq_tickers.YAHOO_CHART_URL = data_plan.YAHOO_CHART_URL
+    nasdaq_tickers.YAHOO_SPARK_URL = f"{base_url}/v7/finance/spark"
+    constituents.SLICKCHARTS_URL = f"{base_url}/nasdaq100"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve SlickCharts/Yahoo stand-in responses locally")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--symbols", type=int, default=0, help="Synthetic universe size (0 serves the NASDAQ 100)")
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    server = StubMarketServer(synthetic_symbols(args.symbols) if args.symbols else None,
+                              latency=args.latency, error_rate=args.error_rate, port=args.port)
+    print(f"Stub market-data server listening on {server.base_url}")
+    try:
+        server.server.serve_forever()
+    except KeyboardInterrupt:
+        server.stop()
@@ -0,0 +1,32 @@
+import os
+import sys
+
+import pytest
+
+# The modules live at the repository root and import each other by name
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import constituents  # noqa: E402
+import data_plan  # noqa: E402
+import nasdaq_tickers  # noqa: E402
+from metrics import get_metrics  # noqa: E402
+from stub_server import StubMarketServer  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def fresh_metrics():
+    """Every test starts from an empty process-wide metrics registry."""
+    get_metrics().reset()
+    yield
+
+
+@pytest.fixture
+def stub(monkeypatch):
+    """A started stub market-data server with the pipeline's URLs pointed at it."""
+    server = StubMarketServer().start()
+    monkeypatch.setattr(data_plan, "YAHOO_CHART_URL", f"{server.base_url}/v8/finance/chart")
+    monkeypatch.setattr(nasdaq_tickers, "YAHOO_CHART_URL", f"{server.base_url}/v8/finance/chart")
+    monkeypatch.setattr(nasdaq_tickers, "YAHOO_SPARK_URL", f"{server.base_url}/v7/finance/spark")
+    monkeypatch.setattr(constituents, "SLICKCHARTS_URL", f"{server.base_url}/nasdaq100")
+    yield server
+    server.stop()
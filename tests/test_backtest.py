@@ -0,0 +1,106 @@
+import calendar
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from backtest import DAY, PriceHistory, forward_returns, run_backtest, sweep, symbol_indicators, synthetic_history
+from data_plan import resample_weekly
+from indicators import rsi, stoch_rsi_k
+
+
+def day(date):
+    return calendar.timegm(time.strptime(date, "%Y-%m-%d"))
+
+
+def walk(length, seed):
+    rng = np.random.default_rng(seed)
+    return 100 * np.exp(np.cumsum(rng.normal(0, 0.02, length)))
+
+
+def test_sweep_matches_a_brute_force_loop():
+    rng = np.random.default_rng(3)
+    shape = (40, 200)
+    rsi_values = rng.uniform(0, 100, shape)
+    stoch_values = rng.uniform(0, 100, shape)
+    returns = rng.normal(0, 0.05, shape)
+    for values in (rsi_values, stoch_values, returns):
+        values[rng.random(shape) < 0.1] = np.nan
+    # Values exactly on a threshold must not pass a strict "<"
+    rsi_values[0, :10] = 20.0
+    stoch_values[1, :10] = 10.0
+    rsi_grid = np.arange(10.0, 60.0, 5.0)
+    stoch_grid = np.arange(5.0, 55.0, 5.0)
+
+    signals, hit_rate, mean_return = sweep(rsi_values, stoch_values, returns, rsi_grid, stoch_grid)
+    for i, a in enumerate(rsi_grid):
+        for j, b in enumerate(stoch_grid):
+            with np.errstate(invalid='ignore'):
+                fired = (rsi_values < a) & (stoch_values < b) & ~np.isnan(returns)
+            assert signals[i, j] == fired.sum()
+            if fired.any():
+                assert hit_rate[i, j] == pytest.approx((returns[fired] > 0).mean())
+                assert mean_return[i, j] == pytest.approx(returns[fired].mean())
+            else:
+                assert np.isnan(hit_rate[i, j]) and np.isnan(mean_return[i, j])
+
+
+def test_weekly_bars_follow_monday_weeks():
+    # Thu 2025-01-02 .. Tue 2025-01-14, with no bars on the weekend or on Mon 2025-01-06
+    dates = ["2025-01-02", "2025-01-03", "2025-01-07", "2025-01-08", "2025-01-10", "2025-01-13", "2025-01-14"]
+    timestamps = [day(date) for date in dates]
+    closes = np.array([[1.0, 2.0, 3.0, 4.0, 5.0, 6.0, 7.0],
+                       [1.0, np.nan, 3.0, np.nan, np.nan, np.nan, np.nan]])
+    weekly = PriceHistory(['A', 'B'], timestamps, closes).weekly()
+    assert list(weekly.timestamps) == [day("2024-12-30"), day("2025-01-06"), day("2025-01-13")]
+    assert all(time.gmtime(ts).tm_wday == 0 for ts in weekly.timestamps)
+    # Each week closes at the symbol's last bar in it; NaN when it had none
+    assert np.array_equal(weekly.closes, [[2.0, 5.0, 7.0], [1.0, 3.0, np.nan]], equal_nan=True)
+
+
+def test_weekly_matches_the_live_resampling():
+    history = synthetic_history(3, years=1)
+    weekly = history.weekly()
+    for row, symbol in enumerate(history.symbols):
+        present = ~np.isnan(history.closes[row])
+        daily = pd.DataFrame({'open': 0.0, 'high': 0.0, 'low': 0.0, 'volume': 0.0,
+                              'close': history.closes[row][present]},
+                             index=pd.to_datetime(history.timestamps[present], unit='s'))
+        expected = resample_weekly(daily)
+        assert list(weekly.timestamps) == list((expected.index - pd.Timestamp(0)) // pd.Timedelta(seconds=1))
+        assert np.array_equal(weekly.closes[row], expected['close'].to_numpy())
+
+
+def test_symbols_listed_later_keep_their_indicators():
+    axis = day("2024-01-01") + np.arange(300) * DAY
+    early = walk(300, seed=1)
+    late = walk(200, seed=2)
+    # The late symbol also skips every 9th day of the shared axis
+    late_days = np.setdiff1d(np.arange(100, 300), np.arange(100, 300, 9))
+    history = PriceHistory.from_series(['EARLY', 'LATE'], [(axis, early), (axis[late_days], late[:len(late_days)])])
+    rsi_values, stoch_values = symbol_indicators(history.closes)
+
+    for row, (columns, closes) in enumerate([(np.arange(300), early), (late_days, late[:len(late_days)])]):
+        expected_rsi = rsi(closes[None, :])
+        assert np.array_equal(rsi_values[row, columns], expected_rsi[0], equal_nan=True)
+        assert np.array_equal(stoch_values[row, columns], stoch_rsi_k(expected_rsi)[0], equal_nan=True)
+        missing = np.setdiff1d(np.arange(300), columns)
+        assert np.isnan(rsi_values[row, missing]).all()
+    # Only the 14-bar warm-up is blank, not the bars after each gap
+    assert np.isnan(rsi_values[1, late_days]).sum() == 14
+
+
+def test_forward_returns():
+    closes = np.array([[100.0, 110.0, np.nan, 121.0]])
+    assert np.allclose(forward_returns(closes, 1), [[0.1, np.nan, np.nan, np.nan]], equal_nan=True)
+    assert np.allclose(forward_returns(closes, 3), [[0.21, np.nan, np.nan, np.nan]], equal_nan=True)
+    assert np.isnan(forward_returns(closes, 4)).all()
+
+
+def test_report_rule_is_one_cell_of_the_sweep():
+    report = run_backtest(synthetic_history(20, years=4), rsi_thresholds=(20,), stoch_thresholds=(10,))
+    assert report['timeframe'] == 'weekly' and report['symbols'] == 20
+    assert report['sweep'][0]['horizons'] == report['rule']['horizons']
+    for horizon, baseline in report['baseline']['horizons'].items():
+        assert baseline['signals'] >= report['rule']['horizons'][horizon]['signals']
@@ -0,0 +1,129 @@
+from urllib.parse import parse_qs, urlsplit
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import data_plan
+from bar_store import BarStore
+from data_plan import STORE_SEED_RANGE, fetch_history, parse_chart
+from http_transport import Transport
+
+
+class RecordingFetcher:
+    """Transport wrapper keeping the query of every chart request."""
+
+    def __init__(self):
+        self.transport = Transport()
+        self.queries = []
+
+    def get_json(self, url):
+        self.queries.append({key: values[0] for key, values in parse_qs(urlsplit(url).query).items()})
+        return self.transport.get_json(url)
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    store = BarStore(str(tmp_path / "bars"))
+    saves = []
+    save = store.save
+
+    def counting_save(symbol, interval, bars):
+        saves.append(symbol)
+        save(symbol, interval, bars)
+
+    monkeypatch.setattr(store, "save", counting_save)
+    store.saves = saves
+    return store
+
+
+def yahoo_daily(symbol, range_=STORE_SEED_RANGE):
+    return parse_chart(Transport().get_json(f"{data_plan.YAHOO_CHART_URL}/{symbol}?range={range_}&interval=1d"))
+
+
+def bars(closes, start="2025-10-06 13:30"):
+    closes = np.asarray(closes, dtype='float64')
+    return pd.DataFrame({'open': closes, 'high': closes + 1, 'low': closes - 1, 'close': closes,
+                         'volume': np.full(len(closes), 1000.0)},
+                        index=pd.date_range(start, periods=len(closes), freq="D"))
+
+
+def test_empty_store_is_seeded_with_two_years(stub, store):
+    fetcher = RecordingFetcher()
+    history = fetch_history("AAPL", fetcher, store=store)
+    assert fetcher.queries == [{'range': STORE_SEED_RANGE, 'interval': '1d'}]
+    assert STORE_SEED_RANGE == "2y"
+
+    expected = yahoo_daily("AAPL")
+    pd.testing.assert_frame_equal(store.load("AAPL", "1d"), expected, check_freq=False)
+    # Indicators run over the full stored history, not a trailing window
+    assert len(history.daily) == len(expected)
+    assert store.last_timestamp("AAPL", "1d") == int(expected.index[-1].timestamp())
+
+
+def test_stored_symbol_requests_only_from_the_last_bar(stub, store):
+    full = yahoo_daily("AAPL")
+    store.save("AAPL", "1d", full.iloc[:-5])
+    del store.saves[:]
+    last = store.last_timestamp("AAPL", "1d")
+
+    fetcher = RecordingFetcher()
+    history = fetch_history("AAPL", fetcher, store=store)
+    query = fetcher.queries[0]
+    assert len(fetcher.queries) == 1 and 'range' not in query
+    assert int(query['period1']) == last and query['interval'] == '1d'
+    pd.testing.assert_frame_equal(store.load("AAPL", "1d"), full, check_freq=False)
+    pd.testing.assert_frame_equal(history.daily, full, check_freq=False)
+    assert store.saves == ["AAPL"]
+
+
+def test_corrected_last_bar_replaces_the_stored_one(stub, store):
+    full = yahoo_daily("AAPL")
+    stale = full.copy()
+    stale.iloc[-1, stale.columns.get_loc('close')] += 3.0
+    store.save("AAPL", "1d", stale)
+    del store.saves[:]
+
+    fetch_history("AAPL", RecordingFetcher(), store=store)
+    pd.testing.assert_frame_equal(store.load("AAPL", "1d"), full, check_freq=False)
+    assert store.saves == ["AAPL"]
+
+
+def test_unchanged_bars_are_not_rewritten(stub, store):
+    fetch_history("AAPL", RecordingFetcher(), store=store)
+    del store.saves[:]
+    history = fetch_history("AAPL", RecordingFetcher(), store=store)
+    assert store.saves == []
+    pd.testing.assert_frame_equal(history.daily, yahoo_daily("AAPL"), check_freq=False)
+
+
+def test_append_merges_overlapping_bars(store):
+    store.append("X", "1d", bars([1, 2, 3, 4]))
+    merged = store.append("X", "1d", bars([40, 5, 6], start="2025-10-09 13:30"))
+    assert merged['close'].tolist() == [1, 2, 3, 40, 5, 6]
+    assert store.load("X", "1d")['close'].tolist() == [1, 2, 3, 40, 5, 6]
+
+    # Nothing fetched leaves the store as it is
+    del store.saves[:]
+    assert store.append("X", "1d", bars([]))['close'].tolist() == [1, 2, 3, 40, 5, 6]
+    assert store.saves == []
+
+
+def test_closes_and_symbols(store):
+    assert store.closes("X", "1d") is None
+    assert store.symbols("1d") == []
+    store.append("X", "1d", bars([1.5, 2.5, 3.5]))
+    store.append("A", "1d", bars([7.0]))
+    store.append("B", "1wk", bars([8.0]))
+
+    timestamps, closes = store.closes("X", "1d")
+    assert timestamps.dtype == np.int64 and closes.dtype == np.float64
+    assert timestamps.tolist() == [int(ts.timestamp()) for ts in bars([0, 0, 0]).index]
+    assert closes.tolist() == [1.5, 2.5, 3.5]
+    assert store.symbols("1d") == ["A", "X"]
+    assert store.symbols("1wk") == ["B"]
+
+
+def test_missing_symbol(store):
+    assert store.load("X", "1d") is None
+    assert store.last_timestamp("X", "1d") is None
@@ -0,0 +1,30 @@
+import os
+
+from benchmark_pipeline import _bytes_written, _file_versions, compare_to_baseline
+from fsutil import atomic_writer
+
+
+def test_bytes_written_counts_new_and_rewritten_files_only(tmp_path):
+    (tmp_path / "unchanged.html").write_text("a" * 100)
+    (tmp_path / "rewritten.html").write_text("b" * 200)
+    before = _file_versions(str(tmp_path))
+
+    # Same size, written immediately: only the new inode tells the rewrite apart
+    with atomic_writer(str(tmp_path / "rewritten.html")) as f:
+        f.write("c" * 200)
+    os.makedirs(tmp_path / "site")
+    (tmp_path / "site" / "data.json").write_text("d" * 50)
+
+    assert _bytes_written(before, _file_versions(str(tmp_path))) == 250
+
+
+def test_compare_to_baseline_flags_regressions_beyond_tolerance():
+    baseline = {'update': {'wall_time': 1.0, 'requests': 100, 'bytes_written': 1000}}
+    report = {'update': {'wall_time': 1.2, 'requests': 130, 'bytes_written': 900}, 'new-stage': {'requests': 5}}
+    assert compare_to_baseline(report, baseline, tolerance=0.25) == ["update requests: 130.000 vs baseline 100.000"]
+
+
+def test_compare_to_baseline_ignores_millisecond_wall_time_noise():
+    baseline = {'rebuild-json': {'wall_time': 0.004}, 'update': {'wall_time': 0.1}}
+    report = {'rebuild-json': {'wall_time': 0.009}, 'update': {'wall_time': 0.2}}
+    assert compare_to_baseline(report, baseline) == ["update wall_time: 0.200 vs baseline 0.100"]
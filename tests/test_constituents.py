@@ -0,0 +1,128 @@
+import json
+
+import pytest
+
+from constituents import load_cache, membership_diff, parse_constituents, refresh_constituents
+from metrics import get_metrics
+from stub_server import slickcharts_page, synthetic_symbols
+
+SYMBOLS = synthetic_symbols(100)
+
+
+@pytest.fixture
+def cache_path(tmp_path):
+    return str(tmp_path / "constituents.json")
+
+
+def cache_results():
+    """`constituents_cache_total` counts by result."""
+    return {dict(labels)['result']: value for (name, labels), value in get_metrics().counters.items()
+            if name == "constituents_cache_total"}
+
+
+def test_parse_constituents_reads_the_symbol_column():
+    page = slickcharts_page(['AAPL', '$MSFT', 'BRK.B'])
+    # The company column links too; only the symbol column is read, with '$' and entities stripped
+    page = page.replace('BRK.B</a></td><td>', 'BRK&#46;B</a></td><td>')
+    assert parse_constituents(page) == ['AAPL', 'MSFT', 'BRK.B']
+
+
+def test_parse_constituents_without_the_table():
+    assert parse_constituents('<html><body><table class="other"></table></body></html>') is None
+    assert parse_constituents(slickcharts_page([])) == []
+
+
+def test_membership_diff_keeps_page_order():
+    assert membership_diff(['A', 'B', 'C', 'D'], ['E', 'A', 'C', 'F']) == {'added': ['E', 'F'], 'removed': ['B', 'D']}
+    assert membership_diff(None, ['A', 'B']) == {'added': ['A', 'B'], 'removed': []}
+    assert membership_diff(['A'], ['A']) == {'added': [], 'removed': []}
+
+
+def test_first_fetch_records_every_symbol_as_added(stub, cache_path):
+    stub.symbols = SYMBOLS
+    symbols, diff = refresh_constituents(cache_path)
+    assert symbols == SYMBOLS
+    assert diff == {'added': SYMBOLS, 'removed': []}
+    cache = load_cache(cache_path)
+    assert cache['symbols'] == SYMBOLS and cache['etag'] and cache['last_modified']
+    assert cache_results() == {'fetched': 1}
+
+
+def test_fresh_cache_makes_no_request(stub, cache_path):
+    stub.symbols = SYMBOLS
+    refresh_constituents(cache_path)
+    stub.symbols = SYMBOLS[:50]
+    assert refresh_constituents(cache_path) == (SYMBOLS, {'added': [], 'removed': []})
+    assert stub.snapshot_counters()['requests'] == 1
+    assert cache_results() == {'fetched': 1, 'fresh': 1}
+
+
+def test_unchanged_page_is_answered_with_304(stub, cache_path):
+    stub.symbols = SYMBOLS
+    refresh_constituents(cache_path)
+    checked_at = load_cache(cache_path)['checked_at']
+
+    assert refresh_constituents(cache_path, ttl=0) == (SYMBOLS, {'added': [], 'removed': []})
+    assert stub.snapshot_counters()['requests'] == 2
+    assert cache_results() == {'fetched': 1, 'not_modified': 1}
+    # The check is recorded so the next run within the TTL makes no request
+    assert load_cache(cache_path)['checked_at'] >= checked_at
+
+
+def test_membership_change_is_recorded(stub, cache_path):
+    stub.symbols = SYMBOLS
+    refresh_constituents(cache_path)
+    stub.symbols = SYMBOLS[1:] + ['NEW1']
+
+    symbols, diff = refresh_constituents(cache_path, force=True)
+    assert symbols == SYMBOLS[1:] + ['NEW1']
+    assert diff == {'added': ['NEW1'], 'removed': [SYMBOLS[0]]}
+    cache = load_cache(cache_path)
+    assert (cache['added'], cache['removed']) == (['NEW1'], [SYMBOLS[0]])
+
+    # An unchanged page keeps the last change on record
+    stub.symbols = list(stub.symbols)
+    refresh_constituents(cache_path, force=True)
+    assert load_cache(cache_path)['added'] == ['NEW1']
+
+
+def test_failed_download_falls_back_to_the_cache(stub, cache_path):
+    stub.symbols = SYMBOLS
+    refresh_constituents(cache_path)
+    with open(cache_path, "r") as f:
+        before = f.read()
+
+    stub.queue_error(404)
+    assert refresh_constituents(cache_path, force=True) == (SYMBOLS, {'added': [], 'removed': []})
+    assert cache_results() == {'fetched': 1, 'stale': 1}
+    with open(cache_path, "r") as f:
+        assert f.read() == before
+
+
+def test_failed_download_without_a_cache_returns_nothing(stub, cache_path):
+    stub.queue_error(404)
+    assert refresh_constituents(cache_path) == ([], {'added': [], 'removed': []})
+    assert load_cache(cache_path) is None
+
+
+@pytest.mark.parametrize("page_symbols", [[], SYMBOLS[:2], SYMBOLS[:89]])
+def test_truncated_table_keeps_the_cached_list(stub, cache_path, page_symbols):
+    stub.symbols = SYMBOLS
+    refresh_constituents(cache_path)
+    with open(cache_path, "r") as f:
+        before = json.load(f)
+
+    stub.symbols = page_symbols
+    assert refresh_constituents(cache_path, force=True) == (SYMBOLS, {'added': [], 'removed': []})
+    assert cache_results() == {'fetched': 1, 'stale': 1}
+    with open(cache_path, "r") as f:
+        assert json.load(f) == before
+
+
+def test_a_reconstitution_replaces_the_list(stub, cache_path):
+    stub.symbols = SYMBOLS
+    refresh_constituents(cache_path)
+    stub.symbols = SYMBOLS[:90] + ['NEW1', 'NEW2']
+    symbols, diff = refresh_constituents(cache_path, force=True)
+    assert symbols == stub.symbols
+    assert diff == {'added': ['NEW1', 'NEW2'], 'removed': SYMBOLS[90:]}
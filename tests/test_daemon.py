@@ -0,0 +1,67 @@
+import gzip
+import os
+import threading
+from http.server import ThreadingHTTPServer
+
+import pytest
+import requests
+
+from daemon import RefreshDaemon, Resource
+from stub_server import synthetic_symbols
+
+SYMBOLS = synthetic_symbols(12)
+
+
+@pytest.fixture
+def daemon(stub, tmp_path):
+    tickers_file = tmp_path / "tickers.txt"
+    tickers_file.write_text("\n".join(SYMBOLS) + "\n")
+    refresher = RefreshDaemon(str(tmp_path / "display" / "tickers"), str(tickers_file), price_interval=0,
+                              update_options={'requests_per_second': 0})
+    refresher.refresh_indicators()
+    refresher.server = ThreadingHTTPServer(("127.0.0.1", 0), refresher._handler_class())
+    threading.Thread(target=refresher.server.serve_forever, daemon=True).start()
+    host, port = refresher.server.server_address[:2]
+    refresher.base_url = f"http://{host}:{port}"
+    yield refresher
+    refresher.server.shutdown()
+    refresher.stop()
+
+
+def test_indicator_refresh_writes_no_pages(daemon, tmp_path):
+    display = tmp_path / "display"
+    assert sorted(os.listdir(display)) == ["recommended_buys.json", "run_journal.jsonl", "snapshot.json", "tickers"]
+    assert os.listdir(display / "tickers") == []
+    # ...but every page is served from memory
+    response = requests.get(f"{daemon.base_url}/tickers/{SYMBOLS[0]}.html")
+    assert response.status_code == 200 and SYMBOLS[0] in response.text
+
+
+def test_resource_etags_differ_per_encoding():
+    resource = Resource(b"x" * 1000, "text/plain")
+    assert resource.gzip_etag == resource.etag[:-1] + '-gz"'
+    assert resource.matches(resource.etag) and resource.matches(resource.gzip_etag)
+    assert resource.matches(f'"other", {resource.gzip_etag}')
+    assert not resource.matches('"other"') and not resource.matches(None)
+
+    small = Resource(b"{}", "application/json")
+    assert small.gzip_body is None and small.gzip_etag is None
+
+
+def test_gzip_and_identity_bodies_have_their_own_etags(daemon):
+    url = f"{daemon.base_url}/tickers.json"
+    plain = requests.get(url, headers={'Accept-Encoding': 'identity'})
+    compressed = requests.get(url, headers={'Accept-Encoding': 'gzip'}, stream=True)
+    raw = compressed.raw.read()
+    assert compressed.headers['Content-Encoding'] == 'gzip'
+    assert gzip.decompress(raw) == plain.content
+    assert plain.headers['ETag'] != compressed.headers['ETag']
+    assert compressed.headers['ETag'] == plain.headers['ETag'][:-1] + '-gz"'
+
+    # Either tag revalidates, and the 304 names the variant the request negotiated
+    for etag in (plain.headers['ETag'], compressed.headers['ETag']):
+        revalidated = requests.get(url, headers={'Accept-Encoding': 'gzip', 'If-None-Match': etag})
+        assert revalidated.status_code == 304
+        assert revalidated.headers['ETag'] == compressed.headers['ETag']
+    stale = requests.get(url, headers={'Accept-Encoding': 'identity', 'If-None-Match': '"stale"'})
+    assert stale.status_code == 200 and stale.headers['ETag'] == plain.headers['ETag']
@@ -0,0 +1,101 @@
+import glob
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import data_plan
+from data_plan import HISTORY_RANGE, fetch_history, parse_chart
+from http_transport import Transport
+from indicators import rsi
+from stub_server import FIXTURES_DIR
+
+SYMBOLS = ['AAPL', 'MSFT', 'NVDA']
+
+
+def recorded_weekly_symbols():
+    """Symbols with both a recorded daily chart and a recorded Yahoo weekly chart."""
+    symbols = [os.path.basename(path)[len("chart_"):-len("_1wk.json")]
+               for path in sorted(glob.glob(os.path.join(FIXTURES_DIR, "chart_*_1wk.json")))]
+    symbols = [symbol for symbol in symbols if os.path.exists(os.path.join(FIXTURES_DIR, f"chart_{symbol}.json"))]
+    return symbols or [pytest.param(None, marks=pytest.mark.skip(reason="no recorded Yahoo weekly charts"))]
+
+
+# Both sides are rounded exchange prices, so closes agree to the cent and RSI
+# over the same weeks agrees far inside a hundredth of a point
+CLOSE_TOLERANCE = 0.01
+WEEKLY_RSI_TOLERANCE = 0.01
+
+
+def old_weekly(symbol, fetcher):
+    """Weekly bars as the update requested them before the data plan."""
+    return parse_chart(fetcher.get_json(f"{data_plan.YAHOO_CHART_URL}/{symbol}?range=6mo&interval=1wk"))
+
+
+def test_one_request_per_symbol(stub):
+    fetcher = Transport()
+    for symbol in SYMBOLS:
+        history = fetch_history(symbol, fetcher)
+        assert history.close == history.daily['close'].dropna().iloc[-1]
+    assert fetcher.stats()['requests'] == len(SYMBOLS)
+    assert HISTORY_RANGE == "1y"
+
+
+def test_resample_weekly_aggregates_monday_to_friday():
+    # Thursday 2025-10-02 to Tuesday 2025-10-14: three partial or full weeks
+    days = pd.to_datetime(['2025-10-02', '2025-10-03', '2025-10-06', '2025-10-07',
+                           '2025-10-10', '2025-10-13', '2025-10-14']) + pd.Timedelta(hours=13, minutes=30)
+    daily = pd.DataFrame({
+        'open': [10, 11, 12, 13, 14, 15, 16],
+        'high': [20, 19, 25, 21, 22, 30, 18],
+        'low': [5, 4, 9, 8, 7, 6, 12],
+        'close': [11, 12, 13, np.nan, 15, 16, 17],
+        'volume': [100, 200, 300, 400, 500, 600, 700],
+    }, index=days)
+
+    weekly = data_plan.resample_weekly(daily)
+    assert list(weekly.index) == list(pd.to_datetime(['2025-09-29', '2025-10-06', '2025-10-13']))
+    assert weekly['open'].tolist() == [10, 12, 15]
+    assert weekly['high'].tolist() == [20, 25, 30]
+    assert weekly['low'].tolist() == [4, 7, 6]
+    assert weekly['close'].tolist() == [12, 15, 17]
+    # The bar without a close is dropped, volume included
+    assert weekly['volume'].tolist() == [300, 800, 1300]
+
+
+@pytest.mark.parametrize("symbol", recorded_weekly_symbols())
+def test_resampled_weeks_match_recorded_yahoo_weekly_bars(stub, symbol):
+    fetcher = Transport()
+    yahoo = old_weekly(symbol, fetcher)
+    resampled = fetch_history(symbol, fetcher).weekly()
+    # Yahoo may append the live quote as an extra row for the current week
+    yahoo = yahoo[~yahoo.index.normalize().duplicated(keep='first')]
+
+    weeks = yahoo.index.normalize()
+    resampled.index = resampled.index.normalize()
+    assert all(day.weekday() == 0 for day in weeks)
+    assert set(weeks) <= set(resampled.index)
+    assert len(weeks) >= 20
+
+    ours = resampled.loc[weeks, 'close'].to_numpy()
+    theirs = yahoo['close'].to_numpy()
+    assert np.abs(ours - theirs).max() <= CLOSE_TOLERANCE
+
+    # Same weeks and closes, hence the same RSI once both have warmed up
+    ours_rsi, theirs_rsi = rsi(np.vstack([ours, theirs]))
+    ready = ~np.isnan(theirs_rsi)
+    assert ready.any()
+    assert np.abs(ours_rsi[ready] - theirs_rsi[ready]).max() <= WEEKLY_RSI_TOLERANCE
+
+
+def test_week_start_is_the_monday_of_each_week():
+    from stub_server import MARKET_OPEN_OFFSET
+    from data_plan import DAY, week_start
+
+    monday = 1759708800  # 2025-10-06 00:00 UTC
+    for offset in (0, MARKET_OPEN_OFFSET, 4 * DAY + MARKET_OPEN_OFFSET, 7 * DAY - 1):
+        assert week_start(monday + offset) == monday
+    assert week_start(monday - 1) == monday - 7 * DAY
+    assert list(week_start(np.array([monday - DAY, monday, monday + 8 * DAY]))) == \
+        [monday - 7 * DAY, monday, monday + 7 * DAY]
@@ -0,0 +1,42 @@
+import os
+import stat
+
+import pytest
+
+from fsutil import NEW_FILE_MODE, atomic_writer
+
+
+def permissions(path):
+    return stat.S_IMODE(os.stat(path).st_mode)
+
+
+def test_new_files_get_umask_permissions(tmp_path):
+    path = tmp_path / "page.html"
+    with atomic_writer(str(path)) as f:
+        f.write("<html></html>")
+    assert path.read_text() == "<html></html>"
+    assert permissions(path) == NEW_FILE_MODE
+    umask = os.umask(0)
+    os.umask(umask)
+    assert permissions(path) == 0o666 & ~umask
+
+
+def test_replaced_files_keep_their_permissions(tmp_path):
+    path = tmp_path / "snapshot.json"
+    path.write_bytes(b"{}")
+    os.chmod(path, 0o640)
+    with atomic_writer(str(path), "wb") as f:
+        f.write(b'{"tickers": []}')
+    assert path.read_bytes() == b'{"tickers": []}'
+    assert permissions(path) == 0o640
+
+
+def test_failed_write_leaves_the_file_untouched(tmp_path):
+    path = tmp_path / "recommended_buys.json"
+    path.write_text("[]")
+    with pytest.raises(RuntimeError):
+        with atomic_writer(str(path)) as f:
+            f.write("[1")
+            raise RuntimeError("interrupted")
+    assert path.read_text() == "[]"
+    assert os.listdir(tmp_path) == ["recommended_buys.json"]
@@ -0,0 +1,82 @@
+import time
+from email.utils import formatdate
+
+import pytest
+
+from http_transport import Transport, parse_retry_after
+
+SYMBOL = "SYN0001"
+
+
+def chart_url(stub):
+    return f"{stub.base_url}/v8/finance/chart/{SYMBOL}?range=1mo&interval=1d"
+
+
+def test_429_waits_for_retry_after(stub):
+    stub.queue_error(429, retry_after="1")
+    # A backoff this long would fail the timing check; Retry-After must win
+    transport = Transport(backoff_base=10.0)
+    start = time.perf_counter()
+    data = transport.get_json(chart_url(stub))
+    elapsed = time.perf_counter() - start
+    assert data['chart']['result'][0]['meta']['symbol'] == SYMBOL
+    assert 1.0 <= elapsed < 3.0
+    stats = transport.stats()
+    assert (stats['requests'], stats['retries'], stats['errors']) == (2, 1, 0)
+
+
+def test_503_is_retried_with_backoff(stub):
+    stub.queue_error(503, count=2)
+    transport = Transport(backoff_base=0.01)
+    response = transport.get(chart_url(stub))
+    assert response.status_code == 200
+    stats = transport.stats()
+    assert (stats['requests'], stats['retries'], stats['errors']) == (3, 2, 0)
+    assert stub.snapshot_counters()['requests'] == 3
+
+
+def test_retries_stop_at_the_cap(stub):
+    stub.queue_error(503, count=10)
+    transport = Transport(max_retries=2, backoff_base=0.01)
+    response = transport.get(chart_url(stub))
+    assert response.status_code == 503
+    stats = transport.stats()
+    assert (stats['requests'], stats['retries'], stats['errors']) == (3, 2, 1)
+    assert stub.snapshot_counters()['requests'] == 3
+
+
+def test_client_errors_are_not_retried(stub):
+    transport = Transport(backoff_base=0.01)
+    response = transport.get(f"{stub.base_url}/unknown")
+    assert response.status_code == 404
+    assert transport.stats()['retries'] == 0
+
+
+def test_stats_count_reused_connections_and_bytes(stub):
+    transport = Transport()
+    for _ in range(5):
+        transport.get_json(chart_url(stub))
+    stats = transport.stats()
+    assert stats['requests'] == 5
+    assert stats['connections_opened'] == 1
+    assert stats['connections_reused'] == 4
+    assert stats['bytes_received'] == stub.snapshot_counters()['bytes_sent']
+
+
+def test_stats_under_random_errors(stub):
+    stub.error_rate = 0.3
+    transport = Transport(backoff_base=0.01, max_retries=10)
+    for _ in range(20):
+        assert transport.get(chart_url(stub)).status_code == 200
+    stats = transport.stats()
+    assert stats['retries'] == stub.snapshot_counters()['errors_injected']
+    assert stats['requests'] == 20 + stats['retries']
+
+
+@pytest.mark.parametrize("value, expected", [("3", 3.0), ("0", 0.0), ("-5", 0.0), ("soon", None), (None, None)])
+def test_parse_retry_after(value, expected):
+    assert parse_retry_after(value) == expected
+
+
+def test_parse_retry_after_http_date():
+    assert 8 <= parse_retry_after(formatdate(time.time() + 10, usegmt=True)) <= 10
@@ -0,0 +1,97 @@
+import json
+
+import numpy as np
+import pytest
+
+from indicators import IndicatorState, load_states, rsi, save_states, stoch_rsi_k
+
+DAY = 86400
+
+
+def history(length, seed=11):
+    rng = np.random.default_rng(seed)
+    timestamps = np.arange(length, dtype='int64') * DAY + 1_700_000_000
+    return timestamps, 100 + np.cumsum(rng.normal(0, 2, length))
+
+
+def expected(closes):
+    """Latest (rsi, stoch_rsi_k) of a full vectorized recompute."""
+    rsi_values = rsi(np.asarray(closes, dtype='float64')[None, :])
+    return rsi_values[0, -1], stoch_rsi_k(rsi_values)[0, -1]
+
+
+def assert_state(state, closes):
+    assert (state.rsi, state.stoch_rsi_k) == pytest.approx(expected(closes), abs=0, nan_ok=True)
+
+
+def test_update_matches_full_recompute_at_every_bar():
+    timestamps, closes = history(80)
+    state = IndicatorState()
+    for i in range(len(closes)):
+        state.update(float(closes[i]), int(timestamps[i]))
+        assert_state(state, closes[:i + 1])
+    assert state.last_timestamp == timestamps[-1]
+
+
+def test_update_skips_missing_closes():
+    timestamps, closes = history(40)
+    state = IndicatorState()
+    for i in range(len(closes)):
+        state.update(float(closes[i]), int(timestamps[i]))
+        state.update(None)
+        state.update(float('nan'))
+    assert_state(state, closes)
+
+
+def test_replace_last_reapplies_the_newest_bar():
+    timestamps, closes = history(60)
+    state = IndicatorState()
+    for i in range(len(closes)):
+        state.update(float(closes[i]), int(timestamps[i]))
+    revised = closes.copy()
+    for close in (closes[-1] * 1.05, closes[-1] * 0.9, closes[-1] * 0.97):
+        revised[-1] = close
+        state.replace_last(float(close), int(timestamps[-1]))
+        assert_state(state, revised)
+
+
+def test_advance_applies_new_bars_and_revises_the_last_one():
+    timestamps, closes = history(70)
+    state = IndicatorState()
+    assert state.advance(timestamps[:50], closes[:50]) == 50
+    revised = closes.copy()
+    revised[49] *= 1.02
+    # The bar at last_timestamp is re-applied with its revised close, then 20 new bars
+    assert state.advance(timestamps, revised) == 21
+    assert_state(state, revised)
+    assert state.last_timestamp == timestamps[-1]
+
+
+def test_advance_rebuilds_when_last_timestamp_is_gone():
+    timestamps, closes = history(70)
+    state = IndicatorState()
+    state.advance(timestamps[:40], closes[:40])
+    # A history that no longer contains the state's last bar (e.g. a rewritten store)
+    shifted = timestamps[41:] + DAY // 2
+    assert state.advance(shifted, closes[41:]) == len(shifted)
+    assert_state(state, closes[41:])
+
+
+def test_dict_round_trip_resumes_identically(tmp_path):
+    timestamps, closes = history(90)
+    state = IndicatorState()
+    state.advance(timestamps[:60], closes[:60])
+
+    restored = IndicatorState.from_dict(json.loads(json.dumps(state.to_dict())))
+    assert json.dumps(restored.to_dict()) == json.dumps(state.to_dict())
+    restored.replace_last(float(closes[59] * 1.01), int(timestamps[59]))
+    state.replace_last(float(closes[59] * 1.01), int(timestamps[59]))
+    for i in range(60, 90):
+        restored.update(float(closes[i]), int(timestamps[i]))
+        state.update(float(closes[i]), int(timestamps[i]))
+    assert (restored.rsi, restored.stoch_rsi_k) == (state.rsi, state.stoch_rsi_k)
+
+    path = str(tmp_path / "daily.json")
+    save_states(path, {'AAPL': restored})
+    loaded = load_states(path)['AAPL']
+    assert (loaded.rsi, loaded.stoch_rsi_k) == (state.rsi, state.stoch_rsi_k)
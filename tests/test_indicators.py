@@ -0,0 +1,103 @@
+import calendar
+import glob
+import json
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from data_plan import parse_chart, resample_weekly
+from indicators import close_matrix, latest_indicators, rsi, stoch_rsi_k
+from stub_server import DEFAULT_AS_OF, FIXTURES_DIR, synthetic_bars
+
+STUB_AS_OF = calendar.timegm(time.strptime(DEFAULT_AS_OF, "%Y-%m-%d"))
+
+TOLERANCE = 1e-9
+
+
+def fixture_closes():
+    """Daily and weekly closes of the synthetic stub series and any recorded daily chart."""
+    dailies = []
+    for symbol in ['AAPL', 'MSFT', 'NVDA']:
+        timestamps, quote = synthetic_bars(symbol, STUB_AS_OF)
+        dailies.append(parse_chart({'chart': {'result': [{'timestamp': timestamps, 'indicators': {'quote': [quote]}}]}}))
+    for path in sorted(glob.glob(os.path.join(FIXTURES_DIR, "chart_*.json"))):
+        if not path.endswith("_1wk.json"):
+            with open(path, "r") as f:
+                dailies.append(parse_chart(json.load(f)))
+
+    closes = []
+    for daily in dailies:
+        closes.append(daily['close'].dropna().to_numpy())
+        closes.append(resample_weekly(daily)['close'].to_numpy())
+    return closes
+
+
+def random_walks(count, length, seed):
+    rng = np.random.default_rng(seed)
+    return [100 + np.cumsum(rng.normal(0, 2, length)) for _ in range(count)]
+
+
+def reference_rsi(close, length=14):
+    """pandas_ta 0.3.14b `rsi`, step for step: `rma` is an adjusted ewm."""
+    negative = close.diff(1)
+    positive = negative.copy()
+    positive[positive < 0] = 0
+    negative[negative > 0] = 0
+    positive_avg = positive.ewm(alpha=1.0 / length, min_periods=length).mean()
+    negative_avg = negative.ewm(alpha=1.0 / length, min_periods=length).mean()
+    return 100 * positive_avg / (positive_avg + negative_avg.abs())
+
+
+def reference_stoch_rsi_k(close, length=14, rsi_length=14, k=3):
+    """pandas_ta 0.3.14b `stochrsi`, %K column."""
+    rsi_values = reference_rsi(close, rsi_length)
+    lowest = rsi_values.rolling(length).min()
+    highest = rsi_values.rolling(length).max()
+    span = highest - lowest
+    if span.eq(0).any():
+        span += sys.float_info.epsilon
+    stoch = 100 * (rsi_values - lowest) / span
+    return stoch.rolling(k, min_periods=k).mean()
+
+
+def assert_matches(actual, expected):
+    expected = np.asarray(expected, dtype='float64')
+    assert np.array_equal(np.isnan(actual), np.isnan(expected))
+    assert np.allclose(actual, expected, rtol=0, atol=TOLERANCE, equal_nan=True)
+
+
+@pytest.mark.parametrize("series", fixture_closes() + random_walks(20, 42, seed=5) + random_walks(5, 300, seed=6))
+def test_matches_pandas_ewm_reference(series):
+    closes = close_matrix([series])
+    rsi_values = rsi(closes)
+    assert_matches(rsi_values[0], reference_rsi(pd.Series(series)))
+    assert_matches(stoch_rsi_k(rsi_values)[0], reference_stoch_rsi_k(pd.Series(series)))
+
+
+def test_matches_pandas_ta():
+    ta = pytest.importorskip("pandas_ta")
+    for series in fixture_closes() + random_walks(20, 42, seed=7):
+        close = pd.Series(series)
+        rsi_values = rsi(close_matrix([series]))
+        assert_matches(rsi_values[0], ta.rsi(close, length=14))
+        assert_matches(stoch_rsi_k(rsi_values)[0], ta.stochrsi(close)['STOCHRSIk_14_14_3_3'])
+
+
+def test_latest_indicators_right_aligns_ragged_series():
+    series = random_walks(3, 60, seed=8)
+    series[1] = series[1][25:]
+    series[2] = list(series[2][:10]) + [None] + list(series[2][10:])
+    latest_rsi, latest_stoch = latest_indicators(series)
+    for i, values in enumerate(series):
+        close = pd.Series([value for value in values if value is not None], dtype='float64')
+        assert latest_rsi[i] == pytest.approx(reference_rsi(close).iloc[-1], abs=TOLERANCE)
+        assert latest_stoch[i] == pytest.approx(reference_stoch_rsi_k(close).iloc[-1], abs=TOLERANCE)
+
+
+def test_short_history_has_no_indicators():
+    latest_rsi, latest_stoch = latest_indicators([[100.0 + i for i in range(10)], []])
+    assert np.isnan(latest_rsi).all() and np.isnan(latest_stoch).all()
@@ -0,0 +1,70 @@
+import json
+
+from journal import RunJournal
+
+
+def entry(symbol, status="ok"):
+    return {'symbol': symbol, 'status': status}
+
+
+def lines(path):
+    with open(path, "r") as f:
+        return f.read().split("\n")
+
+
+def test_entries_survive_reopening(tmp_path):
+    path = str(tmp_path / "journal.jsonl")
+    with RunJournal(path).open() as journal:
+        journal.append([entry("A"), entry("B", "error")])
+        journal.append([])
+    with RunJournal(path).open(resume=True) as journal:
+        journal.append([entry("B"), entry("C")])
+
+    # Later records win, and both headers are skipped
+    assert RunJournal(path).load() == {'A': entry("A"), 'B': entry("B"), 'C': entry("C")}
+    headers = [json.loads(line) for line in lines(path) if line and 'journal' in json.loads(line)]
+    assert [header['resumed'] for header in headers] == [False, True]
+
+
+def test_opening_without_resume_starts_over(tmp_path):
+    path = str(tmp_path / "journal.jsonl")
+    with RunJournal(path).open() as journal:
+        journal.append([entry("A")])
+    with RunJournal(path).open():
+        pass
+    assert RunJournal(path).load() == {}
+
+
+def test_missing_journal_loads_empty(tmp_path):
+    assert RunJournal(str(tmp_path / "missing.jsonl")).load() == {}
+
+
+def test_torn_final_line_is_ignored_on_load(tmp_path):
+    path = tmp_path / "journal.jsonl"
+    with RunJournal(str(path)).open() as journal:
+        journal.append([entry("A"), entry("B")])
+    with open(path, "a") as f:
+        f.write('{"symbol":"C","sta')
+
+    assert RunJournal(str(path)).load() == {'A': entry("A"), 'B': entry("B")}
+
+
+def test_resume_after_a_torn_line_starts_a_clean_line(tmp_path):
+    path = tmp_path / "journal.jsonl"
+    with RunJournal(str(path)).open() as journal:
+        journal.append([entry("A")])
+    with open(path, "a") as f:
+        f.write('{"symbol":"C","sta')
+
+    with RunJournal(str(path)).open(resume=True) as journal:
+        journal.append([entry("C")])
+    assert RunJournal(str(path)).load() == {'A': entry("A"), 'C': entry("C")}
+    # The torn fragment stays on its own line instead of swallowing the new header
+    assert '{"symbol":"C","sta' in lines(path)
+
+
+def test_journal_directory_is_created(tmp_path):
+    path = str(tmp_path / "nested" / "journal.jsonl")
+    with RunJournal(path).open() as journal:
+        journal.append([entry("A")])
+    assert RunJournal(path).load() == {'A': entry("A")}
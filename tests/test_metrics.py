@@ -0,0 +1,123 @@
+import json
+import os
+
+import pytest
+
+from metrics import METRICS_DIR_ENV, PROFILE_ENV, Histogram, Metrics, get_metrics, instrumented_run
+
+
+def sample_metrics():
+    metrics = Metrics()
+    metrics.inc("http_requests_total", host="a", status="200")
+    metrics.inc("http_requests_total", 2, host="a", status="429")
+    metrics.inc("retries_total")
+    metrics.set_gauge("na_ratio", 0.25, field="rsi")
+    for value in (0.003, 0.2, 0.2, 50.0):
+        metrics.observe("http_request_seconds", value, host="a")
+    return metrics
+
+
+def test_histogram_buckets_are_cumulative_on_export():
+    histogram = Histogram(buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        histogram.observe(value)
+    assert histogram.as_dict() == {'count': 4, 'sum': 3.65, 'buckets': [[0.1, 2], [1.0, 3], ['+Inf', 4]]}
+
+
+def test_prometheus_text():
+    lines = sample_metrics().prometheus_text().splitlines()
+    assert lines[:4] == [
+        '# TYPE nasdaq_http_requests_total counter',
+        'nasdaq_http_requests_total{host="a",status="200"} 1',
+        'nasdaq_http_requests_total{host="a",status="429"} 2',
+        '# TYPE nasdaq_retries_total counter',
+    ]
+    assert 'nasdaq_retries_total 1' in lines
+    assert lines.index('# TYPE nasdaq_na_ratio gauge') + 1 == lines.index('nasdaq_na_ratio{field="rsi"} 0.25')
+    assert lines.count('# TYPE nasdaq_http_request_seconds histogram') == 1
+    assert 'nasdaq_http_request_seconds_bucket{host="a",le="0.005"} 1' in lines
+    assert 'nasdaq_http_request_seconds_bucket{host="a",le="0.25"} 3' in lines
+    assert 'nasdaq_http_request_seconds_bucket{host="a",le="30.0"} 3' in lines
+    assert 'nasdaq_http_request_seconds_bucket{host="a",le="+Inf"} 4' in lines
+    assert 'nasdaq_http_request_seconds_count{host="a"} 4' in lines
+    assert any(line.startswith('nasdaq_http_request_seconds_sum{host="a"} 50.40') for line in lines)
+
+
+def test_merge_sums_counters_and_rebuilds_histogram_buckets():
+    parent = sample_metrics()
+    worker = sample_metrics()
+    worker.observe("http_request_seconds", 0.75, host="a")
+    worker.observe("shard_seconds", 2.0)
+    worker.set_gauge("na_ratio", 1.0, field="rsi")
+
+    parent.merge(json.loads(json.dumps(worker.report())))
+    assert parent.counters[('http_requests_total', (('host', 'a'), ('status', '429')))] == 4
+    assert parent.counters[('retries_total', ())] == 2
+    # Gauges describe the whole run and are left to the caller
+    assert parent.gauges[('na_ratio', (('field', 'rsi'),))] == 0.25
+
+    merged = parent.histograms[('http_request_seconds', (('host', 'a'),))]
+    expected = Histogram()
+    for value in (0.003, 0.2, 0.2, 50.0) * 2 + (0.75,):
+        expected.observe(value)
+    assert merged.counts == expected.counts
+    assert merged.count == 9
+    assert merged.sum == pytest.approx(expected.sum)
+    assert parent.histograms[('shard_seconds', ())].counts == worker.histograms[('shard_seconds', ())].counts
+
+
+def test_report_round_trips_through_merge():
+    source = sample_metrics()
+    target = Metrics()
+    target.merge(source.report())
+    assert target.counters == source.counters
+    assert {key: h.counts for key, h in target.histograms.items()} == \
+        {key: h.counts for key, h in source.histograms.items()}
+
+
+def test_export_writes_json_and_prometheus_reports(tmp_path):
+    metrics = sample_metrics()
+    metrics.export(str(tmp_path), "update")
+    assert sorted(os.listdir(tmp_path)) == ["update.json", "update.prom"]
+    with open(tmp_path / "update.json") as f:
+        report = json.load(f)
+    assert {(c['name'], c['value']) for c in report['counters']} == \
+        {('http_requests_total', 1), ('http_requests_total', 2), ('retries_total', 1)}
+    with open(tmp_path / "update.prom") as f:
+        assert f.read() == metrics.prometheus_text()
+
+
+def test_instrumented_run_times_the_call_and_exports(tmp_path):
+    result = instrumented_run("update", lambda a, b=0: a + b, 2, b=3, metrics_dir=str(tmp_path))
+    assert result == 5
+    assert get_metrics().histograms[('run_seconds', (('entry_point', 'update'),))].count == 1
+    with open(tmp_path / "update.json") as f:
+        assert [h['name'] for h in json.load(f)['histograms']] == ['run_seconds']
+
+
+def test_instrumented_run_exports_after_a_failure(tmp_path):
+    def failing():
+        get_metrics().inc("symbols_total", status="ok")
+        raise RuntimeError("boom")
+
+    with pytest.raises(RuntimeError):
+        instrumented_run("update", failing, metrics_dir=str(tmp_path))
+    with open(tmp_path / "update.json") as f:
+        assert json.load(f)['counters'][0]['name'] == 'symbols_total'
+
+
+def test_instrumented_run_reads_the_environment(tmp_path, monkeypatch):
+    monkeypatch.setenv(METRICS_DIR_ENV, str(tmp_path / "metrics"))
+    monkeypatch.setenv(PROFILE_ENV, str(tmp_path / "profiles" / "update.prof"))
+    (tmp_path / "metrics").mkdir()
+    instrumented_run("update", lambda: None)
+    assert os.path.exists(tmp_path / "metrics" / "update.prom")
+    assert os.path.getsize(tmp_path / "profiles" / "update.prof") > 0
+
+
+def test_instrumented_run_without_a_metrics_dir_writes_nothing(tmp_path, monkeypatch):
+    monkeypatch.delenv(METRICS_DIR_ENV, raising=False)
+    monkeypatch.delenv(PROFILE_ENV, raising=False)
+    monkeypatch.chdir(tmp_path)
+    instrumented_run("update", lambda: None)
+    assert os.listdir(tmp_path) == []
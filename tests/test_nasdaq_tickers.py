@@ -0,0 +1,60 @@
+import pytest
+
+from metrics import get_metrics
+from nasdaq_tickers import fetch_prices
+from stub_server import synthetic_symbols
+
+SYMBOLS = synthetic_symbols(45)
+
+
+@pytest.fixture
+def spark_requests(stub, monkeypatch):
+    """Symbols of every spark request the stub answers, in order."""
+    requests = []
+    spark = stub.spark
+
+    def recording_spark(symbols):
+        requests.append(list(symbols))
+        return spark(symbols)
+
+    monkeypatch.setattr(stub, "spark", recording_spark)
+    return requests
+
+
+def chart_price(stub, symbol):
+    close = stub.chart(symbol, {'range': '1d'})['chart']['result'][0]['indicators']['quote'][0]['close'][0]
+    return f"{close:.2f}"
+
+
+@pytest.mark.parametrize("chunk_size", [20, 7, 100])
+def test_prices_are_fetched_in_chunks(stub, spark_requests, chunk_size):
+    prices = fetch_prices(SYMBOLS, chunk_size=chunk_size)
+    assert prices == {symbol: chart_price(stub, symbol) for symbol in SYMBOLS}
+    assert spark_requests == [SYMBOLS[i:i + chunk_size] for i in range(0, len(SYMBOLS), chunk_size)]
+    assert stub.snapshot_counters()['requests'] == len(spark_requests)
+    assert ('price_fallbacks_total', ()) not in get_metrics().counters
+
+
+def test_symbols_missing_from_a_batch_fall_back_to_the_chart_endpoint(stub, spark_requests, monkeypatch):
+    missing = {SYMBOLS[3], SYMBOLS[30]}
+    spark = stub.spark
+
+    def partial_spark(symbols):
+        response = spark(symbols)
+        response['spark']['result'] = [item for item in response['spark']['result'] if item['symbol'] not in missing]
+        return response
+
+    monkeypatch.setattr(stub, "spark", partial_spark)
+    prices = fetch_prices(SYMBOLS, chunk_size=20)
+    assert prices == {symbol: chart_price(stub, symbol) for symbol in SYMBOLS}
+    # Three batches plus one chart request per missing symbol
+    assert len(spark_requests) == 3
+    assert stub.snapshot_counters()['requests'] == 3 + len(missing)
+    assert get_metrics().counters[('price_fallbacks_total', ())] == len(missing)
+
+
+def test_unavailable_prices_are_reported_as_na(stub, monkeypatch):
+    monkeypatch.setattr(stub, "spark", lambda symbols: {'spark': {'result': [], 'error': None}})
+    monkeypatch.setattr(stub, "chart", lambda symbol, params: {'chart': {'result': None, 'error': None}})
+    assert fetch_prices(SYMBOLS[:2]) == {SYMBOLS[0]: "N/A", SYMBOLS[1]: "N/A"}
+    assert get_metrics().gauges[('na_ratio', (('field', 'quote_price'),))] == 1.0
@@ -0,0 +1,108 @@
+import json
+import os
+from datetime import datetime
+
+import pytest
+
+import render
+from metrics import get_metrics
+from render import MANIFEST_FILENAME, content_hash, page_fields, render_page, render_pages
+
+
+def pages(count=5, price=100.0):
+    return [page_fields(f"SYM{i}", price + i, 30.0 + i, 50.0, float('nan'), 10.0) for i in range(count)]
+
+
+def mtimes(directory):
+    return {name: os.stat(os.path.join(directory, name)).st_mtime_ns for name in os.listdir(directory)}
+
+
+class FixedClock:
+    """Stand-in for `render.datetime` whose `now()` is set by the test."""
+    current = datetime(2025, 10, 10, 9, 30)
+
+    @classmethod
+    def now(cls):
+        return cls.current
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    monkeypatch.setattr(render, "datetime", FixedClock)
+    FixedClock.current = datetime(2025, 10, 10, 9, 30)
+    return FixedClock
+
+
+def test_first_render_writes_every_page_and_the_manifest(tmp_path, clock):
+    assert render_pages(str(tmp_path), pages()) == 5
+    assert sorted(os.listdir(tmp_path)) == sorted([f"SYM{i}.html" for i in range(5)] + [MANIFEST_FILENAME])
+    with open(tmp_path / MANIFEST_FILENAME) as f:
+        assert json.load(f) == {fields['symbol']: content_hash(fields) for fields in pages()}
+    with open(tmp_path / "SYM0.html") as f:
+        assert f.read() == render_page(pages()[0], "2025-10-10 09:30:00")
+
+
+def test_identical_second_render_writes_nothing_despite_a_new_stamp(tmp_path, clock):
+    render_pages(str(tmp_path), pages())
+    before = mtimes(tmp_path)
+    # A later run stamps a different "Last updated", which must not count as a change
+    clock.current = datetime(2025, 10, 11, 9, 30)
+    assert render_pages(str(tmp_path), pages()) == 0
+    assert mtimes(tmp_path) == before
+    assert get_metrics().counters[('pages_unchanged_total', ())] == 5
+
+
+def test_changed_value_rewrites_only_that_page(tmp_path, clock):
+    render_pages(str(tmp_path), pages())
+    changed = pages()
+    changed[2] = page_fields("SYM2", 102.0, 99.0, 50.0, float('nan'), 10.0)
+    clock.current = datetime(2025, 10, 11, 9, 30)
+
+    assert render_pages(str(tmp_path), changed) == 1
+    with open(tmp_path / "SYM2.html") as f:
+        page = f.read()
+    assert "99.00" in page and "2025-10-11 09:30:00" in page
+    with open(tmp_path / "SYM1.html") as f:
+        assert "2025-10-10 09:30:00" in f.read()
+    with open(tmp_path / MANIFEST_FILENAME) as f:
+        assert json.load(f)["SYM2"] == content_hash(changed[2])
+
+
+def test_deleted_page_is_rewritten(tmp_path, clock):
+    render_pages(str(tmp_path), pages())
+    os.remove(tmp_path / "SYM3.html")
+    assert render_pages(str(tmp_path), pages()) == 1
+    assert os.path.exists(tmp_path / "SYM3.html")
+
+
+def test_template_change_rewrites_every_page(tmp_path, clock, monkeypatch):
+    render_pages(str(tmp_path), pages())
+    monkeypatch.setattr(render, "TEMPLATE_HASH", "changed")
+    assert render_pages(str(tmp_path), pages()) == 5
+
+
+def test_unreadable_manifest_rewrites_every_page(tmp_path, clock):
+    render_pages(str(tmp_path), pages())
+    with open(tmp_path / MANIFEST_FILENAME, "w") as f:
+        f.write("{")
+    assert render_pages(str(tmp_path), pages()) == 5
+
+
+@pytest.mark.parametrize("count, parallel", [(3, False), (4, True), (10, True)])
+def test_parallel_path_is_used_at_the_threshold(tmp_path, clock, monkeypatch, count, parallel):
+    pools = []
+
+    class RecordingExecutor(render.ThreadPoolExecutor):
+        def __init__(self, *args, **kwargs):
+            pools.append(kwargs.get('max_workers'))
+            super().__init__(*args, **kwargs)
+
+    monkeypatch.setattr(render, "ThreadPoolExecutor", RecordingExecutor)
+    assert render_pages(str(tmp_path), pages(count), workers=3, parallel_threshold=4) == count
+    assert pools == ([3] if parallel else [])
+    assert len(os.listdir(tmp_path)) == count + 1
+
+
+def test_single_worker_never_starts_a_pool(tmp_path, clock, monkeypatch):
+    monkeypatch.setattr(render, "ThreadPoolExecutor", None)
+    assert render_pages(str(tmp_path), pages(10), workers=1, parallel_threshold=2) == 10
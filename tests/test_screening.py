@@ -0,0 +1,79 @@
+import numpy as np
+import pytest
+
+from screening import IndicatorTable, Screen, compile_rule, default_screens, run_screens
+from snapshot import STATUS_ERROR, STATUS_OK
+
+
+def entry(symbol, price=100.0, rsi=50.0, stoch_rsi=50.0, weekly_rsi=50.0, weekly_stoch_rsi=50.0, status=STATUS_OK):
+    return {'symbol': symbol, 'status': status, 'price': price, 'rsi': rsi, 'stoch_rsi': stoch_rsi,
+            'weekly_rsi': weekly_rsi, 'weekly_stoch_rsi': weekly_stoch_rsi}
+
+
+TABLE = IndicatorTable([
+    entry('LOW', weekly_rsi=15.0, weekly_stoch_rsi=5.0, rsi=40.0),
+    entry('HIGH', weekly_rsi=70.0, weekly_stoch_rsi=90.0, rsi=60.0),
+    entry('MISSING', weekly_rsi=None, weekly_stoch_rsi=None, rsi=None),
+    entry('FAILED', weekly_rsi=10.0, weekly_stoch_rsi=5.0, status=STATUS_ERROR),
+])
+
+
+def matches(rule):
+    func, _ = compile_rule(rule)
+    return [symbol for symbol, selected in zip(TABLE.symbols, func(TABLE)) if selected]
+
+
+def test_comparisons_never_match_missing_values():
+    assert matches({'field': 'weekly_rsi', 'op': '<', 'value': 100}) == ['LOW', 'HIGH', 'FAILED']
+    assert matches({'field': 'weekly_rsi', 'op': '!=', 'value': 15}) == ['HIGH', 'FAILED']
+    assert matches({'field': 'weekly_rsi', 'op': 'between', 'value': [0, 100]}) == ['LOW', 'HIGH', 'FAILED']
+
+
+@pytest.mark.parametrize("rule", [
+    {'not': {'field': 'weekly_rsi', 'op': '<', 'value': 20}},
+    {'not': {'not': {'field': 'weekly_rsi', 'op': '>=', 'value': 20}}},
+    {'not': {'all': [{'field': 'weekly_rsi', 'op': '<', 'value': 20},
+                     {'field': 'weekly_stoch_rsi', 'op': '<', 'value': 10}]}},
+])
+def test_negation_never_matches_missing_values(rule):
+    assert matches(rule) == ['HIGH']
+
+
+def test_negation_requires_every_referenced_field():
+    table = IndicatorTable([entry('PARTIAL', weekly_rsi=50.0, rsi=None)])
+    func, _ = compile_rule({'not': {'any': [{'field': 'weekly_rsi', 'op': '<', 'value': 20},
+                                            {'field': 'rsi', 'op': '<', 'value': 20}]}})
+    assert not func(table).any()
+
+
+def test_field_operands_and_combinators():
+    assert matches({'field': 'weekly_rsi', 'op': '<', 'value': {'field': 'rsi'}}) == ['LOW', 'FAILED']
+    assert matches({'any': [{'field': 'rsi', 'op': '>', 'value': 55},
+                            {'field': 'weekly_stoch_rsi', 'op': '<', 'value': 10}]}) == ['LOW', 'HIGH', 'FAILED']
+
+
+@pytest.mark.parametrize("rule", [
+    {'field': 'volume', 'op': '<', 'value': 1},
+    {'field': 'rsi', 'op': '~', 'value': 1},
+    {'field': 'rsi', 'op': 'between', 'value': 1},
+    {'field': 'rsi', 'op': '<', 'value': 'low'},
+    {'all': []},
+    [],
+])
+def test_malformed_rules_are_rejected(rule):
+    with pytest.raises(ValueError):
+        compile_rule(rule)
+
+
+def test_default_screen_is_the_recommended_buys_rule():
+    snapshot = {'generated_at': 0, 'tickers': TABLE.entries}
+    results = run_screens(snapshot, default_screens())
+    assert results['recommended_buys'] == [{'symbol': 'LOW', 'price': 100.0, 'weekly_rsi': 15.0,
+                                            'weekly_stoch_rsi': 5.0}]
+
+
+def test_screen_fields_default_to_the_referenced_ones():
+    screen = Screen('rsi_only', {'not': {'field': 'rsi', 'op': '>', 'value': 45}})
+    assert screen.fields == ['symbol', 'price', 'rsi']
+    assert screen.run(TABLE) == [{'symbol': 'LOW', 'price': 100.0, 'rsi': 40.0}]
+    assert np.array_equal(screen.mask(TABLE), [True, False, False, False])
@@ -0,0 +1,107 @@
+import gzip
+import json
+import os
+
+import static_site
+from snapshot import STATUS_ERROR, STATUS_NO_DATA, STATUS_OK, snapshot_entry
+from static_site import (ASSETS_DIRNAME, DATA_FIELDS, DATA_FILENAME, SITE_DIRNAME, asset_name, encode_site_data,
+                         index_html, site_data, write_assets, write_site)
+
+SNAPSHOT = {
+    'generated_at': 1760112000,
+    'tickers': [
+        snapshot_entry("AAPL", STATUS_OK, 245.274, 41.456, 12.0, float('nan'), 5.5551, timestamp=1760103000),
+        snapshot_entry("BAD", STATUS_ERROR),
+        snapshot_entry("MSFT", STATUS_OK, 510.1, 18.004, 3.3333, 19.5, 7.25, timestamp=1760103000),
+        snapshot_entry("NONE", STATUS_NO_DATA),
+    ],
+}
+SCREENS = {'recommended_buys': [{'symbol': "MSFT", 'price': "510.10"}], 'empty': []}
+
+
+def site_path(tmp_path, *parts):
+    return os.path.join(str(tmp_path), SITE_DIRNAME, *parts)
+
+
+def test_data_file_has_one_row_per_ok_ticker_in_field_order():
+    data = site_data(SNAPSHOT, SCREENS)
+    assert data['fields'] == DATA_FIELDS == ['symbol', 'price', 'rsi', 'stoch_rsi', 'weekly_rsi', 'weekly_stoch_rsi']
+    # Values are rounded as displayed, missing ones are null, failed symbols are left out
+    assert data['rows'] == [["AAPL", 245.27, 41.46, 12.0, None, 5.56],
+                            ["MSFT", 510.1, 18.0, 3.33, 19.5, 7.25]]
+    assert data['screens'] == {'recommended_buys': ["MSFT"], 'empty': []}
+    assert data['generated_at'] == SNAPSHOT['generated_at']
+    assert b" " not in encode_site_data(data)
+
+
+def test_written_data_and_gzip_copy_round_trip(tmp_path):
+    written = write_site(str(tmp_path), SNAPSHOT, SCREENS)
+    with open(site_path(tmp_path, DATA_FILENAME), "rb") as f:
+        body = f.read()
+    with open(site_path(tmp_path, DATA_FILENAME + ".gz"), "rb") as f:
+        compressed = f.read()
+    assert json.loads(body) == site_data(SNAPSHOT, SCREENS)
+    assert gzip.decompress(compressed) == body
+    assert written >= len(body) + len(compressed)
+
+
+def test_gzip_copy_is_optional(tmp_path):
+    write_site(str(tmp_path), SNAPSHOT, precompress=False)
+    assert not os.path.exists(site_path(tmp_path, DATA_FILENAME + ".gz"))
+
+
+def test_asset_names_change_with_content():
+    assert asset_name("site", "css", "a {}") == asset_name("site", "css", "a {}")
+    assert asset_name("site", "css", "a {}") != asset_name("site", "css", "b {}")
+    name = asset_name("site", "js", "x")
+    assert name.startswith("site.") and name.endswith(".js")
+
+
+def test_index_references_the_current_assets(tmp_path):
+    write_site(str(tmp_path), SNAPSHOT)
+    assets = sorted(os.listdir(site_path(tmp_path, ASSETS_DIRNAME)))
+    assert assets == sorted([static_site.STYLESHEET_NAME, static_site.SCRIPT_NAME])
+    with open(site_path(tmp_path, "index.html")) as f:
+        page = f.read()
+    assert page == index_html()
+    for name in assets:
+        assert f'"{ASSETS_DIRNAME}/{name}"' in page
+
+
+def test_refresh_rewrites_only_the_data(tmp_path):
+    write_site(str(tmp_path), SNAPSHOT)
+    unchanged = [site_path(tmp_path, "index.html")] + \
+        [site_path(tmp_path, ASSETS_DIRNAME, name) for name in os.listdir(site_path(tmp_path, ASSETS_DIRNAME))]
+    before = {path: os.stat(path).st_mtime_ns for path in unchanged}
+
+    assert write_assets(site_path(tmp_path)) == 0
+    newer = dict(SNAPSHOT, generated_at=SNAPSHOT['generated_at'] + 60)
+    written = write_site(str(tmp_path), newer)
+    assert {path: os.stat(path).st_mtime_ns for path in unchanged} == before
+    with open(site_path(tmp_path, DATA_FILENAME), "rb") as f:
+        body = f.read()
+    with open(site_path(tmp_path, DATA_FILENAME + ".gz"), "rb") as f:
+        assert written == len(body) + len(f.read())
+
+
+def test_new_asset_version_replaces_the_old_one(tmp_path, monkeypatch):
+    write_site(str(tmp_path), SNAPSHOT)
+    old_stylesheet = static_site.STYLESHEET_NAME
+    # An unrelated file in the assets directory is left alone
+    with open(site_path(tmp_path, ASSETS_DIRNAME, "logo.png"), "wb") as f:
+        f.write(b"png")
+
+    stylesheet = static_site.STYLESHEET + "footer { color: red; }\n"
+    monkeypatch.setattr(static_site, "STYLESHEET", stylesheet)
+    monkeypatch.setattr(static_site, "STYLESHEET_NAME", asset_name("site", "css", stylesheet))
+    assert static_site.STYLESHEET_NAME != old_stylesheet
+    write_site(str(tmp_path), SNAPSHOT)
+
+    assert sorted(os.listdir(site_path(tmp_path, ASSETS_DIRNAME))) == \
+        sorted(["logo.png", static_site.STYLESHEET_NAME, static_site.SCRIPT_NAME])
+    with open(site_path(tmp_path, ASSETS_DIRNAME, static_site.STYLESHEET_NAME)) as f:
+        assert f.read() == stylesheet
+    with open(site_path(tmp_path, "index.html")) as f:
+        page = f.read()
+    assert static_site.STYLESHEET_NAME in page and old_stylesheet not in page
+
@@ -0,0 +1,175 @@
+import json
+import os
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from stub_server import synthetic_symbols
+from update_ticker_files import update_ticker_files
+
+SYMBOLS = 24
+
+
+def run_update(tmp_path, requests_per_second, symbols=synthetic_symbols(SYMBOLS)):
+    tmp_path.mkdir(parents=True, exist_ok=True)
+    tickers_file = tmp_path / "tickers.txt"
+    tickers_file.write_text("\n".join(symbols) + "\n")
+    start = time.perf_counter()
+    update_ticker_files(str(tmp_path / "display" / "tickers"), str(tickers_file),
+                        requests_per_second=requests_per_second, workers=8)
+    return time.perf_counter() - start
+
+
+@pytest.mark.parametrize("rate", [8.0, 16.0])
+def test_wall_time_follows_the_rate_limit(stub, tmp_path, rate):
+    elapsed = run_update(tmp_path, rate)
+    requests = stub.snapshot_counters()['requests']
+    assert requests == SYMBOLS
+    # The bucket starts full (one second of burst), then paces the rest at `rate`
+    assert elapsed >= (requests - rate) / rate * 0.9
+    assert elapsed <= requests / rate + 1.5
+    # Far below the old fixed 0.5 s sleep per symbol
+    assert elapsed < SYMBOLS * 0.5 / 2
+
+
+def test_doubling_the_rate_halves_the_paced_time(stub, tmp_path):
+    slow = run_update(tmp_path / "slow", 6.0)
+    fast = run_update(tmp_path / "fast", 12.0)
+    # Paced portions: (24 - 6) / 6 = 3 s and (24 - 12) / 12 = 1 s
+    assert fast < slow / 2
+
+
+def test_outputs_do_not_depend_on_the_rate(stub, tmp_path):
+    run_update(tmp_path / "paced", 50.0)
+    run_update(tmp_path / "unlimited", 0)
+    outputs = {}
+    for run in ("paced", "unlimited"):
+        with open(tmp_path / run / "display" / "recommended_buys.json") as f:
+            recommended_buys = json.load(f)
+        with open(tmp_path / run / "display" / "snapshot.json") as f:
+            tickers = json.load(f)['tickers']
+        outputs[run] = (recommended_buys, tickers)
+    assert outputs['paced'] == outputs['unlimited']
+    assert len(outputs['paced'][1]) == SYMBOLS
+    pages = sorted(os.listdir(tmp_path / "paced" / "display" / "tickers"))
+    assert pages == sorted(os.listdir(tmp_path / "unlimited" / "display" / "tickers"))
+
+
+def test_sharded_run_reports_each_request_once(stub, tmp_path):
+    from metrics import get_metrics
+    from update_ticker_files import update_ticker_files_sharded
+
+    symbols = synthetic_symbols(SYMBOLS)
+    tickers_file = tmp_path / "tickers.txt"
+    tickers_file.write_text("\n".join(symbols) + "\n")
+    metrics = get_metrics()
+    # Counts already in the parent's registry must not come back from the workers
+    metrics.inc("http_requests_total", 100, host="example.com", status="200")
+    update_ticker_files_sharded(str(tmp_path / "display" / "tickers"), str(tickers_file), processes=2,
+                                requests_per_second=0)
+    requests = sum(value for (name, _), value in metrics.counters.items() if name == "http_requests_total")
+    assert requests == 100 + stub.snapshot_counters()['requests'] == 100 + SYMBOLS
+    with open(tmp_path / "display" / "snapshot.json") as f:
+        assert [entry['symbol'] for entry in json.load(f)['tickers']] == symbols
+
+
+class Crash(Exception):
+    """Simulated interruption of a run."""
+
+
+@pytest.fixture
+def fetched(monkeypatch):
+    """Symbols whose history the update fetches, with `fail` making chosen ones raise or return no data."""
+    import update_ticker_files as module
+
+    fetch_history = module.fetch_history
+    calls = []
+    fail = {}
+
+    def recording_fetch(symbol, fetcher, **kwargs):
+        calls.append(symbol)
+        if fail.get(symbol) == "error":
+            raise RuntimeError(f"fetch failed for {symbol}")
+        if fail.get(symbol) == "no_data":
+            return None
+        return fetch_history(symbol, fetcher, **kwargs)
+
+    monkeypatch.setattr(module, "fetch_history", recording_fetch)
+    return SimpleNamespace(calls=calls, fail=fail)
+
+
+def run_journaled(path, symbols, **options):
+    path.mkdir(parents=True, exist_ok=True)
+    tickers_file = path / "tickers.txt"
+    tickers_file.write_text("\n".join(symbols) + "\n")
+    update_ticker_files(str(path / "display" / "tickers"), str(tickers_file), requests_per_second=0,
+                        workers=4, batch_size=5, **options)
+    with open(path / "display" / "snapshot.json") as f:
+        return json.load(f)['tickers']
+
+
+def test_resume_after_a_crash_fetches_only_pending_symbols(stub, tmp_path, fetched, monkeypatch):
+    from journal import RunJournal
+
+    symbols = synthetic_symbols(12)
+    clean = run_journaled(tmp_path / "clean", symbols)
+
+    # Crash while journaling the second batch of five, so only the first is recorded
+    append = RunJournal.append
+    batches = []
+
+    def crashing_append(self, entries):
+        if batches:
+            raise Crash()
+        batches.append(entries)
+        append(self, entries)
+
+    monkeypatch.setattr(RunJournal, "append", crashing_append)
+    with pytest.raises(Crash):
+        run_journaled(tmp_path / "crashed", symbols)
+    monkeypatch.setattr(RunJournal, "append", append)
+    assert not (tmp_path / "crashed" / "display" / "snapshot.json").exists()
+
+    del fetched.calls[:]
+    resumed = run_journaled(tmp_path / "crashed", symbols, resume=True)
+    assert fetched.calls and sorted(fetched.calls) == sorted(symbols[5:])
+    assert resumed == clean
+    assert sorted(os.listdir(tmp_path / "crashed" / "display" / "tickers")) == \
+        sorted(os.listdir(tmp_path / "clean" / "display" / "tickers"))
+
+
+def test_retry_failed_reruns_errors_and_keeps_no_data(stub, tmp_path, fetched):
+    symbols = synthetic_symbols(12)
+    fetched.fail.update({symbols[1]: "error", symbols[7]: "error", symbols[4]: "no_data"})
+    first = {entry['symbol']: entry['status'] for entry in run_journaled(tmp_path, symbols)}
+    assert (first[symbols[1]], first[symbols[7]], first[symbols[4]]) == ("error", "error", "no_data")
+
+    fetched.fail.clear()
+    del fetched.calls[:]
+    retried = {entry['symbol']: entry['status'] for entry in run_journaled(tmp_path, symbols, retry_failed=True)}
+    assert sorted(fetched.calls) == sorted([symbols[1], symbols[7]])
+    assert retried == dict(first, **{symbols[1]: "ok", symbols[7]: "ok"})
+
+
+def test_each_symbol_is_counted_once_with_its_final_status(stub, tmp_path, fetched, monkeypatch):
+    import update_ticker_files as module
+    from metrics import get_metrics
+
+    symbols = synthetic_symbols(12)
+    fetched.fail.update({symbols[1]: "error", symbols[4]: "no_data"})
+    page_fields = module.page_fields
+
+    def failing_page_fields(symbol, *args):
+        if symbol == symbols[6]:
+            raise ValueError("cannot render")
+        return page_fields(symbol, *args)
+
+    monkeypatch.setattr(module, "page_fields", failing_page_fields)
+    statuses = {entry['symbol']: entry['status'] for entry in run_journaled(tmp_path, symbols)}
+    assert statuses[symbols[6]] == "error"
+
+    counts = {dict(labels)['status']: value for (name, labels), value in get_metrics().counters.items()
+              if name == "symbols_total"}
+    assert counts == {'ok': 9, 'error': 2, 'no_data': 1}
+    assert sum(counts.values()) == len(symbols)
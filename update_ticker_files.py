@@ -1,313 +1,400 @@
 import os
-import json
-import requests
-import pandas as pd
-import pandas_ta as ta
+import logging
+import multiprocessing
+import sys
 import time
-from datetime import datetime
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from bar_store import BarStore
+from data_plan import fetch_history, unix_seconds
+from journal import JOURNAL_FILENAME, RunJournal
+from indicators import IndicatorState, latest_indicators, load_states, save_states
+from http_transport import Transport
+from metrics import configure_logging, get_metrics, log_event
+from rate_limit import SharedTokenBucket, TokenBucket
+from render import MANIFEST_FILENAME, page_fields, render_pages
+from sharding import merge_shards, shard_snapshot_path, shard_suffix, shard_tickers
+from screening import DEFAULT_SCREEN, run_screens
+from static_site import OUTPUT_PAGES, PAGE_OUTPUT_MODES, SITE_OUTPUT_MODES, write_site
+from snapshot import (SNAPSHOT_FILENAME, STATUS_ERROR, STATUS_NO_DATA, STATUS_OK, load_snapshot, snapshot_entry,
+                      write_snapshot)
+
+# Fetch engine defaults: overall request rate, concurrent HTTP requests and worker threads
+DEFAULT_REQUESTS_PER_SECOND = 5.0
+DEFAULT_MAX_IN_FLIGHT = 4
+DEFAULT_WORKERS = 8
+
+# Symbols per journaled batch
+DEFAULT_BATCH_SIZE = 50
+
+logger = logging.getLogger(__name__)
+
+# Rate limiter shared by the shards of a process-pool run, set in each worker by `_init_shard_worker`
+_shard_rate_limiter = None
+
+
+def _fetch_ticker(symbol, fetcher, store=None):
+    """
+    Fetch the daily history for a single ticker.
+
+    Errors are contained to the symbol so one failure never aborts the run.
+
+    Args:
+        symbol (str): Ticker symbol
+        fetcher (Transport): Shared transport used for all API requests
+        store (BarStore): Optional persistent bar store for incremental history
+
+    Returns:
+        tuple: (SymbolHistory or None, fetch status)
+    """
+    metrics = get_metrics()
+    log_event(logger, logging.DEBUG, "symbol_fetch_started", symbol=symbol)
+    start = time.perf_counter()
+    try:
+        history = fetch_history(symbol, fetcher, store=store)
+        if history is None:
+            log_event(logger, logging.WARNING, "symbol_no_data", symbol=symbol)
+            status = STATUS_NO_DATA
+        else:
+            status = STATUS_OK
+    except Exception as e:
+        log_event(logger, logging.WARNING, "symbol_fetch_failed", symbol=symbol, error=e)
+        history, status = None, STATUS_ERROR
+    metrics.observe("symbol_fetch_seconds", time.perf_counter() - start)
+    return history, status
+
+def _stream_indicators(history, weekly, daily_state, weekly_state):
+    """
+    Advance a ticker's persisted daily and weekly indicator states with its newest bars.
+
+    Args:
+        history (SymbolHistory): Full stored history of the ticker
+        weekly (pd.DataFrame): Weekly bars resampled from the history
+        daily_state (IndicatorState): Daily indicator state
+        weekly_state (IndicatorState): Weekly indicator state
+
+    Returns:
+        tuple: (rsi, stoch_rsi, weekly_rsi, weekly_stoch_rsi)
+    """
+    daily = history.daily_window()
+    daily_state.advance(unix_seconds(daily.index), daily['close'].to_numpy())
+    weekly_state.advance(unix_seconds(weekly.index), weekly['close'].to_numpy())
+    return daily_state.rsi, daily_state.stoch_rsi_k, weekly_state.rsi, weekly_state.stoch_rsi_k
+
+def _read_tickers(tickers_file):
+    """Read ticker symbols (one per line), or None if the file is unreadable or empty."""
+    try:
+        with open(tickers_file, "r") as f:
+            tickers = [line.strip() for line in f if line.strip()]
+        
+        if not tickers:
+            log_event(logger, logging.ERROR, "no_tickers", path=tickers_file)
+            return None
+    except Exception as e:
+        log_event(logger, logging.ERROR, "tickers_file_unreadable", path=tickers_file, error=e)
+        return None
+    return tickers
 
-# Define thresholds for recommended buys
-WEEKLY_RSI_THRESHOLD = 20.0
-WEEKLY_STOCH_RSI_THRESHOLD = 10.0
+def _record_na_ratios(entries):
+    """Share of tickers missing each output value, so a degrading data source shows up in the report."""
+    metrics = get_metrics()
+    for field in ('price', 'rsi', 'stoch_rsi', 'weekly_rsi', 'weekly_stoch_rsi'):
+        missing = sum(entry[field] is None for entry in entries)
+        metrics.set_gauge("na_ratio", missing / len(entries) if entries else 0.0, field=field)
 
-def update_ticker_files(directory, tickers_file):
+def _compute_indicators(histories, states=None):
+    """
+    Compute daily and weekly RSI / Stochastic RSI for every fetched ticker at once.
+
+    Without `states` all histories are computed in one vectorized pass.
+    With them, persisted per-symbol states are advanced by the newest bars only,
+    which yields the same values as a full recompute.
+
+    Args:
+        histories (list): SymbolHistory objects
+        states (tuple): (daily, weekly) dictionaries of IndicatorState by symbol, updated in place
+
+    Returns:
+        list: (rsi, stoch_rsi, weekly_rsi, weekly_stoch_rsi) tuple per history
+    """
+    weekly_bars = [history.weekly() for history in histories]
+    weekly_closes = [weekly['close'].to_numpy() for weekly in weekly_bars]
+    if states is not None:
+        daily_states, weekly_states = states
+        values = [_stream_indicators(history, weekly,
+                                     daily_states.setdefault(history.symbol, IndicatorState()),
+                                     weekly_states.setdefault(history.symbol, IndicatorState()))
+                  for history, weekly in zip(histories, weekly_bars)]
+        rsi, stoch_rsi, weekly_rsi, weekly_stoch_rsi = (list(column) for column in zip(*values)) if values else ([], [], [], [])
+    else:
+        rsi, stoch_rsi = latest_indicators([history.daily_window()['close'].to_numpy() for history in histories])
+        weekly_rsi, weekly_stoch_rsi = latest_indicators(weekly_closes)
+
+    indicators = []
+    for i, history in enumerate(histories):
+        symbol = history.symbol
+        weekly_points = len(weekly_closes[i])
+
+        # Need at least 15 data points for a 14-period RSI
+        symbol_weekly_rsi = float('NaN')
+        if weekly_points >= 15:
+            symbol_weekly_rsi = weekly_rsi[i]
+        elif weekly_points:
+            log_event(logger, logging.DEBUG, "weekly_rsi_insufficient", symbol=symbol, points=weekly_points)
+        else:
+            log_event(logger, logging.WARNING, "weekly_history_empty", symbol=symbol)
+
+        # For Stochastic RSI we need even more data points
+        symbol_weekly_stoch_rsi = float('NaN')
+        if weekly_points >= 30:
+            symbol_weekly_stoch_rsi = weekly_stoch_rsi[i]
+        elif weekly_points:
+            log_event(logger, logging.DEBUG, "weekly_stoch_rsi_insufficient", symbol=symbol, points=weekly_points)
+
+            # Alternative: If we have enough data for RSI but not StochRSI, use a simpler calculation
+            if weekly_points >= 15 and not pd.isna(symbol_weekly_rsi):
+                # Simple alternative: normalize the RSI value to 0-100 range
+                symbol_weekly_stoch_rsi = (symbol_weekly_rsi - 30) * (100 / (70 - 30)) if 30 <= symbol_weekly_rsi <= 70 else (
+                    0 if symbol_weekly_rsi < 30 else 100)
+                log_event(logger, logging.DEBUG, "weekly_stoch_rsi_fallback", symbol=symbol,
+                          value=symbol_weekly_stoch_rsi)
+
+        log_event(logger, logging.DEBUG, "indicators_computed", symbol=symbol, weekly_points=weekly_points,
+                  rsi=rsi[i], stoch_rsi=stoch_rsi[i], weekly_rsi=symbol_weekly_rsi,
+                  weekly_stoch_rsi=symbol_weekly_stoch_rsi)
+        indicators.append((rsi[i], stoch_rsi[i], symbol_weekly_rsi, symbol_weekly_stoch_rsi))
+    return indicators
+
+def update_ticker_files(directory, tickers_file, requests_per_second=DEFAULT_REQUESTS_PER_SECOND,
+                        max_in_flight=DEFAULT_MAX_IN_FLIGHT, workers=DEFAULT_WORKERS, store_dir=None,
+                        shard_index=None, shard_count=1, rate_limiter=None, resume=False, retry_failed=False,
+                        batch_size=DEFAULT_BATCH_SIZE, screens=None, output_mode=OUTPUT_PAGES):
     """
     Update individual HTML files for each ticker with current price and technical indicators.
-    Also identifies and saves recommended buy opportunities based on RSI thresholds.
+    Also writes a snapshot of the run and runs the configured screens over it,
+    saving each screen's matches (recommended buys by default).
     
     Args:
         directory (str): Directory where ticker HTML files will be saved
         tickers_file (str): Path to file containing ticker symbols (one per line)
+        requests_per_second (float): Token bucket rate shared by all API requests
+        max_in_flight (int): Maximum number of concurrent HTTP requests per host
+        workers (int): Number of tickers processed concurrently
+        store_dir (str): Directory of the persistent bar store; when set only new bars
+            are downloaded, and indicators use the full stored history and are
+            updated incrementally from persisted per-symbol state
+        shard_index (int): Process only this shard of the tickers (0-based); its results go to
+            `snapshot.shard-<i>-of-<n>.json` for `merge_shards` instead of the final outputs
+        shard_count (int): Total number of shards
+        rate_limiter (TokenBucket): Limiter to use instead of a private one; a shard run on its
+            own gets `requests_per_second / shard_count` so all shards together stay in budget
+        resume (bool): Skip the symbols already recorded in the run journal by an interrupted run
+        retry_failed (bool): Re-run only the symbols the journal records as errors, keeping the rest
+        batch_size (int): Symbols fetched, computed, rendered and journaled together; a crash
+            loses at most one batch
+        screens (list): Screen objects to run (defaults to the screens config)
+        output_mode (str): "pages" writes one HTML file per ticker, "site" the single-page
+            viewer over one data file (see static_site), "both" writes both and "none" neither
     
     Returns:
-        list: List of recommended buy tickers (with weekly RSI < 20 and weekly stochastic RSI < 10)
+        list: Matches of the default screen, i.e. the recommended buys
     """
-    # Initialize list to store recommended buys
-    recommended_buys = []
     # Ensure the directory exists
     if not os.path.exists(directory):
         os.makedirs(directory)
         
     # Read ticker symbols from file
-    try:
-        with open(tickers_file, "r") as f:
-            tickers = [line.strip() for line in f if line.strip()]
-        
-        if not tickers:
-            print(f"No tickers found in {tickers_file}")
-            return
-    except Exception as e:
-        print(f"Error reading tickers file {tickers_file}: {e}")
+    tickers = _read_tickers(tickers_file)
+    if tickers is None:
         return
 
-    # User agent for API requests
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-    }
-    
-    # Process each ticker
-    for symbol in tickers:
-        filepath = os.path.join(directory, f"{symbol}.html")
-        print(f"Processing {symbol}...")
-        
-        # Add delay to avoid rate limiting
-        time.sleep(0.5)
-        
-        try:
-            # Fetch current stock data from Yahoo Finance API
-            url = f"https://query1.finance.yahoo.com/v8/finance/chart/{symbol}?range=1d&interval=1d"
-            response = requests.get(url, headers=headers)
-            response.raise_for_status()
-            data = response.json()
-
-            if not data or 'chart' not in data or 'result' not in data['chart'] or not data['chart']['result']:
-                print(f"No data found for {symbol}")
-                continue
-
-            # Extract close price
-            try:
-                close_price = data['chart']['result'][0]['indicators']['quote'][0]['close'][0]
-                if close_price is None:
-                    print(f"No close price found for {symbol}")
-                    close_price = 0.0
-            except (KeyError, IndexError) as e:
-                print(f"Error extracting close price for {symbol}: {e}")
-                close_price = 0.0
-
-            # Fetch historical data for technical indicators
-            url = f"https://query1.finance.yahoo.com/v8/finance/chart/{symbol}?range=60d&interval=1d"
-            response = requests.get(url, headers=headers)
-            response.raise_for_status()
-            data = response.json()
-            
-            # Initialize indicators with default values
-            rsi = float('NaN')
-            stoch_rsi = float('NaN')
-            weekly_rsi = float('NaN')
-            weekly_stoch_rsi = float('NaN')
-            
-            # Process daily data
-            if data.get('chart', {}).get('result'):
+    sharded = shard_index is not None
+    suffix = f".{shard_suffix(shard_index, shard_count)}" if sharded else ""
+    if sharded:
+        tickers = shard_tickers(tickers, shard_index, shard_count)
+        log_event(logger, logging.INFO, "shard_started", shard=shard_suffix(shard_index, shard_count),
+                  tickers=len(tickers))
+        if rate_limiter is None and requests_per_second:
+            rate_limiter = TokenBucket(requests_per_second / shard_count)
+
+    metrics = get_metrics()
+    if rate_limiter is None:
+        rate_limiter = TokenBucket(requests_per_second)
+    fetcher = Transport(rate_limiter=rate_limiter, per_host_limit=max_in_flight)
+    store = BarStore(store_dir) if store_dir else None
+    output_dir = os.path.dirname(directory)
+    manifest_name = MANIFEST_FILENAME.replace(".json", f"{suffix}.json")
+
+    # Symbols finished by earlier runs, as recorded in the journal
+    journal = RunJournal(os.path.join(output_dir, JOURNAL_FILENAME.replace(".jsonl", f"{suffix}.jsonl")))
+    done = journal.load() if resume or retry_failed else {}
+    if retry_failed:
+        done = {symbol: entry for symbol, entry in done.items() if entry['status'] != STATUS_ERROR}
+    pending = [symbol for symbol in tickers if symbol not in done]
+    if resume or retry_failed:
+        log_event(logger, logging.INFO, "journal_loaded", path=journal.path, finished=len(tickers) - len(pending),
+                  pending=len(pending))
+
+    states = None
+    if store_dir:
+        state_paths = [os.path.join(store_dir, "state", f"{interval}{suffix}.json") for interval in ("daily", "weekly")]
+        states = tuple(load_states(path) for path in state_paths)
+
+    pages_written = 0
+    with journal.open(resume=resume or retry_failed), ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        for start in range(0, len(pending), max(1, batch_size)):
+            batch = pending[start:start + max(1, batch_size)]
+
+            # Fetch histories concurrently; map() keeps results in ticker order so the
+            # recommended buys come out exactly as a sequential run would produce them
+            with metrics.timer("stage_seconds", stage="fetch"):
+                fetched = list(executor.map(lambda symbol: _fetch_ticker(symbol, fetcher, store), batch))
+            histories = [history for history, _ in fetched if history is not None]
+
+            # Compute indicators for the whole batch in one pass
+            with metrics.timer("stage_seconds", stage="indicators"):
+                indicators = iter(_compute_indicators(histories, states))
+
+            entries = []
+            pages = []
+            for symbol, (history, status) in zip(batch, fetched):
+                if history is None:
+                    entries.append(snapshot_entry(symbol, status))
+                    continue
+
+                rsi, stoch_rsi, weekly_rsi, weekly_stoch_rsi = next(indicators)
                 try:
-                    result = data['chart']['result'][0]
-                    timestamps = result.get('timestamp', [])
-                    quotes = result.get('indicators', {}).get('quote', [{}])[0]
-                    
-                    if timestamps and all(key in quotes for key in ['open', 'high', 'low', 'close', 'volume']):
-                        historical_data = pd.DataFrame(quotes, index=pd.to_datetime(timestamps, unit='s'))
-                        
-                        if not historical_data.empty and 'close' in historical_data.columns:
-                            # Calculate RSI
-                            try:
-                                rsi_series = ta.rsi(historical_data["close"], length=14)
-                                if isinstance(rsi_series, pd.Series) and not rsi_series.empty:
-                                    rsi = rsi_series.iloc[-1]
-                            except Exception as e:
-                                print(f"Error calculating RSI for {symbol}: {e}")
-
-                            # Calculate Stochastic RSI
-                            try:
-                                stoch_rsi_series = ta.stochrsi(historical_data["close"])
-                                if isinstance(stoch_rsi_series, pd.DataFrame) and not stoch_rsi_series.empty:
-                                    stoch_rsi = stoch_rsi_series["STOCHRSIk_14_14_3_3"].iloc[-1]
-                            except Exception as e:
-                                print(f"Error calculating Stochastic RSI for {symbol}: {e}")
+                    # Extract close price
+                    close_price = history.close
+                    if close_price is None:
+                        log_event(logger, logging.WARNING, "close_price_missing", symbol=symbol)
+                        close_price = 0.0
+
+                    pages.append(page_fields(symbol, close_price, rsi, stoch_rsi, weekly_rsi, weekly_stoch_rsi))
+                    entries.append(snapshot_entry(symbol, STATUS_OK, close_price, rsi, stoch_rsi, weekly_rsi,
+                                                  weekly_stoch_rsi,
+                                                  timestamp=int(unix_seconds(history.daily.index[-1:])[0])))
                 except Exception as e:
-                    print(f"Error processing daily data for {symbol}: {e}")
-            
-            # Fetch and process weekly data
-            try:
-                # Use a longer range (6 months) to ensure enough weekly data points
-                url = f"https://query1.finance.yahoo.com/v8/finance/chart/{symbol}?range=6mo&interval=1wk"
-                print(f"Fetching weekly data for {symbol} from {url}")
-                response = requests.get(url, headers=headers)
-                response.raise_for_status()
-                weekly_data = response.json()
-                
-                if weekly_data.get('chart', {}).get('result'):
-                    result = weekly_data['chart']['result'][0]
-                    timestamps = result.get('timestamp', [])
-                    quotes = result.get('indicators', {}).get('quote', [{}])[0]
-                    
-                    # Print debug info
-                    print(f"Weekly data for {symbol}: {len(timestamps)} data points")
-                    
-                    if timestamps and all(key in quotes for key in ['open', 'high', 'low', 'close', 'volume']):
-                        weekly_historical_data = pd.DataFrame(quotes, index=pd.to_datetime(timestamps, unit='s'))
-                        
-                        if not weekly_historical_data.empty and 'close' in weekly_historical_data.columns:
-                            # Check for NaN values and clean data
-                            if weekly_historical_data['close'].isna().any():
-                                print(f"Warning: NaN values found in weekly data for {symbol}, cleaning...")
-                                weekly_historical_data = weekly_historical_data.dropna(subset=['close'])
-                            
-                            # Calculate weekly RSI
-                            try:
-                                # Need at least 15 data points for a 14-period RSI
-                                if len(weekly_historical_data) >= 15:
-                                    weekly_rsi_series = ta.rsi(weekly_historical_data["close"], length=14)
-                                    if isinstance(weekly_rsi_series, pd.Series) and not weekly_rsi_series.empty:
-                                        weekly_rsi = weekly_rsi_series.iloc[-1]
-                                        print(f"Successfully calculated weekly RSI for {symbol}: {weekly_rsi}")
-                                else:
-                                    print(f"Not enough weekly data points for {symbol} to calculate RSI: {len(weekly_historical_data)}")
-                            except Exception as e:
-                                print(f"Error calculating weekly RSI for {symbol}: {e}")
-
-                            # Calculate weekly Stochastic RSI
-                            try:
-                                # For Stochastic RSI we need even more data points
-                                if len(weekly_historical_data) >= 30:  # Need more points for stochastic calculation
-                                    weekly_stoch_rsi_series = ta.stochrsi(weekly_historical_data["close"])
-                                    if isinstance(weekly_stoch_rsi_series, pd.DataFrame) and not weekly_stoch_rsi_series.empty:
-                                        weekly_stoch_rsi = weekly_stoch_rsi_series["STOCHRSIk_14_14_3_3"].iloc[-1]
-                                        print(f"Successfully calculated weekly Stochastic RSI for {symbol}: {weekly_stoch_rsi}")
-                                else:
-                                    print(f"Not enough weekly data points for {symbol} to calculate Stochastic RSI: {len(weekly_historical_data)}")
-                                    
-                                    # Alternative: If we have enough data for RSI but not StochRSI, use a simpler calculation
-                                    if len(weekly_historical_data) >= 15 and not pd.isna(weekly_rsi):
-                                        # Simple alternative: normalize the RSI value to 0-100 range
-                                        weekly_stoch_rsi = (weekly_rsi - 30) * (100 / (70 - 30)) if 30 <= weekly_rsi <= 70 else (
-                                            0 if weekly_rsi < 30 else 100)
-                                        print(f"Used alternative weekly Stochastic RSI calculation for {symbol}: {weekly_stoch_rsi}")
-                            except Exception as e:
-                                print(f"Error calculating weekly Stochastic RSI for {symbol}: {e}")
-                        else:
-                            print(f"Empty or invalid weekly historical data for {symbol}")
-                    else:
-                        print(f"Missing required fields in weekly data for {symbol}")
-                else:
-                    print(f"No weekly chart results found for {symbol}")
-            except Exception as e:
-                print(f"Error processing weekly data for {symbol}: {e}")
-
-            # Check if this stock meets the recommended buy criteria
-            if (not pd.isna(weekly_rsi) and not pd.isna(weekly_stoch_rsi) and
-                weekly_rsi < WEEKLY_RSI_THRESHOLD and weekly_stoch_rsi < WEEKLY_STOCH_RSI_THRESHOLD):
-                recommended_buys.append({
-                    'symbol': symbol,
-                    'price': close_price,
-                    'weekly_rsi': weekly_rsi,
-                    'weekly_stoch_rsi': weekly_stoch_rsi
-                })
-                print(f"Added {symbol} to recommended buys: RSI={weekly_rsi:.2f}, StochRSI={weekly_stoch_rsi:.2f}")
-
-            # Format indicator values for display
-            rsi_str = f"{rsi:.2f}" if not pd.isna(rsi) else "N/A"
-            stoch_rsi_str = f"{stoch_rsi:.2f}" if not pd.isna(stoch_rsi) else "N/A"
-            weekly_rsi_str = f"{weekly_rsi:.2f}" if not pd.isna(weekly_rsi) else "N/A"
-            weekly_stoch_rsi_str = f"{weekly_stoch_rsi:.2f}" if not pd.isna(weekly_stoch_rsi) else "N/A"
-
-            # Create HTML content with improved styling
-            new_content = f"""<!DOCTYPE html>
-<html lang="en">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>{symbol} - Stock Info</title>
-    <style>
-        body {{
-            font-family: Arial, sans-serif;
-            max-width: 800px;
-            margin: 0 auto;
-            padding: 20px;
-            line-height: 1.6;
-        }}
-        h1 {{
-            color: #0a66c2;
-            border-bottom: 2px solid #eee;
-            padding-bottom: 10px;
-        }}
-        .stock-info {{
-            display: grid;
-            grid-template-columns: repeat(auto-fill, minmax(300px, 1fr));
-            gap: 20px;
-            margin-top: 20px;
-        }}
-        .info-card {{
-            border: 1px solid #ddd;
-            border-radius: 8px;
-            padding: 15px;
-            background-color: #f9f9f9;
-        }}
-        .price {{
-            font-size: 24px;
-            font-weight: bold;
-            color: #333;
-        }}
-        .indicator {{
-            margin: 10px 0;
-        }}
-        .indicator-name {{
-            font-weight: bold;
-        }}
-        .indicator-value {{
-            float: right;
-        }}
-        .footer {{
-            margin-top: 30px;
-            font-size: 0.8em;
-            color: #666;
-            text-align: center;
-        }}
-        a {{
-            color: #0a66c2;
-            text-decoration: none;
-        }}
-        a:hover {{
-            text-decoration: underline;
-        }}
-    </style>
-</head>
-<body>
-    <h1>{symbol}</h1>
-    <div class="stock-info">
-        <div class="info-card">
-            <div class="price">Price: ${close_price:.2f}</div>
-            <div class="indicator">
-                <span class="indicator-name">RSI (Daily):</span>
-                <span class="indicator-value">{rsi_str}</span>
-            </div>
-            <div class="indicator">
-                <span class="indicator-name">Stochastic RSI (Daily):</span>
-                <span class="indicator-value">{stoch_rsi_str}</span>
-            </div>
-        </div>
-        <div class="info-card">
-            <div class="indicator">
-                <span class="indicator-name">RSI (Weekly):</span>
-                <span class="indicator-value">{weekly_rsi_str}</span>
-            </div>
-            <div class="indicator">
-                <span class="indicator-name">Stochastic RSI (Weekly):</span>
-                <span class="indicator-value">{weekly_stoch_rsi_str}</span>
-            </div>
-        </div>
-    </div>
-    <div class="footer">
-        <p>Last updated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}</p>
-        <p><a href="../index.html">Back to NASDAQ 100 List</a></p>
-    </div>
-</body>
-</html>"""
-
-            # Write HTML file
-            with open(filepath, "w") as f:
-                f.write(new_content)
-                
-            print(f"Successfully updated {symbol}")
-
-        except Exception as e:
-            print(f"Error processing {symbol}: {e}")
-
-    # Save recommended buys to a JSON file for the frontend
-    recommended_buys_file = os.path.join(os.path.dirname(directory), "recommended_buys.json")
-    with open(recommended_buys_file, "w") as f:
-        json.dump(recommended_buys, f, indent=2)
-    
-    print(f"Found {len(recommended_buys)} recommended buy opportunities")
+                    log_event(logger, logging.WARNING, "symbol_processing_failed", symbol=symbol, error=e)
+                    entries.append(snapshot_entry(symbol, STATUS_ERROR))
+
+            # Each symbol is counted once, with the status it ends the run with
+            for entry in entries:
+                metrics.inc("symbols_total", status=entry['status'])
+
+            # Rewrite only the pages whose data changed
+            if output_mode in PAGE_OUTPUT_MODES:
+                with metrics.timer("stage_seconds", stage="render"):
+                    pages_written += render_pages(directory, pages, manifest_name=manifest_name)
+
+            # The batch counts as finished once it is in the journal
+            journal.append(entries)
+            done.update((entry['symbol'], entry) for entry in entries)
+            log_event(logger, logging.DEBUG, "batch_finished", finished=len(done), total=len(tickers))
+
+    if states is not None:
+        for path, symbol_states in zip(state_paths, states):
+            save_states(path, symbol_states)
+
+    entries = [done[symbol] for symbol in tickers]
+    _record_na_ratios(entries)
+
+    # Save the run as one machine-readable snapshot; downstream JSON is derived from it
+    with metrics.timer("stage_seconds", stage="snapshot"):
+        if sharded:
+            snapshot = write_snapshot(shard_snapshot_path(output_dir, shard_index, shard_count), entries)
+        else:
+            snapshot = write_snapshot(os.path.join(output_dir, SNAPSHOT_FILENAME), entries)
+
+    if sharded:
+        # The screen outputs are written by merge_shards once every shard is done
+        log_event(logger, logging.INFO, "shard_finished", shard=shard_suffix(shard_index, shard_count),
+                  tickers=len(tickers), processed=len(pending), **fetcher.stats())
+        return run_screens(snapshot, screens).get(DEFAULT_SCREEN, [])
+
+    # Run every screen over the snapshot and save each one's matches for the frontend
+    results = run_screens(snapshot, screens, output_dir)
+    recommended_buys = results.get(DEFAULT_SCREEN, [])
+    if output_mode in SITE_OUTPUT_MODES:
+        with metrics.timer("stage_seconds", stage="site"):
+            write_site(output_dir, snapshot, results)
+    stats = fetcher.stats()
+    metrics.set_gauge("http_connections_opened", stats['connections_opened'])
+    log_event(logger, logging.INFO, "update_finished", tickers=len(tickers), processed=len(pending),
+              pages_written=pages_written, recommended_buys=len(recommended_buys), **stats)
+    return recommended_buys
+
+def _init_shard_worker(rate_limiter, log_level):
+    global _shard_rate_limiter
+    _shard_rate_limiter = rate_limiter
+    configure_logging(log_level)
+
+def _run_shard(directory, tickers_file, shard_index, shard_count, options):
+    """Process-pool task: run one shard and hand its metrics back to the parent."""
+    # A forked worker starts with a copy of the parent's registry, and a reused one with its last shard's
+    get_metrics().reset()
+    update_ticker_files(directory, tickers_file, shard_index=shard_index, shard_count=shard_count,
+                        rate_limiter=_shard_rate_limiter, **options)
+    return get_metrics().report()
+
+def update_ticker_files_sharded(directory, tickers_file, processes=None,
+                                requests_per_second=DEFAULT_REQUESTS_PER_SECOND, max_in_flight=DEFAULT_MAX_IN_FLIGHT,
+                                workers=DEFAULT_WORKERS, store_dir=None, resume=False, retry_failed=False, screens=None,
+                                output_mode=OUTPUT_PAGES):
+    """
+    Run `update_ticker_files` split into one shard per worker process and merge the results.
+
+    Fetching, parsing and indicator math all run in parallel across cores,
+    while every worker draws from one shared `requests_per_second` budget.
+    The merged snapshot and recommended buys match an unsharded run.
+
+    Args:
+        directory (str): Directory where ticker HTML files will be saved
+        tickers_file (str): Path to file containing ticker symbols (one per line)
+        processes (int): Number of worker processes and shards (defaults to the CPU count)
+        requests_per_second (float): Token bucket rate shared by all workers
+        max_in_flight (int): Maximum number of concurrent HTTP requests per host and worker
+        workers (int): Number of tickers fetched concurrently per worker
+        store_dir (str): Directory of the persistent bar store
+        resume (bool): Let each shard skip the symbols already in its run journal
+        retry_failed (bool): Let each shard re-run only the symbols its journal records as errors
+        screens (list): Screen objects to run on the merged snapshot (defaults to the screens config)
+        output_mode (str): "pages", "site" or "both", as for `update_ticker_files`
+
+    Returns:
+        list: Recommended buys of the merged run
+    """
+    tickers = _read_tickers(tickers_file)
+    if tickers is None:
+        return
+    if not os.path.exists(directory):
+        os.makedirs(directory)
+
+    processes = max(1, processes or os.cpu_count() or 1)
+    # Forked workers inherit the already-imported modules instead of re-importing pandas each
+    start_method = "fork" if "fork" in multiprocessing.get_all_start_methods() else "spawn"
+    context = multiprocessing.get_context(start_method)
+    rate_limiter = SharedTokenBucket(requests_per_second, context=context)
+    options = {'max_in_flight': max_in_flight, 'workers': workers, 'store_dir': store_dir, 'resume': resume,
+               'retry_failed': retry_failed, 'output_mode': output_mode}
+    metrics = get_metrics()
+
+    with ProcessPoolExecutor(max_workers=processes, mp_context=context, initializer=_init_shard_worker,
+                             initargs=(rate_limiter, logging.getLogger().level)) as executor:
+        futures = [executor.submit(_run_shard, directory, tickers_file, shard_index, processes, options)
+                   for shard_index in range(processes)]
+        for future in futures:
+            metrics.merge(future.result())
+
+    output_dir = os.path.dirname(directory)
+    with metrics.timer("stage_seconds", stage="merge"):
+        recommended_buys = merge_shards(output_dir, processes, tickers, screens, output_mode)
+    _record_na_ratios(load_snapshot(os.path.join(output_dir, SNAPSHOT_FILENAME))['tickers'])
+    log_event(logger, logging.INFO, "update_finished", tickers=len(tickers), shards=processes,
+              recommended_buys=len(recommended_buys))
     return recommended_buys
 
 if __name__ == "__main__":
-    update_ticker_files("nasdaq_display/tickers", "Stocks_Scanner/nasdaq100_tickers.txt")
+    from main import main
+    main(["update", *sys.argv[1:]])
@@ -1,61 +1,53 @@
 import os
 import json
-import re
+import logging
+import sys
 
-def update_tickers_json(tickers_dir, tickers_json_path):
+from metrics import log_event, timed
+from screening import load_screens, run_screens
+from snapshot import load_snapshot, tickers_from_snapshot
+
+logger = logging.getLogger(__name__)
+
+@timed("stage_seconds", stage="rebuild_json")
+def update_tickers_json(snapshot_path, tickers_json_path, screens_dir=None, screens_path=None):
     """
-    Update the tickers.json file with data extracted from individual ticker HTML files.
+    Update the tickers.json file (and optionally every screen's output, such as
+    recommended_buys.json) from the snapshot written by update_ticker_files.
+    No network access is needed, so screens can be changed and re-run at will.
     
     Args:
-        tickers_dir (str): Directory containing ticker HTML files
+        snapshot_path (str): Path of the run snapshot (snapshot.json)
         tickers_json_path (str): Path where the tickers.json file will be saved
+        screens_dir (str): Optional directory where the screen outputs will be saved
+        screens_path (str): Screens config (defaults to the shipped screens.json)
     """
-    if not os.path.exists(tickers_dir):
-        print(f"Tickers directory {tickers_dir} does not exist")
+    if not os.path.exists(snapshot_path):
+        log_event(logger, logging.ERROR, "snapshot_missing", path=snapshot_path)
         return
-        
-    tickers = []
     
-    # Process each HTML file in the directory
-    for filename in os.listdir(tickers_dir):
-        if filename.endswith(".html"):
-            symbol = filename[:-5]  # Remove .html extension
-            filepath = os.path.join(tickers_dir, filename)
-            
-            try:
-                with open(filepath, "r") as f:
-                    content = f.read()
-
-                # Extract the price using regex for more robust parsing
-                # This handles both the old format (<p>Price: $123.45</p>) and new format (class="price")
-                price_match = re.search(r'<div class="price">Price: \$([\d.]+)', content)
-                if price_match:
-                    price = price_match.group(1)
-                else:
-                    # Fall back to old format
-                    price_match = re.search(r'<p>Price: \$([\d.]+)</p>', content)
-                    if price_match:
-                        price = price_match.group(1)
-                    else:
-                        print(f"Could not extract price for {symbol}")
-                        price = "N/A"
-
-                tickers.append({"symbol": symbol, "price": price})
-                print(f"Added {symbol} with price {price} to tickers.json")
-                
-            except Exception as e:
-                print(f"Error processing {symbol}: {e}")
+    try:
+        snapshot = load_snapshot(snapshot_path)
+    except Exception as e:
+        log_event(logger, logging.ERROR, "snapshot_unreadable", path=snapshot_path, error=e)
+        return
     
-    # Sort tickers alphabetically by symbol
-    tickers.sort(key=lambda x: x["symbol"])
+    tickers = tickers_from_snapshot(snapshot)
     
     # Write to JSON file
     try:
         with open(tickers_json_path, "w") as f:
             json.dump(tickers, f, indent=4)
-        print(f"Successfully updated {tickers_json_path} with {len(tickers)} tickers")
+        log_event(logger, logging.INFO, "tickers_json_written", path=tickers_json_path, tickers=len(tickers))
     except Exception as e:
-        print(f"Error writing to {tickers_json_path}: {e}")
+        log_event(logger, logging.ERROR, "tickers_json_write_failed", path=tickers_json_path, error=e)
+    
+    if screens_dir:
+        try:
+            run_screens(snapshot, load_screens(screens_path) if screens_path else None, screens_dir)
+        except Exception as e:
+            log_event(logger, logging.ERROR, "screens_failed", path=screens_dir, error=e)
 
 if __name__ == "__main__":
-    update_tickers_json("nasdaq_display/tickers", "nasdaq_display/tickers.json")
+    from main import main
+    main(["rebuild-json", *sys.argv[1:]])